@@ -19,8 +19,9 @@ DROP TABLE IF EXISTS AppContext;
 -------------------------------------
 CREATE TABLE AppContext
 (
-    ContextID   INTEGER PRIMARY KEY CHECK (ContextID = 1),
-    CurrentUser TEXT NOT NULL
+    ContextID        INTEGER PRIMARY KEY CHECK (ContextID = 1),
+    CurrentUser      TEXT NOT NULL,
+    DeferAuditSearch INTEGER NOT NULL DEFAULT 0 CHECK (DeferAuditSearch IN (0, 1))
 );
 
 INSERT OR IGNORE INTO AppContext (ContextID, CurrentUser)
@@ -225,9 +226,9 @@ CREATE TABLE AuditLog
 CREATE INDEX IdxInstanceDate ON FlightInstance (FlightDate);
 CREATE INDEX IdxBookingItemBooking ON BookingItem (BookingID);
 CREATE INDEX IdxPassengerName ON Passenger (LastName);
-CREATE INDEX IdxRouteOrigin ON Route (OriginAirportID);
+CREATE INDEX IdxRouteOriginDest ON Route (OriginAirportID, DestinationAirportID);
 CREATE INDEX IdxRouteDest ON Route (DestinationAirportID);
 CREATE INDEX IdxFlightRoute ON Flight (RouteID);
-CREATE INDEX IdxInstanceFlight ON FlightInstance (FlightID);
+CREATE UNIQUE INDEX IdxInstanceFlightDate ON FlightInstance (FlightID, FlightDate);
 CREATE INDEX IdxBookingItemInstance ON BookingItem (InstanceID);
 CREATE INDEX IdxCrewStaff ON CrewAssignment (StaffID);
@@ -75,15 +75,19 @@ SELECT
     s.LastName,
     ca.DutyRole,
     fi.InstanceID,
+    f.FlightID,
     f.FlightNumber,
     fi.FlightDate,
     fi.SchedDepUtc,
     fi.SchedArrUtc,
-    fi.Status
+    fi.Status,
+    r.OriginAirportID,
+    r.DestinationAirportID
 FROM CrewAssignment ca
 JOIN Staff s ON s.StaffID = ca.StaffID
 JOIN FlightInstance fi ON fi.InstanceID = ca.InstanceID
 JOIN Flight f ON f.FlightID = fi.FlightID
+JOIN Route r ON r.RouteID = f.RouteID
 WHERE s.Role = 'Pilot';
 
 
@@ -0,0 +1,226 @@
+-- Supporting tables (derived data kept by the triggers in 03_Triggers.sql,
+-- bookkeeping) and extra indexes.
+-- Safe to re-run on an existing database: nothing here drops data.
+
+-- Seat Inventory
+-----------------
+-- Occupied seat count per FlightInstance. Version is bumped on every
+-- BookingItem change so in-memory seat maps can tell when they are stale.
+
+CREATE TABLE IF NOT EXISTS InstanceSeatCount
+(
+    InstanceID INTEGER PRIMARY KEY,
+    SeatsTaken INTEGER NOT NULL DEFAULT 0 CHECK (SeatsTaken >= 0),
+    Version    INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY(InstanceID) REFERENCES FlightInstance(InstanceID)
+        ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+-- Backfill once for databases created before this table existed.
+INSERT INTO InstanceSeatCount (InstanceID, SeatsTaken, Version)
+SELECT InstanceID, COUNT(*), 1
+FROM BookingItem
+WHERE SeatNo IS NOT NULL
+  AND ItemStatus IS NOT 'Cancelled'
+  AND NOT EXISTS (SELECT 1 FROM InstanceSeatCount)
+GROUP BY InstanceID;
+
+-- Partitions
+-------------
+-- Past seasons of FlightInstance (with CrewAssignment and BookingItem) moved
+-- to DB/Partitions/FlightInstance_<year>.db. See src/Partitions.py.
+
+CREATE TABLE IF NOT EXISTS InstancePartition
+(
+    PartitionYear INTEGER PRIMARY KEY,
+    FileName      TEXT NOT NULL UNIQUE,
+    FirstDate     TEXT NOT NULL,
+    LastDate      TEXT NOT NULL,
+    Instances     INTEGER NOT NULL DEFAULT 0,
+    ArchivedAt    TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Change Sequence
+------------------
+-- Latest change per FlightInstance (its own row or its crew), numbered by a
+-- monotonic ChangeSeq. Live boards poll for ChangeSeq > last seen, which is a
+-- range scan on IdxInstanceChangeSeq. Deleted instances stay as tombstones.
+
+CREATE TABLE IF NOT EXISTS InstanceChange
+(
+    InstanceID INTEGER PRIMARY KEY,
+    ChangeSeq  INTEGER NOT NULL,
+    Deleted    INTEGER NOT NULL DEFAULT 0 CHECK (Deleted IN (0, 1))
+);
+
+CREATE INDEX IF NOT EXISTS IdxInstanceChangeSeq ON InstanceChange (ChangeSeq);
+
+-- Change Feed
+--------------
+-- AuditSeq gives every AuditLog row a monotonic sequence number in commit
+-- order (AUTOINCREMENT never reuses a number), so change-data-capture
+-- consumers resume with a primary-key range scan. CdcCursor stores each
+-- consumer's position; CdcFeed records how far the feed has been truncated.
+
+CREATE TABLE IF NOT EXISTS AuditSeq
+(
+    Seq      INTEGER PRIMARY KEY AUTOINCREMENT,
+    LogID    TEXT NOT NULL UNIQUE,
+    LoggedAt TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS CdcCursor
+(
+    Consumer  TEXT PRIMARY KEY,
+    LastSeq   INTEGER NOT NULL DEFAULT 0,
+    UpdatedAt TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS CdcFeed
+(
+    FeedID           INTEGER PRIMARY KEY CHECK (FeedID = 1),
+    TruncatedThrough INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO CdcFeed (FeedID, TruncatedThrough)
+VALUES (1, 0);
+
+-- Backfill once, in AuditLog insertion order, for databases created before
+-- the feed existed.
+INSERT INTO AuditSeq (LogID, LoggedAt)
+SELECT LogID, COALESCE(ChangedAt, CURRENT_TIMESTAMP)
+FROM AuditLog
+WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'AuditSeq')
+ORDER BY rowid;
+
+-- Gates
+--------
+-- Known departure gates per airport, used by the gate allocator to find free
+-- gates. Terminal is '' when an airport has no terminals.
+
+CREATE TABLE IF NOT EXISTS AirportGate
+(
+    AirportID INTEGER NOT NULL,
+    Terminal  TEXT NOT NULL DEFAULT '',
+    Gate      TEXT NOT NULL,
+    PRIMARY KEY (AirportID, Terminal, Gate),
+    FOREIGN KEY(AirportID) REFERENCES Airport(AirportID)
+        ON UPDATE CASCADE ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- Backfill once from the gates flights already use.
+INSERT OR IGNORE INTO AirportGate (AirportID, Terminal, Gate)
+SELECT DISTINCT r.OriginAirportID, upper(trim(COALESCE(fi.Terminal, ''))), upper(trim(fi.Gate))
+FROM FlightInstance fi
+JOIN Flight f ON f.FlightID = fi.FlightID
+JOIN Route r ON r.RouteID = f.RouteID
+WHERE trim(COALESCE(fi.Gate, '')) <> ''
+  AND NOT EXISTS (SELECT 1 FROM AirportGate);
+
+-- Station Index
+----------------
+-- Origin and destination airport of every FlightInstance, copied down from
+-- its Route so a station board is an index range scan on (airport, time)
+-- instead of a filter behind the Flight and Route joins. The indexes carry
+-- InstanceID (the rowid), so they cover the board's range predicate.
+
+CREATE TABLE IF NOT EXISTS InstanceStation
+(
+    InstanceID      INTEGER PRIMARY KEY,
+    OriginAirportID INTEGER NOT NULL,
+    DestAirportID   INTEGER NOT NULL,
+    SchedDepUtc     TEXT NOT NULL,
+    SchedArrUtc     TEXT NOT NULL,
+    FOREIGN KEY(InstanceID) REFERENCES FlightInstance(InstanceID)
+        ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS IdxStationDeparture ON InstanceStation (OriginAirportID, SchedDepUtc);
+CREATE INDEX IF NOT EXISTS IdxStationArrival ON InstanceStation (DestAirportID, SchedArrUtc);
+
+-- Backfill once for databases created before this table existed.
+INSERT INTO InstanceStation (InstanceID, OriginAirportID, DestAirportID, SchedDepUtc, SchedArrUtc)
+SELECT fi.InstanceID, r.OriginAirportID, r.DestinationAirportID, fi.SchedDepUtc, fi.SchedArrUtc
+FROM FlightInstance fi
+JOIN Flight f ON f.FlightID = fi.FlightID
+JOIN Route r ON r.RouteID = f.RouteID
+WHERE NOT EXISTS (SELECT 1 FROM InstanceStation);
+
+-- Reference Sync
+-----------------
+-- Hash of each OpenFlights source row as last applied by
+-- src/ReferenceSync.py, so a re-sync only touches rows whose source changed.
+
+CREATE TABLE IF NOT EXISTS ReferenceRowHash
+(
+    TableName TEXT NOT NULL,
+    RowID     INTEGER NOT NULL,
+    RowHash   INTEGER NOT NULL,
+    PRIMARY KEY (TableName, RowID)
+) WITHOUT ROWID;
+
+-- Route Lookup
+---------------
+-- Routes are found by origin and destination airport, each given as an IATA
+-- or ICAO code: the code indexes turn the codes into AirportIDs and the
+-- composite index finds the route(s) between them (or every route from the
+-- origin) without scanning Route. It replaces the single-column origin
+-- index of older databases.
+
+CREATE INDEX IF NOT EXISTS IdxRouteOriginDest ON Route (OriginAirportID, DestinationAirportID);
+DROP INDEX IF EXISTS IdxRouteOrigin;
+CREATE INDEX IF NOT EXISTS IdxAirportIata ON Airport (IataCode);
+CREATE INDEX IF NOT EXISTS IdxAirportIcao ON Airport (IcaoCode);
+
+-- List Filters
+---------------
+-- FlightNo list filters compare without case (in_ci); this index lets each
+-- listed number be a lookup instead of a scan of every instance.
+
+CREATE INDEX IF NOT EXISTS IdxFlightNumber ON Flight (FlightNumber COLLATE NOCASE);
+
+-- Search Index
+---------------
+-- Trigram FTS5 copies of the text that listings filter on by substring, so
+-- "contains" filters are index lookups rather than LIKE '%...%' scans. Each
+-- table's rowid is the source row's key, except AuditSearch, which carries
+-- LogID (AuditLog has no INTEGER PRIMARY KEY, so VACUUM may renumber its
+-- rowids) and whose Changes column is OldValue and NewValue together. Kept
+-- in sync by the Search_* triggers. Airport text is not indexed: the table is
+-- small, and for names (which share trigrams such as "Air") and countries a
+-- LIKE scan is as fast or faster, so older databases drop AirportSearch.
+
+DROP TABLE IF EXISTS AirportSearch;
+CREATE VIRTUAL TABLE IF NOT EXISTS AirlineSearch USING fts5(Name, tokenize = 'trigram');
+CREATE VIRTUAL TABLE IF NOT EXISTS FlightSearch USING fts5(FlightNumber, tokenize = 'trigram');
+CREATE VIRTUAL TABLE IF NOT EXISTS AuditSearch USING fts5(LogID UNINDEXED, Changes, tokenize = 'trigram');
+
+-- Backfill once for databases created before these tables existed.
+INSERT INTO AirlineSearch (rowid, Name)
+SELECT AirlineID, Name
+FROM Airline
+WHERE NOT EXISTS (SELECT 1 FROM AirlineSearch);
+
+INSERT INTO FlightSearch (rowid, FlightNumber)
+SELECT FlightID, FlightNumber
+FROM Flight
+WHERE NOT EXISTS (SELECT 1 FROM FlightSearch);
+
+INSERT INTO AuditSearch (LogID, Changes)
+SELECT LogID, COALESCE(OldValue, '') || ' ' || COALESCE(NewValue, '')
+FROM AuditLog
+WHERE NOT EXISTS (SELECT 1 FROM AuditSearch);
+
+-- Reference Version
+--------------------
+-- A counter per reference table, bumped by the Version_* triggers on every
+-- change, so in-memory copies (the autocomplete index) can tell when they
+-- are stale with one primary-key read.
+
+CREATE TABLE IF NOT EXISTS ReferenceVersion
+(
+    TableName TEXT PRIMARY KEY,
+    Version   INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO ReferenceVersion (TableName) VALUES ('Airport'), ('Airline');
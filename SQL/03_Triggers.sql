@@ -6,6 +6,40 @@ DROP TRIGGER IF EXISTS Log_CrewAssignment_Update;
 DROP TRIGGER IF EXISTS Log_CrewAssignment_Delete;
 DROP TRIGGER IF EXISTS Validate_FlightInstance_Insert_StatusVsActualArrUtc;
 DROP TRIGGER IF EXISTS Validate_FlightInstance_Update_StatusVsActualArrUtc;
+DROP TRIGGER IF EXISTS Seat_BookingItem_Insert;
+DROP TRIGGER IF EXISTS Seat_BookingItem_Update;
+DROP TRIGGER IF EXISTS Seat_BookingItem_Delete;
+DROP TRIGGER IF EXISTS Seat_FlightInstance_Aircraft_Update;
+DROP TRIGGER IF EXISTS Change_FlightInstance_Insert;
+DROP TRIGGER IF EXISTS Change_FlightInstance_Update;
+DROP TRIGGER IF EXISTS Change_FlightInstance_Delete;
+DROP TRIGGER IF EXISTS Change_CrewAssignment_Insert;
+DROP TRIGGER IF EXISTS Change_CrewAssignment_Update;
+DROP TRIGGER IF EXISTS Change_CrewAssignment_Delete;
+DROP TRIGGER IF EXISTS Feed_AuditLog_Insert;
+DROP TRIGGER IF EXISTS Gate_FlightInstance_Insert;
+DROP TRIGGER IF EXISTS Gate_FlightInstance_Update;
+DROP TRIGGER IF EXISTS Station_FlightInstance_Insert;
+DROP TRIGGER IF EXISTS Station_FlightInstance_Update;
+DROP TRIGGER IF EXISTS Station_Flight_Route_Update;
+DROP TRIGGER IF EXISTS Station_Route_Airports_Update;
+DROP TRIGGER IF EXISTS Search_Airport_Insert;
+DROP TRIGGER IF EXISTS Search_Airport_Update;
+DROP TRIGGER IF EXISTS Search_Airport_Delete;
+DROP TRIGGER IF EXISTS Search_Airline_Insert;
+DROP TRIGGER IF EXISTS Search_Airline_Update;
+DROP TRIGGER IF EXISTS Search_Airline_Delete;
+DROP TRIGGER IF EXISTS Version_Airport_Insert;
+DROP TRIGGER IF EXISTS Version_Airport_Update;
+DROP TRIGGER IF EXISTS Version_Airport_Delete;
+DROP TRIGGER IF EXISTS Version_Airline_Insert;
+DROP TRIGGER IF EXISTS Version_Airline_Update;
+DROP TRIGGER IF EXISTS Version_Airline_Delete;
+DROP TRIGGER IF EXISTS Search_Flight_Insert;
+DROP TRIGGER IF EXISTS Search_Flight_Update;
+DROP TRIGGER IF EXISTS Search_Flight_Delete;
+DROP TRIGGER IF EXISTS Search_AuditLog_Insert;
+DROP TRIGGER IF EXISTS Search_AuditLog_Delete;
 
 UPDATE FlightInstance
 SET Status = 'Landed'
@@ -167,3 +201,317 @@ BEGIN
         (SELECT CurrentUser FROM AppContext WHERE ContextID = 1)
     );
 END;
+
+-- Seat inventory: a BookingItem holds a seat while it has a SeatNo
+-- and is not Cancelled.
+
+CREATE TRIGGER Seat_BookingItem_Insert
+AFTER INSERT ON BookingItem
+BEGIN
+    INSERT INTO InstanceSeatCount (InstanceID, SeatsTaken, Version)
+    VALUES (NEW.InstanceID, NEW.SeatNo IS NOT NULL AND NEW.ItemStatus IS NOT 'Cancelled', 1)
+    ON CONFLICT(InstanceID) DO UPDATE
+    SET SeatsTaken = SeatsTaken + excluded.SeatsTaken,
+        Version = Version + 1;
+END;
+
+CREATE TRIGGER Seat_BookingItem_Update
+AFTER UPDATE OF InstanceID, SeatNo, ItemStatus ON BookingItem
+BEGIN
+    UPDATE InstanceSeatCount
+    SET SeatsTaken = SeatsTaken - (OLD.SeatNo IS NOT NULL AND OLD.ItemStatus IS NOT 'Cancelled'),
+        Version = Version + 1
+    WHERE InstanceID = OLD.InstanceID;
+
+    INSERT INTO InstanceSeatCount (InstanceID, SeatsTaken, Version)
+    VALUES (NEW.InstanceID, NEW.SeatNo IS NOT NULL AND NEW.ItemStatus IS NOT 'Cancelled', 1)
+    ON CONFLICT(InstanceID) DO UPDATE
+    SET SeatsTaken = SeatsTaken + excluded.SeatsTaken,
+        Version = Version + 1;
+END;
+
+CREATE TRIGGER Seat_BookingItem_Delete
+AFTER DELETE ON BookingItem
+BEGIN
+    UPDATE InstanceSeatCount
+    SET SeatsTaken = SeatsTaken - (OLD.SeatNo IS NOT NULL AND OLD.ItemStatus IS NOT 'Cancelled'),
+        Version = Version + 1
+    WHERE InstanceID = OLD.InstanceID;
+END;
+
+-- A new aircraft means a new cabin layout, so cached seat maps must reload.
+CREATE TRIGGER Seat_FlightInstance_Aircraft_Update
+AFTER UPDATE OF AircraftID ON FlightInstance
+WHEN OLD.AircraftID IS NOT NEW.AircraftID
+BEGIN
+    UPDATE InstanceSeatCount
+    SET Version = Version + 1
+    WHERE InstanceID = NEW.InstanceID;
+END;
+
+-- Change sequence for live boards: every FlightInstance or CrewAssignment
+-- write moves the instance to the next ChangeSeq.
+
+CREATE TRIGGER Change_FlightInstance_Insert
+AFTER INSERT ON FlightInstance
+BEGIN
+    INSERT INTO InstanceChange (InstanceID, ChangeSeq, Deleted)
+    VALUES (NEW.InstanceID, (SELECT COALESCE(MAX(ChangeSeq), 0) + 1 FROM InstanceChange), 0)
+    ON CONFLICT(InstanceID) DO UPDATE
+    SET ChangeSeq = excluded.ChangeSeq,
+        Deleted = excluded.Deleted;
+END;
+
+CREATE TRIGGER Change_FlightInstance_Update
+AFTER UPDATE ON FlightInstance
+BEGIN
+    INSERT INTO InstanceChange (InstanceID, ChangeSeq, Deleted)
+    SELECT OLD.InstanceID, (SELECT COALESCE(MAX(ChangeSeq), 0) + 1 FROM InstanceChange), 1
+    WHERE OLD.InstanceID IS NOT NEW.InstanceID
+    ON CONFLICT(InstanceID) DO UPDATE
+    SET ChangeSeq = excluded.ChangeSeq,
+        Deleted = excluded.Deleted;
+
+    INSERT INTO InstanceChange (InstanceID, ChangeSeq, Deleted)
+    VALUES (NEW.InstanceID, (SELECT COALESCE(MAX(ChangeSeq), 0) + 1 FROM InstanceChange), 0)
+    ON CONFLICT(InstanceID) DO UPDATE
+    SET ChangeSeq = excluded.ChangeSeq,
+        Deleted = excluded.Deleted;
+END;
+
+CREATE TRIGGER Change_FlightInstance_Delete
+AFTER DELETE ON FlightInstance
+BEGIN
+    INSERT INTO InstanceChange (InstanceID, ChangeSeq, Deleted)
+    VALUES (OLD.InstanceID, (SELECT COALESCE(MAX(ChangeSeq), 0) + 1 FROM InstanceChange), 1)
+    ON CONFLICT(InstanceID) DO UPDATE
+    SET ChangeSeq = excluded.ChangeSeq,
+        Deleted = excluded.Deleted;
+END;
+
+CREATE TRIGGER Change_CrewAssignment_Insert
+AFTER INSERT ON CrewAssignment
+BEGIN
+    INSERT INTO InstanceChange (InstanceID, ChangeSeq, Deleted)
+    VALUES (NEW.InstanceID, (SELECT COALESCE(MAX(ChangeSeq), 0) + 1 FROM InstanceChange), 0)
+    ON CONFLICT(InstanceID) DO UPDATE
+    SET ChangeSeq = excluded.ChangeSeq,
+        Deleted = excluded.Deleted;
+END;
+
+CREATE TRIGGER Change_CrewAssignment_Update
+AFTER UPDATE ON CrewAssignment
+BEGIN
+    INSERT INTO InstanceChange (InstanceID, ChangeSeq, Deleted)
+    SELECT OLD.InstanceID, (SELECT COALESCE(MAX(ChangeSeq), 0) + 1 FROM InstanceChange), 0
+    WHERE OLD.InstanceID IS NOT NEW.InstanceID
+    ON CONFLICT(InstanceID) DO UPDATE
+    SET ChangeSeq = excluded.ChangeSeq,
+        Deleted = excluded.Deleted;
+
+    INSERT INTO InstanceChange (InstanceID, ChangeSeq, Deleted)
+    VALUES (NEW.InstanceID, (SELECT COALESCE(MAX(ChangeSeq), 0) + 1 FROM InstanceChange), 0)
+    ON CONFLICT(InstanceID) DO UPDATE
+    SET ChangeSeq = excluded.ChangeSeq,
+        Deleted = excluded.Deleted;
+END;
+
+CREATE TRIGGER Change_CrewAssignment_Delete
+AFTER DELETE ON CrewAssignment
+BEGIN
+    INSERT INTO InstanceChange (InstanceID, ChangeSeq, Deleted)
+    SELECT OLD.InstanceID, (SELECT COALESCE(MAX(ChangeSeq), 0) + 1 FROM InstanceChange), 0
+    WHERE EXISTS (SELECT 1 FROM FlightInstance WHERE InstanceID = OLD.InstanceID)
+    ON CONFLICT(InstanceID) DO UPDATE
+    SET ChangeSeq = excluded.ChangeSeq,
+        Deleted = excluded.Deleted;
+END;
+
+-- Change feed: number every audit row as it is written.
+
+CREATE TRIGGER Feed_AuditLog_Insert
+AFTER INSERT ON AuditLog
+BEGIN
+    INSERT INTO AuditSeq (LogID) VALUES (NEW.LogID);
+END;
+
+-- Gate inventory: any gate a departure is given becomes a known gate of its
+-- origin airport.
+
+CREATE TRIGGER Gate_FlightInstance_Insert
+AFTER INSERT ON FlightInstance
+WHEN trim(COALESCE(NEW.Gate, '')) <> ''
+BEGIN
+    INSERT OR IGNORE INTO AirportGate (AirportID, Terminal, Gate)
+    SELECT r.OriginAirportID, upper(trim(COALESCE(NEW.Terminal, ''))), upper(trim(NEW.Gate))
+    FROM Flight f
+    JOIN Route r ON r.RouteID = f.RouteID
+    WHERE f.FlightID = NEW.FlightID;
+END;
+
+CREATE TRIGGER Gate_FlightInstance_Update
+AFTER UPDATE OF FlightID, Terminal, Gate ON FlightInstance
+WHEN trim(COALESCE(NEW.Gate, '')) <> ''
+BEGIN
+    INSERT OR IGNORE INTO AirportGate (AirportID, Terminal, Gate)
+    SELECT r.OriginAirportID, upper(trim(COALESCE(NEW.Terminal, ''))), upper(trim(NEW.Gate))
+    FROM Flight f
+    JOIN Route r ON r.RouteID = f.RouteID
+    WHERE f.FlightID = NEW.FlightID;
+END;
+
+-- Station index: keep InstanceStation in step with the instance's times and
+-- its flight's route. Deletes cascade from FlightInstance.
+CREATE TRIGGER Station_FlightInstance_Insert
+AFTER INSERT ON FlightInstance
+BEGIN
+    INSERT OR REPLACE INTO InstanceStation (InstanceID, OriginAirportID, DestAirportID, SchedDepUtc, SchedArrUtc)
+    SELECT NEW.InstanceID, r.OriginAirportID, r.DestinationAirportID, NEW.SchedDepUtc, NEW.SchedArrUtc
+    FROM Flight f
+    JOIN Route r ON r.RouteID = f.RouteID
+    WHERE f.FlightID = NEW.FlightID;
+END;
+
+CREATE TRIGGER Station_FlightInstance_Update
+AFTER UPDATE OF FlightID, SchedDepUtc, SchedArrUtc ON FlightInstance
+BEGIN
+    INSERT OR REPLACE INTO InstanceStation (InstanceID, OriginAirportID, DestAirportID, SchedDepUtc, SchedArrUtc)
+    SELECT NEW.InstanceID, r.OriginAirportID, r.DestinationAirportID, NEW.SchedDepUtc, NEW.SchedArrUtc
+    FROM Flight f
+    JOIN Route r ON r.RouteID = f.RouteID
+    WHERE f.FlightID = NEW.FlightID;
+END;
+
+CREATE TRIGGER Station_Flight_Route_Update
+AFTER UPDATE OF RouteID ON Flight
+BEGIN
+    UPDATE InstanceStation
+    SET OriginAirportID = (SELECT OriginAirportID FROM Route WHERE RouteID = NEW.RouteID),
+        DestAirportID   = (SELECT DestinationAirportID FROM Route WHERE RouteID = NEW.RouteID)
+    WHERE InstanceID IN (SELECT InstanceID FROM FlightInstance WHERE FlightID = NEW.FlightID);
+END;
+
+CREATE TRIGGER Station_Route_Airports_Update
+AFTER UPDATE OF OriginAirportID, DestinationAirportID ON Route
+BEGIN
+    UPDATE InstanceStation
+    SET OriginAirportID = NEW.OriginAirportID,
+        DestAirportID   = NEW.DestinationAirportID
+    WHERE InstanceID IN (
+        SELECT fi.InstanceID
+        FROM Flight f
+        JOIN FlightInstance fi ON fi.FlightID = f.FlightID
+        WHERE f.RouteID = NEW.RouteID
+    );
+END;
+
+-- Search Index
+---------------
+
+CREATE TRIGGER Search_Airline_Insert
+AFTER INSERT
+ON Airline
+BEGIN
+    INSERT INTO AirlineSearch (rowid, Name) VALUES (NEW.AirlineID, NEW.Name);
+END;
+
+CREATE TRIGGER Search_Airline_Update
+AFTER UPDATE OF AirlineID, Name
+ON Airline
+BEGIN
+    DELETE FROM AirlineSearch WHERE rowid = OLD.AirlineID;
+    INSERT INTO AirlineSearch (rowid, Name) VALUES (NEW.AirlineID, NEW.Name);
+END;
+
+CREATE TRIGGER Search_Airline_Delete
+AFTER DELETE
+ON Airline
+BEGIN
+    DELETE FROM AirlineSearch WHERE rowid = OLD.AirlineID;
+END;
+
+CREATE TRIGGER Search_Flight_Insert
+AFTER INSERT
+ON Flight
+BEGIN
+    INSERT INTO FlightSearch (rowid, FlightNumber) VALUES (NEW.FlightID, NEW.FlightNumber);
+END;
+
+CREATE TRIGGER Search_Flight_Update
+AFTER UPDATE OF FlightID, FlightNumber
+ON Flight
+BEGIN
+    DELETE FROM FlightSearch WHERE rowid = OLD.FlightID;
+    INSERT INTO FlightSearch (rowid, FlightNumber) VALUES (NEW.FlightID, NEW.FlightNumber);
+END;
+
+CREATE TRIGGER Search_Flight_Delete
+AFTER DELETE
+ON Flight
+BEGIN
+    DELETE FROM FlightSearch WHERE rowid = OLD.FlightID;
+END;
+
+-- Bulk writers (schedule generation, status feeds) set
+-- AppContext.DeferAuditSearch for their transaction and index its audit rows
+-- in one statement before committing; see Transactions.py.
+CREATE TRIGGER Search_AuditLog_Insert
+AFTER INSERT
+ON AuditLog
+WHEN (SELECT DeferAuditSearch FROM AppContext WHERE ContextID = 1) = 0
+BEGIN
+    INSERT INTO AuditSearch (LogID, Changes)
+    VALUES (NEW.LogID, COALESCE(NEW.OldValue, '') || ' ' || COALESCE(NEW.NewValue, ''));
+END;
+
+CREATE TRIGGER Search_AuditLog_Delete
+AFTER DELETE
+ON AuditLog
+BEGIN
+    DELETE FROM AuditSearch WHERE LogID = OLD.LogID;
+END;
+
+-- Reference Version
+--------------------
+
+CREATE TRIGGER Version_Airport_Insert
+AFTER INSERT
+ON Airport
+BEGIN
+    UPDATE ReferenceVersion SET Version = Version + 1 WHERE TableName = 'Airport';
+END;
+
+CREATE TRIGGER Version_Airport_Update
+AFTER UPDATE OF AirportID, IataCode, IcaoCode, Name, City, Country
+ON Airport
+BEGIN
+    UPDATE ReferenceVersion SET Version = Version + 1 WHERE TableName = 'Airport';
+END;
+
+CREATE TRIGGER Version_Airport_Delete
+AFTER DELETE
+ON Airport
+BEGIN
+    UPDATE ReferenceVersion SET Version = Version + 1 WHERE TableName = 'Airport';
+END;
+
+CREATE TRIGGER Version_Airline_Insert
+AFTER INSERT
+ON Airline
+BEGIN
+    UPDATE ReferenceVersion SET Version = Version + 1 WHERE TableName = 'Airline';
+END;
+
+CREATE TRIGGER Version_Airline_Update
+AFTER UPDATE OF AirlineID, IataCode, IcaoCode, Name, Active
+ON Airline
+BEGIN
+    UPDATE ReferenceVersion SET Version = Version + 1 WHERE TableName = 'Airline';
+END;
+
+CREATE TRIGGER Version_Airline_Delete
+AFTER DELETE
+ON Airline
+BEGIN
+    UPDATE ReferenceVersion SET Version = Version + 1 WHERE TableName = 'Airline';
+END;
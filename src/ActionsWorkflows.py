@@ -1,14 +1,45 @@
+import json
 import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
 from App import get_conn, fetch_one
 import Queries as q
+from Autocomplete import search_airlines, search_airports
+from Bookings import BookingItemRequest, BookingRequest, PassengerInfo, create_booking
+from Delays import current_network
+from Gates import GateBuffers, apply_gate_assignments, plan_gate_day
+from LocalTime import UTC_FORMAT, add_local_times, airport_zones, drop_zones
+import MemoryMode
+from Pairings import PILOT_ROLES, apply_crew_plan, plan_crew_for_dates
+from ReferenceSync import print_sync_result, sync_reference_data
+from Partitions import archive_year
+from Reports import REPORTS, run_report
+from Rotation import apply_proposals, plan_rotations
+from Schedule import ScheduleRequest, expand_schedule, generate_schedule
+from StatusFeed import DEFAULT_BATCH_SIZE as DEFAULT_FEED_BATCH_SIZE, ingest_feed, print_feed_progress, print_feed_result
+from Snapshot import (
+    DEFAULT_REFRESH_SECONDS,
+    auto_refresh,
+    auto_refresh_paused,
+    describe_report_source,
+    report_db_path,
+    reports_use_snapshot,
+    route_reports_to_snapshot,
+    start_auto_refresh,
+    stop_auto_refresh,
+    take_snapshot,
+)
 from FilterSQL import init_filters, format_filters, prompt_filter
 from AllFilterSpecs import (
+    AIRLINE_FILTER_SPECS,
     AIRPORT_FILTER_SPECS,
     AUDIT_LOG_FILTER_SPECS,
     FLIGHT_FILTER_SPECS,
     PILOT_SCHEDULE_FILTER_SPECS,
+    ROUTE_FILTER_SPECS,
 )
+from SeatInventory import CABIN_CLASSES
 from UI import (
     AbortAction,
     VALID_STATUSES,
@@ -16,6 +47,7 @@ from UI import (
     choose_from_list,
     clear_filters,
     fetch_row_with_headers,
+    fetch_rows_with_headers,
     handle_integrity_error,
     is_quit,
     is_valid_update_value,
@@ -32,6 +64,8 @@ from UI import (
 )
 
 PILOT_DUTY_ROLES = ["Captain", "First Officer"]
+# Rows shown of a plan (rotations, gates, delays, pairings) before "... N more".
+PREVIEW_ROWS = 50
 
 def pick_id_from_filtered_listing(
     *,
@@ -46,10 +80,13 @@ def pick_id_from_filtered_listing(
     invalid_input_text: str,
     not_found_text: str,
     allow_filtering: bool = True,
+    search=None,
 ) -> int:
 
     # Generic ID picker with filtering support.
     # Shows a filtered listing, allows user to filter/reset/select an ID.
+    # With search (Autocomplete.search_airports / search_airlines), any other
+    # text lists the closest matches, typos and all, to pick an ID from.
     # Returns the selected ID once validated to exist in the database.
 
     if allow_filtering and prompt_filters is None:
@@ -64,7 +101,10 @@ def pick_id_from_filtered_listing(
         print_rows(headers, rows)
         print(f"Rows: {len(rows)}")
         print(f"Filters: {format_filters_fn(filters) if format_filters_fn else '(none)'}")
-        print(f"Commands: {'f=filter, r=reset, ' if allow_filtering else ''}<{id_name}>=select, -q=back")
+        print(
+            f"Commands: {'f=filter, r=reset, ' if allow_filtering else ''}<{id_name}>=select, "
+            f"{'<text>=search, ' if search is not None else ''}-q=back"
+        )
         while True:
             cmd = read_input(prompt_text).strip()
             if is_quit(cmd):
@@ -81,6 +121,9 @@ def pick_id_from_filtered_listing(
             try:
                 selected_id = int(cmd)
             except ValueError:
+                if search is not None and cmd:
+                    print_search_matches(cmd, search)
+                    continue
                 print(invalid_input_text)
                 continue
 
@@ -89,6 +132,18 @@ def pick_id_from_filtered_listing(
                     return selected_id
             print(not_found_text)
 
+# Closest autocomplete matches for text, best first.
+
+def print_search_matches(text: str, search) -> None:
+    with get_conn() as conn:
+        headers, matches = search(conn, text)
+    if not matches:
+        print(f"No matches for {text!r}.")
+        return
+    print()
+    print_rows(headers, [match.row for match in matches])
+
+
 # Show Pilot List and prompt for a valid pilot StaffID.
 
 def prompt_valid_pilot_staff_id() -> int:
@@ -177,6 +232,8 @@ def update_instance_information_fields(instance_id: int) -> None:
         if not record_exists(conn, q.SQL_INSTANCE_EXISTS, (instance_id,)):
             print("\nInstance Not Found.\n")
             return
+        # Brought up to date first, so the sync below holds only this edit.
+        network, _ = current_network(conn)
 
         update_whitelisted_field(
             conn=conn,
@@ -198,12 +255,22 @@ def update_instance_information_fields(instance_id: int) -> None:
             non_clearable_fields={"FlightDate", "SchedDepUtc", "SchedArrUtc"},
         )
         conn.commit()
+        knock_on = [leg for leg in network.sync(conn) if leg.instance_id != instance_id]
 
     print("\nUpdated:\n")
     preview_query(q.SQL_INSTANCE_OVERVIEW_BY_ID, (instance_id,))
+    if knock_on:
+        print("\nKnock-On Effect")
+        print("---------------")
+        print_delay_impact(knock_on)
+
+
+# Adds DepLocal/ArrLocal to flight and pilot listings from the cached airport zones.
 
+def render_local_times(headers: list[str], rows: list[tuple]) -> tuple[list[str], list[tuple]]:
+    return add_local_times(headers, rows, airport_zones(get_conn))
 
-# Menu Option 1: Browse flights with multi-criteria filtering.
+# Menu Option 1: Browse flights with multi-criteria filtering (w = live board).
 
 def view_flights_by_criteria() -> None:
     filters = init_filters(FLIGHT_FILTER_SPECS)
@@ -214,6 +281,9 @@ def view_flights_by_criteria() -> None:
         filters=filters,
         prompt_filters=lambda f: prompt_filter(f, FLIGHT_FILTER_SPECS, choose_from_list, prompt_optional, VALID_STATUSES),
         format_filters=lambda f: format_filters(f, FLIGHT_FILTER_SPECS),
+        build_delta_query=q.build_flights_by_criteria,
+        sort_key=q.flights_by_criteria_sort_key,
+        render_rows=render_local_times,
     )
 
 # Menu Option 2: Update flight instance fields, assign pilots, or delete instance.
@@ -304,6 +374,7 @@ def view_pilot_schedule() -> None:
         filters=filters,
         prompt_filters=lambda f: prompt_filter(f, PILOT_SCHEDULE_FILTER_SPECS, choose_from_list, prompt_optional, VALID_STATUSES),
         format_filters=lambda f: format_filters(f, PILOT_SCHEDULE_FILTER_SPECS),
+        render_rows=render_local_times,
     )
 
  # Menu Option 4: View/update airports (destination management).
@@ -335,9 +406,10 @@ def destination_management() -> None:
         prompt_filters=lambda f: prompt_filter(f, AIRPORT_FILTER_SPECS, choose_from_list, prompt_optional, VALID_STATUSES),
         id_name="AirportID",
         exists_sql=q.SQL_AIRPORT_BY_ID,
-        prompt_text="Enter AirportID (or Command): ",
-        invalid_input_text="Enter f, r, an AirportID, or -q.",
+        prompt_text="Enter AirportID, search text (or Command): ",
+        invalid_input_text="Enter f, r, an AirportID, search text, or -q.",
         not_found_text="Airport not found. Choose from the list above (or -q).",
+        search=search_airports,
     )
 
     with get_conn() as conn:
@@ -358,6 +430,7 @@ def destination_management() -> None:
             non_clearable_fields={"Name"},
         )
         conn.commit()
+        drop_zones()
 
         headers2, updated = fetch_row_with_headers(conn, q.SQL_AIRPORT_BY_ID, (airport_id,))
 
@@ -418,6 +491,53 @@ def add_flight_instance_for_flight(flight_id: int) -> None:
 
         return
 
+# Expand a days-of-week pattern over a date range into FlightInstances, inserted in one transaction.
+
+def add_schedule_for_flight(flight_id: int) -> None:
+    preview_query(q.SQL_AIRCRAFT_IN_SERVICE)
+    aircraft_id = prompt_int("Enter AircraftID (or -q): ")
+
+    while True:
+        first_date = prompt_required("First FlightDate (YYYY-MM-DD): ", "First FlightDate")
+        last_date = prompt_required("Last FlightDate (YYYY-MM-DD): ", "Last FlightDate")
+        days = prompt_optional("Days of week, 1=Mon..7=Sun (blank = 1234567): ") or "1234567"
+        time_basis = choose_from_list("Departure Time Is:", ["UTC", "Local"])
+        departure = prompt_required(f"Departure time, {time_basis} (HH:MM): ", "Departure time")
+        block_minutes = prompt_int("Block time in minutes (or -q): ")
+        terminal = prompt_optional("Terminal (blank allowed): ")
+        gate = prompt_optional("Gate (blank allowed): ")
+
+        request = ScheduleRequest(
+            flight_id, first_date, last_date, days, departure, block_minutes,
+            aircraft_id, time_basis, terminal, gate,
+        )
+        with get_conn() as conn:
+            try:
+                legs = expand_schedule(conn, request)
+            except ValueError as e:
+                print(f"{e} Try Again (or -q to cancel).\n")
+                continue
+            if not legs:
+                print("No operating days in that range. Try Again (or -q to cancel).\n")
+                continue
+
+            print(f"\n{len(legs)} instance(s), first {legs[0][1]} UTC, last {legs[-1][1]} UTC.")
+            if choose_from_list("Create These Instances?", ["Yes", "No"]) == "No":
+                print("Schedule Cancelled.")
+                return
+            try:
+                result = generate_schedule(conn, [request])
+            except sqlite3.IntegrityError as e:
+                handle_integrity_error(e)
+                print("Try Again (or -q to cancel).\n")
+                continue
+
+        print(f"\nCreated {result.created} flight instance(s).")
+        if result.duplicates:
+            print(f"Skipped {len(result.duplicates)} date(s) that already had an instance: "
+                  f"{', '.join(result.duplicates[:10])}{' ...' if len(result.duplicates) > 10 else ''}")
+        return
+
 # Show existing flights with filtering, allow user to pick one or create new.
 # Returns FlightID if existing flight selected, None if user wants to create new.
 
@@ -476,13 +596,15 @@ def add_new_flight() -> None:
         airline_id = pick_id_from_filtered_listing(
             title="Active Airlines",
             build_query=q.build_airlines_for_new_flight,
-            filters={},
+            filters=init_filters(AIRLINE_FILTER_SPECS),
+            format_filters_fn=lambda f: format_filters(f, AIRLINE_FILTER_SPECS),
+            prompt_filters=lambda f: prompt_filter(f, AIRLINE_FILTER_SPECS, choose_from_list, prompt_optional, VALID_STATUSES),
             id_name="AirlineID",
             exists_sql=q.SQL_AIRLINE_BY_ID,
-            prompt_text="Enter AirlineID (or -q): ",
-            invalid_input_text="Enter an AirlineID or -q.",
+            prompt_text="Enter AirlineID, search text (or Command): ",
+            invalid_input_text="Enter f, r, an AirlineID, search text, or -q.",
             not_found_text="Airline not found. Choose from the list above (or -q).",
-            allow_filtering=False,
+            search=search_airlines,
         )
 
         flight_number = prompt_required("FlightNumber (e.g. AA123): ", "FlightNumber").upper()
@@ -500,15 +622,16 @@ def add_new_flight() -> None:
             flight_id = duplicate[0]
         else:
             route_id = pick_id_from_filtered_listing(
-                title="Routes",
+                title=f"Routes (filter by Origin/Destination; unfiltered shows the first {q.ROUTE_LISTING_LIMIT})",
                 build_query=q.build_routes_for_new_flight,
-                filters={},
+                filters=init_filters(ROUTE_FILTER_SPECS),
+                format_filters_fn=lambda f: format_filters(f, ROUTE_FILTER_SPECS),
+                prompt_filters=lambda f: prompt_filter(f, ROUTE_FILTER_SPECS, choose_from_list, prompt_optional, VALID_STATUSES),
                 id_name="RouteID",
                 exists_sql=q.SQL_ROUTE_BY_ID,
-                prompt_text="Enter RouteID (or -q): ",
-                invalid_input_text="Enter a RouteID or -q.",
+                prompt_text="Enter RouteID (or Command): ",
+                invalid_input_text="Enter f, r, a RouteID, or -q.",
                 not_found_text="Route not found. Choose from the list above (or -q).",
-                allow_filtering=False,
             )
 
             with get_conn() as conn:
@@ -532,23 +655,27 @@ def add_new_flight() -> None:
 
     next_step = choose_from_list(
         "Create A Scheduled Flight Instance Now?",
-        ["Yes", "No"],
+        ["Yes", "Recurring Schedule", "No"],
     )
     if next_step == "Yes":
         print("\nAdd a New Flight Instance")
         print("-------------------------")
         print(f"Using FlightID = {flight_id}\n")
         add_flight_instance_for_flight(flight_id)
+    elif next_step == "Recurring Schedule":
+        print("\nGenerate a Recurring Schedule")
+        print("-----------------------------")
+        print(f"Using FlightID = {flight_id}\n")
+        add_schedule_for_flight(flight_id)
 
-# Menu Option 6: Display summary reports (flights per destination, flights per pilot).
+# Menu Option 6: Display summary and analytics reports, run in parallel over read-only connections
+# to the reporting snapshot when there is one.
 
 def summary_reports() -> None:
-    reports = {
-        "Flights Per Destination": q.SQL_REPORT_DESTINATION,
-        "Flights Per Pilot": q.SQL_REPORT_PILOT,
-    }
-    report = choose_from_list("Choose Report:", list(reports))
-    preview_query(reports[report])
+    report = choose_from_list("Choose Report:", list(REPORTS))
+    headers, rows = run_report(report, report_db_path())
+    print(describe_report_source())
+    print_rows(headers, rows)
 
 # Menu Option 7: Browse USER audit log with filtering by operation, instance, field.
 
@@ -562,3 +689,456 @@ def view_audit_log() -> None:
         prompt_filters=lambda f: prompt_filter(f, AUDIT_LOG_FILTER_SPECS, choose_from_list, prompt_optional, VALID_STATUSES),
         format_filters=lambda f: format_filters(f, AUDIT_LOG_FILTER_SPECS),
     )
+
+# Extra Option B: Create a booking for one or more passengers on a flight instance.
+
+def create_booking_for_instance() -> None:
+    print("\nCreate a Booking")
+    print("----------------")
+
+    preview_query(q.SQL_PREVIEW_FLIGHT_INSTANCES)
+    while True:
+        instance_id = prompt_int("Enter InstanceID (or -q): ")
+        with get_conn() as conn:
+            if record_exists(conn, q.SQL_INSTANCE_EXISTS, (instance_id,)):
+                break
+        print("\nInstance not found. Choose one from the list above (or -q).\n")
+
+    cabin = choose_from_list("Cabin Class:", CABIN_CLASSES)
+    passenger_count = prompt_int("Number of Passengers: ")
+    if passenger_count < 1:
+        raise ValueError("At least one passenger is required.")
+
+    passengers: list[PassengerInfo] = []
+    items: list[BookingItemRequest] = []
+    for n in range(1, passenger_count + 1):
+        print(f"\nPassenger {n}")
+        passport_no = prompt_required("PassportNo: ", "PassportNo").upper()
+        nationality = prompt_required("Nationality (e.g. GBR): ", "Nationality").upper()
+        passengers.append(
+            PassengerInfo(
+                passport_no=passport_no,
+                nationality=nationality,
+                first_name=prompt_required("FirstName: ", "FirstName"),
+                last_name=prompt_required("LastName: ", "LastName"),
+                dob=prompt_optional("Dob YYYY-MM-DD (blank allowed): "),
+                email=prompt_optional("Email (blank allowed): "),
+                phone=prompt_optional("Phone (blank allowed): "),
+            )
+        )
+        seat_no = prompt_optional("Seat (blank = next free seat): ")
+        items.append(BookingItemRequest(instance_id, passport_no, nationality, cabin, seat_no))
+
+    with get_conn() as conn:
+        result = create_booking(conn, BookingRequest(passengers, items))
+        headers, rows = fetch_rows_with_headers(conn, q.SQL_BOOKING_ITEMS_BY_PNR, (result.pnr,))
+
+    print(f"\nBooking Created. PNR = {result.pnr}")
+    print_rows(headers, rows)
+
+# Extra Option P: Move a past season of flight instances into a read-only partition file.
+
+def archive_past_season() -> None:
+    if not MemoryMode.writes_to_disk():
+        print("\nArchiving writes the database file, which --no-flush leaves untouched.\n")
+        return
+    print("\nArchived Seasons")
+    print("----------------")
+    preview_query(q.SQL_PARTITIONS)
+
+    print("Seasons in the Main Database")
+    print("----------------------------")
+    headers, rows = query_rows(q.SQL_SEASONS_IN_MAIN)
+    print_rows(headers, rows)
+    if not rows:
+        return
+
+    season = prompt_int("Season to archive (or -q): ")
+    if season not in {row[0] for row in rows}:
+        print("\nNo flight instances for that season in the main database.\n")
+        return
+
+    confirm = read_input(f"Type ARCHIVE to move season {season} (or -q): ").strip()
+    if is_quit(confirm) or confirm.lower() != "archive":
+        print("Archive Cancelled.")
+        return
+
+    with auto_refresh_paused(), MemoryMode.on_disk():
+        moved = archive_year(season)
+    print(f"\nArchived {moved} flight instance(s) from season {season}.\n")
+    preview_query(q.SQL_PARTITIONS)
+
+# Extra Option S: Refresh the reporting snapshot and choose where reports read from.
+
+def manage_reporting_snapshot() -> None:
+    while True:
+        scheduler = auto_refresh()
+        print(f"\n{describe_report_source()}")
+        if scheduler is not None:
+            print(f"Auto-refresh every {scheduler.interval:g}s")
+            if scheduler.last_error:
+                print(f"Last refresh failed: {scheduler.last_error}")
+
+        options = [
+            "Refresh Snapshot Now",
+            "Read Reports From Live Database" if reports_use_snapshot() else "Read Reports From Snapshot",
+            "Stop Auto-Refresh" if scheduler is not None else "Start Auto-Refresh",
+            "Back",
+        ]
+        choice = choose_from_list("Reporting Snapshot:", options)
+        if choice == "Back":
+            return
+        if choice == "Refresh Snapshot Now":
+            info = take_snapshot()
+            print(f"\nSnapshot taken in {info.copy_seconds:.2f}s.")
+        elif choice.startswith("Read Reports"):
+            route_reports_to_snapshot(not reports_use_snapshot())
+        elif choice == "Stop Auto-Refresh":
+            stop_auto_refresh()
+        elif not MemoryMode.writes_to_disk():
+            print("\nAuto-refresh copies the database file, which --no-flush never updates; use Refresh Snapshot Now.")
+        else:
+            raw = prompt_optional(f"Refresh interval in seconds (blank = {DEFAULT_REFRESH_SECONDS}): ")
+            try:
+                interval = float(raw) if raw else DEFAULT_REFRESH_SECONDS
+            except ValueError:
+                print("Interval must be a number.")
+                continue
+            if interval <= 0:
+                print("Interval must be positive.")
+                continue
+            start_auto_refresh(interval)
+
+# Extra Option T: Check aircraft rotations for double-booked tails and broken continuity, and reassign.
+
+def _leg_details(conn, instance_ids: list[int]) -> dict[int, tuple]:
+    return {
+        row[0]: row[1:]
+        for row in conn.execute(q.SQL_ROTATION_LEG_DETAILS, (json.dumps(instance_ids),))
+    }
+
+
+def check_aircraft_rotations() -> None:
+    date_from = prompt_optional("From FlightDate (YYYY-MM-DD, blank = all): ")
+    date_to = prompt_optional("To FlightDate (YYYY-MM-DD, blank = all): ")
+
+    with get_conn() as conn:
+        plan = plan_rotations(conn, date_from, date_to)
+        if not plan.issues:
+            print("\nNo rotation issues found.\n")
+            return
+
+        counts: dict[str, int] = {}
+        for issue in plan.issues:
+            counts[issue.kind] = counts.get(issue.kind, 0) + 1
+        print("\nRotation Issues")
+        print("---------------")
+        print_rows(["Issue", "Legs"], sorted(counts.items()))
+
+        shown = plan.issues[:PREVIEW_ROWS]
+        details = _leg_details(conn, [i.instance_id for i in shown])
+        print_rows(
+            ["InstanceID", "AircraftID", "Issue", "FlightNo", "SchedDepUtc", "Origin", "Dest", "After"],
+            [
+                (i.instance_id, i.aircraft_id, i.kind, *details.get(i.instance_id, (None,) * 4), i.previous_instance_id)
+                for i in shown
+            ],
+        )
+        if len(plan.issues) > len(shown):
+            print(f"... {len(plan.issues) - len(shown)} more")
+
+        resolved = [p for p in plan.proposals if p.to_aircraft_id is not None]
+        if plan.proposals:
+            print("\nProposed Reassignments")
+            print("----------------------")
+            print_rows(
+                ["InstanceID", "Issue", "FromAircraft", "ToAircraft"],
+                [
+                    (p.instance_id, p.reason, p.from_aircraft_id, p.to_aircraft_id if p.to_aircraft_id is not None else "(none free)")
+                    for p in plan.proposals[:PREVIEW_ROWS]
+                ],
+            )
+        if not resolved:
+            return
+
+        if choose_from_list(f"Apply {len(resolved)} Reassignment(s)?", ["Yes", "No"]) == "No":
+            return
+        moved = apply_proposals(conn, resolved)
+    print(f"\nReassigned {moved} flight instance(s).\n")
+
+# Extra Option G: Find gate conflicts at an airport for one day and auto-assign free gates.
+
+def _gate_label(terminal: str | None, gate: str | None) -> str:
+    if not gate:
+        return "-"
+    return f"{terminal} {gate}" if terminal else gate
+
+
+# Whole number of at least `minimum`, or `default` when left blank.
+def _prompt_int(label: str, default: int, minimum: int = 1) -> int:
+    while True:
+        raw = prompt_optional(f"{label} (blank = {default}): ")
+        if not raw:
+            return default
+        if raw.isdigit() and int(raw) >= minimum:
+            return int(raw)
+        print(f"Enter a whole number of at least {minimum} (or -q to cancel).")
+
+
+# Prompt for an airport's IATA code; anything else (a name, a city, a typo)
+# lists autocomplete matches to choose a code from. Returns (AirportID,
+# IataCode, Name).
+
+def prompt_airport_by_iata() -> tuple:
+    while True:
+        text = prompt_required("Airport IATA (or name to search): ", "Airport IATA")
+        with get_conn() as conn:
+            airport = fetch_one(conn, q.SQL_AIRPORT_BY_IATA, (text,))
+        if airport is not None:
+            return airport
+        print(f"\nNo airport with IATA code {text.upper()}.")
+        print_search_matches(text, search_airports)
+        print()
+
+
+def allocate_gates_for_day() -> None:
+    airport = prompt_airport_by_iata()
+    with get_conn() as conn:
+        day = prompt_required("Day (YYYY-MM-DD, UTC): ", "Day")
+        defaults = GateBuffers()
+        buffers = GateBuffers(
+            _prompt_int("Minutes at gate before departure", defaults.before_minutes, minimum=0),
+            _prompt_int("Minutes at gate after pushback", defaults.after_minutes, minimum=0),
+            _prompt_int("Minimum minutes between flights", defaults.gap_minutes, minimum=0),
+        )
+        try:
+            plan = plan_gate_day(conn, airport[0], day, buffers)
+        except ValueError:
+            print("\nDay must be YYYY-MM-DD.\n")
+            return
+
+        departures = sum(use.in_day for use in plan.uses)
+        print(f"\n{airport[1]} {airport[2]}: {departures} departure(s) on {day}, {len(plan.conflicts)} gate conflict(s).")
+        if plan.conflicts:
+            flights = {use.instance_id: use.flight_no for use in plan.uses}
+            print_rows(
+                ["Gate", "InstanceID", "FlightNo", "ClashesWith", "OverlapMin"],
+                [
+                    (_gate_label(c.terminal, c.gate), c.instance_id, flights[c.instance_id], c.other_instance_id, c.overlap_minutes)
+                    for c in plan.conflicts[:PREVIEW_ROWS]
+                ],
+            )
+            if len(plan.conflicts) > PREVIEW_ROWS:
+                print(f"... {len(plan.conflicts) - PREVIEW_ROWS} more")
+
+        if not plan.assignments:
+            print("\nEvery departure has a free gate.\n")
+            return
+        print("\nProposed Gates")
+        print("--------------")
+        print_rows(
+            ["InstanceID", "FlightNo", "Reason", "From", "To"],
+            [
+                (a.instance_id, a.flight_no, a.reason, _gate_label(a.from_terminal, a.from_gate),
+                 _gate_label(a.to_terminal, a.to_gate) if a.to_gate else "(none free)")
+                for a in plan.assignments[:PREVIEW_ROWS]
+            ],
+        )
+        if len(plan.assignments) > PREVIEW_ROWS:
+            print(f"... {len(plan.assignments) - PREVIEW_ROWS} more")
+        resolved = len(plan.assignments) - len(plan.unresolved)
+        if not resolved:
+            return
+
+        if choose_from_list(f"Apply {resolved} Gate Assignment(s)?", ["Yes", "No"]) == "No":
+            return
+        updated = apply_gate_assignments(conn, plan)
+    print(f"\nAssigned gates to {updated} flight instance(s).\n")
+
+# Extra Option D: Show which later legs a delay would hold up through aircraft and crew rotations.
+
+def print_delay_impact(affected) -> None:
+    shown = affected[:PREVIEW_ROWS]
+    with get_conn() as conn:
+        details = _leg_details(conn, [leg.instance_id for leg in shown])
+    print_rows(
+        ["InstanceID", "FlightNo", "SchedDepUtc", "Origin", "Dest", "ProjectedDepUtc", "ProjectedArrUtc", "DelayMin", "Via", "After"],
+        [
+            (leg.instance_id, *details.get(leg.instance_id, (None,) * 4), leg.projected_dep, leg.projected_arr,
+             leg.delay_minutes, leg.cause or "-", leg.cause_instance_id or "-")
+            for leg in shown
+        ],
+    )
+    if len(affected) > len(shown):
+        print(f"... {len(affected) - len(shown)} more")
+
+
+def delay_what_if() -> None:
+    instance_id = prompt_int("Enter InstanceID (or -q): ")
+    minutes = prompt_int("Departure delay in minutes (or -q): ")
+    if minutes <= 0:
+        print("\nDelay must be a positive number of minutes.\n")
+        return
+    with get_conn() as conn:
+        network, _ = current_network(conn)
+    if instance_id not in network.legs:
+        print("\nNo such instance in the current schedule (cancelled, archived or missing).\n")
+        return
+
+    affected = network.what_if(instance_id, minutes)
+    knock_on = [leg for leg in affected if leg.instance_id != instance_id]
+    print(f"\nA {minutes} minute delay to instance {instance_id} moves {len(knock_on)} later leg(s).")
+    if knock_on:
+        print_delay_impact(knock_on)
+
+# Extra Option M: Monte Carlo robustness of a date range of the schedule.
+def simulate_schedule_robustness() -> None:
+    try:
+        from Simulation import DEFAULT_SCENARIOS, print_robustness, run_robustness
+    except ImportError:
+        print("\nThe simulator needs NumPy: pip install -r requirements.txt\n")
+        return
+
+    date_from = prompt_required("From FlightDate (YYYY-MM-DD): ", "From FlightDate")
+    date_to = prompt_required("To FlightDate (YYYY-MM-DD): ", "To FlightDate")
+    raw = prompt_optional(f"Scenarios (blank = {DEFAULT_SCENARIOS}): ")
+    if raw and not raw.isdigit():
+        print("\nScenarios must be a whole number.\n")
+        return
+    scenarios = int(raw) if raw else DEFAULT_SCENARIOS
+
+    history_db = report_db_path()
+    with get_conn() as conn:
+        try:
+            report = run_robustness(conn, date_from, date_to, scenarios, history_db=history_db)
+        except ValueError:
+            print("\nDates must be YYYY-MM-DD.\n")
+            return
+    if not len(report.model):
+        print("\nNo scheduled flight instances in that range.\n")
+        return
+    print(f"\n{describe_report_source()}")
+    print_robustness(report)
+
+# Extra Option C: Build pilot pairings for a date range and fill Captain / First Officer seats in bulk.
+
+def _utc_text(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+
+def build_pilot_pairings() -> None:
+    date_from = prompt_required("From FlightDate (YYYY-MM-DD): ", "From FlightDate")
+    date_to = prompt_required("To FlightDate (YYYY-MM-DD): ", "To FlightDate")
+
+    with get_conn() as conn:
+        try:
+            plan = plan_crew_for_dates(conn, date_from, date_to)
+        except ValueError:
+            print("\nDates must be YYYY-MM-DD.\n")
+            return
+        if not plan.assignments and not any(plan.uncovered.values()):
+            print("\nEvery instance in that range already has a Captain and a First Officer.\n")
+            return
+
+        staffed = plan.staffed
+        print(f"\n{len(plan.assignments)} pairing(s), {len(staffed)} with a free pilot.")
+        if plan.assignments:
+            bases = {a.pairing.base_airport_id for a in plan.assignments}
+            iata = {airport_id: fetch_one(conn, q.SQL_AIRPORT_BY_ID, (airport_id,))[1] for airport_id in bases}
+            print("\nPilot Pairings")
+            print("--------------")
+            print_rows(
+                ["Role", "StaffID", "Base", "FirstDepUtc", "LastArrUtc", "Duties", "Legs"],
+                [
+                    (a.role, a.staff_id if a.staff_id is not None else "(none free)", iata[a.pairing.base_airport_id],
+                     _utc_text(a.pairing.start), _utc_text(a.pairing.end), len(a.pairing.duties), len(a.pairing.legs))
+                    for a in plan.assignments[:PREVIEW_ROWS]
+                ],
+            )
+            if len(plan.assignments) > PREVIEW_ROWS:
+                print(f"... {len(plan.assignments) - PREVIEW_ROWS} more")
+        for role in PILOT_ROLES:
+            if plan.uncovered[role]:
+                shown = ", ".join(str(i) for i in plan.uncovered[role][:20])
+                more = "..." if len(plan.uncovered[role]) > 20 else ""
+                print(f"{role} still missing on {len(plan.uncovered[role])} instance(s): {shown}{more}")
+
+        rows = plan.rows()
+        if not rows:
+            return
+        if choose_from_list(f"Write {len(rows)} Crew Assignment(s)?", ["Yes", "No"]) == "No":
+            return
+        written = apply_crew_plan(conn, plan)
+    print(f"\nAssigned {written} pilot seat(s).\n")
+
+# Extra Option A: Station board, an airport's departures and arrivals over the next few hours.
+STATION_BOARD_HOURS = 6
+
+
+def _prompt_board_start() -> datetime | None:
+    while True:
+        raw = prompt_optional("From (YYYY-MM-DD HH:MM, UTC, blank = now): ")
+        if not raw:
+            return datetime.now(timezone.utc).replace(tzinfo=None, second=0, microsecond=0)
+        try:
+            return datetime.fromisoformat(raw)
+        except ValueError:
+            print("Enter a date and time as YYYY-MM-DD HH:MM (or -q to cancel).")
+
+
+def station_board() -> None:
+    airport = prompt_airport_by_iata()
+    with get_conn() as conn:
+        start = _prompt_board_start()
+        hours = _prompt_int("Hours to show", STATION_BOARD_HOURS)
+        window = (start.strftime(UTC_FORMAT), (start + timedelta(hours=hours)).strftime(UTC_FORMAT))
+        departures = conn.execute(q.SQL_STATION_DEPARTURES, (airport[0],) + window).fetchall()
+        arrivals = conn.execute(q.SQL_STATION_ARRIVALS, (airport[0],) + window).fetchall()
+
+    print(f"\n{airport[1]} {airport[2]}: {window[0]} to {window[1]} UTC")
+    print("\nDepartures")
+    print("----------")
+    print_rows(
+        ["InstanceID", "FlightNo", "To", "SchedDepUtc", "ActualDepUtc", "Status", "Gate"],
+        [row[:6] + (_gate_label(row[6], row[7]),) for row in departures],
+    )
+    print("\nArrivals")
+    print("--------")
+    print_rows(
+        ["InstanceID", "FlightNo", "From", "SchedArrUtc", "ActualArrUtc", "Status"],
+        arrivals,
+    )
+
+# Extra Option O: Pull new and changed OpenFlights airlines, airports and routes without a reset.
+
+def sync_openflights() -> None:
+    if choose_from_list("Sync Reference Data From Data/OpenFlights?", ["Yes", "No"]) == "No":
+        return
+    with get_conn() as conn:
+        try:
+            result = sync_reference_data(conn)
+        except (OSError, sqlite3.IntegrityError) as e:
+            print(f"\nSync failed, nothing was changed: {e}\n")
+            return
+    if result.changed:
+        drop_zones()
+    print()
+    print_sync_result(result)
+
+
+# Extra Option I: Apply an ops status feed (CSV or NDJSON of status, actual time and gate events).
+
+def ingest_status_feed() -> None:
+    path = Path(prompt_required("Feed file (.csv, .jsonl or .ndjson): ", "Feed file")).expanduser()
+    if not path.is_file():
+        print(f"\nNo such file: {path}\n")
+        return
+    batch_size = _prompt_int("Instances per transaction", DEFAULT_FEED_BATCH_SIZE)
+    with get_conn() as conn:
+        try:
+            result = ingest_feed(conn, path, batch_size=batch_size, progress=print_feed_progress)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            print(f"\nIngestion stopped: {e}\n")
+            return
+    print()
+    print_feed_result(result)
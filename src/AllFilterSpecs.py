@@ -1,8 +1,8 @@
 from dataclasses import dataclass
 from typing import Literal
 
-FilterUI = Literal["text", "status", "yes_no", "int"]
-FilterSqL = Literal["like", "equal", "equal_ci", "presence"]
+FilterUI = Literal["text", "status", "yes_no", "int", "list", "int_list"]
+FilterSqL = Literal["like", "equal", "equal_ci", "presence", "fts", "airport_code", "in", "in_ci"]
 
 
 @dataclass(frozen=True)
@@ -13,6 +13,8 @@ class FilterSpec:
     prompt: str | None
     sql_kind: FilterSqL
     col: str | None = None
+    # sql_kind "fts": the listing's column matched against the search table's key.
+    fts_key: str | None = None
 
 
 FLIGHT_FILTER_SPECS: list[FilterSpec] = [
@@ -21,7 +23,16 @@ FLIGHT_FILTER_SPECS: list[FilterSpec] = [
         label="FlightNo",
         ui_kind="text",
         prompt="FlightNo Contains: ",
-        sql_kind="like",
+        sql_kind="fts",
+        col="FlightSearch.FlightNumber",
+        fts_key="v.FlightID",
+    ),
+    FilterSpec(
+        key="flight_no_list",
+        label="FlightNo List",
+        ui_kind="list",
+        prompt="FlightNos (comma/space separated, or @file): ",
+        sql_kind="in_ci",
         col="v.FlightNumber",
     ),
     FilterSpec(
@@ -48,6 +59,22 @@ FLIGHT_FILTER_SPECS: list[FilterSpec] = [
         sql_kind="equal_ci",
         col="v.DestIata",
     ),
+    FilterSpec(
+        key="departure_iata_list",
+        label="Departure Airport List",
+        ui_kind="list",
+        prompt="Departure IATA codes (comma/space separated, or @file): ",
+        sql_kind="in_ci",
+        col="v.OriginIata",
+    ),
+    FilterSpec(
+        key="arrival_iata_list",
+        label="Arrival Airport List",
+        ui_kind="list",
+        prompt="Arrival IATA codes (comma/space separated, or @file): ",
+        sql_kind="in_ci",
+        col="v.DestIata",
+    ),
     FilterSpec(
         key="departure_date",
         label="Departure Date",
@@ -100,13 +127,22 @@ PILOT_SCHEDULE_FILTER_SPECS: list[FilterSpec] = [
         sql_kind="equal",
         col="StaffID",
     ),
+    FilterSpec(
+        key="staff_id_list",
+        label="Pilot StaffID List",
+        ui_kind="int_list",
+        prompt="Pilot StaffIDs (comma/space separated, or @file): ",
+        sql_kind="in",
+        col="StaffID",
+    ),
     FilterSpec(
         key="flight_no_like",
         label="FlightNo",
         ui_kind="text",
         prompt="FlightNo Contains: ",
-        sql_kind="like",
-        col="FlightNumber",
+        sql_kind="fts",
+        col="FlightSearch.FlightNumber",
+        fts_key="FlightID",
     ),
     FilterSpec(
         key="duty_role",
@@ -152,6 +188,14 @@ AUDIT_LOG_FILTER_SPECS: list[FilterSpec] = [
         sql_kind="equal",
         col="InstanceID",
     ),
+    FilterSpec(
+        key="instance_id_list",
+        label="InstanceID List",
+        ui_kind="int_list",
+        prompt="InstanceIDs (comma/space separated, or @file): ",
+        sql_kind="in",
+        col="InstanceID",
+    ),
     FilterSpec(
         key="field",
         label="Field Changed",
@@ -160,6 +204,15 @@ AUDIT_LOG_FILTER_SPECS: list[FilterSpec] = [
         sql_kind="equal",
         col="FieldChanged",
     ),
+    FilterSpec(
+        key="value_like",
+        label="Value Contains",
+        ui_kind="text",
+        prompt="Old or New Value Contains: ",
+        sql_kind="fts",
+        col="AuditSearch.Changes",
+        fts_key="LogID",
+    ),
 ]
 
 
@@ -172,6 +225,14 @@ AIRPORT_FILTER_SPECS: list[FilterSpec] = [
         sql_kind="equal_ci",
         col="IataCode",
     ),
+    FilterSpec(
+        key="iata_list",
+        label="Airport IATA List",
+        ui_kind="list",
+        prompt="IATA codes (comma/space separated, or @file): ",
+        sql_kind="in_ci",
+        col="IataCode",
+    ),
     FilterSpec(
         key="country",
         label="Country",
@@ -180,4 +241,70 @@ AIRPORT_FILTER_SPECS: list[FilterSpec] = [
         sql_kind="like",
         col="Country",
     ),
+    FilterSpec(
+        key="city",
+        label="City",
+        ui_kind="text",
+        prompt="City Contains: ",
+        sql_kind="like",
+        col="City",
+    ),
+    FilterSpec(
+        key="name",
+        label="Name",
+        ui_kind="text",
+        prompt="Name Contains: ",
+        sql_kind="like",
+        col="Name",
+    ),
+]
+
+
+AIRLINE_FILTER_SPECS: list[FilterSpec] = [
+    FilterSpec(
+        key="code",
+        label="Airline Code",
+        ui_kind="text",
+        prompt="Airline Code (ICAO or IATA): ",
+        sql_kind="equal_ci",
+        col="COALESCE(IcaoCode, IataCode, '')",
+    ),
+    FilterSpec(
+        key="name",
+        label="Name",
+        ui_kind="text",
+        prompt="Name Contains: ",
+        sql_kind="fts",
+        col="AirlineSearch.Name",
+        fts_key="AirlineID",
+    ),
+]
+
+
+# Origin/destination take an IATA or ICAO code. "Both Directions" has no
+# column of its own: build_routes_for_new_flight adds the reverse routes.
+ROUTE_FILTER_SPECS: list[FilterSpec] = [
+    FilterSpec(
+        key="origin",
+        label="Origin",
+        ui_kind="text",
+        prompt="Origin Airport (IATA or ICAO): ",
+        sql_kind="airport_code",
+        col="r.OriginAirportID",
+    ),
+    FilterSpec(
+        key="dest",
+        label="Destination",
+        ui_kind="text",
+        prompt="Destination Airport (IATA or ICAO): ",
+        sql_kind="airport_code",
+        col="r.DestinationAirportID",
+    ),
+    FilterSpec(
+        key="reverse",
+        label="Both Directions",
+        ui_kind="yes_no",
+        prompt="Include Reverse Direction (Y/N): ",
+        sql_kind="equal",
+    ),
 ]
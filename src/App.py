@@ -1,12 +1,30 @@
+import argparse
 import sqlite3
-from pathlib import Path
-from SeedDB import ensure_db, ensure_runtime_objects, is_db_initialised
-
-DB_PATH = Path(__file__).resolve().parent.parent / "DB" / "FlightManagement.db"
-
+from contextlib import closing
+from SeedDB import DB_PATH, drop_template_marker, ensure_db, ensure_runtime_objects, ensure_template, is_db_initialised
+import MemoryMode
+from Partitions import attach_partitions, drop_partitions
+from Snapshot import auto_refresh_paused, drop_snapshot
+from Delays import drop_network
+from LocalTime import drop_zones
+from Autocomplete import drop_indexes
+
+# Each is called with every new app connection and returns the connection
+# to hand out (Replay.py wraps it to time queries).
+connection_hooks: list = []
+
+# URI mode so archived partitions can be attached with ?mode=ro. In memory
+# mode every caller gets a connection to the shared in-memory copy instead.
 def get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    memory = MemoryMode.active()
+    if memory is not None:
+        conn = memory.connect()
+    else:
+        conn = sqlite3.connect(DB_PATH.as_uri(), uri=True)
+        conn.execute("PRAGMA foreign_keys = ON;")
+    attach_partitions(conn)
+    for hook in connection_hooks:
+        conn = hook(conn)
     return conn
 
 def fetch_one(conn: sqlite3.Connection, sql: str, params: tuple = ()) -> tuple | None:
@@ -17,7 +35,12 @@ def fetch_one(conn: sqlite3.Connection, sql: str, params: tuple = ()) -> tuple |
 
 def initialise_db() -> None:
     if is_db_initialised():
-        ensure_runtime_objects()
+        duplicates = ensure_runtime_objects()
+        if duplicates:
+            print("\nWarning: these flights are scheduled more than once on the same day:")
+            for flight_id, flight_date, count in duplicates:
+                print(f"  Flight {flight_id} on {flight_date}: {count} instances")
+            print("Remove the extra instances to enable the one-instance-per-day check.")
         print("\nUsing Existing database!")
         return
     ensure_db()
@@ -29,7 +52,17 @@ def main_menu() -> None:
     import ActionsWorkflows as actions
 
     def reset_database() -> None:
-        ensure_db()
+        if not MemoryMode.writes_to_disk():
+            print("\nReset replaces the database file, which --no-flush leaves untouched.")
+            return
+        with auto_refresh_paused():
+            with MemoryMode.on_disk(flush_first=False):
+                ensure_db()
+            drop_partitions()
+            drop_snapshot()
+        drop_network()
+        drop_zones()
+        drop_indexes()
         print("\nDatabase Reset.")
 
     menu_actions = [
@@ -42,6 +75,17 @@ def main_menu() -> None:
         ("7", "View Audit Log", actions.view_audit_log),
     ]
     extra_actions = [
+        ("B", "Create a Booking", actions.create_booking_for_instance),
+        ("A", "Station Board (Departures/Arrivals)", actions.station_board),
+        ("P", "Archive a Past Season", actions.archive_past_season),
+        ("T", "Check Aircraft Rotations", actions.check_aircraft_rotations),
+        ("D", "Delay Impact (What-If)", actions.delay_what_if),
+        ("M", "Schedule Robustness (Monte Carlo)", actions.simulate_schedule_robustness),
+        ("G", "Allocate Departure Gates", actions.allocate_gates_for_day),
+        ("C", "Build Pilot Pairings", actions.build_pilot_pairings),
+        ("S", "Reporting Snapshot", actions.manage_reporting_snapshot),
+        ("O", "Sync OpenFlights Reference Data", actions.sync_openflights),
+        ("I", "Ingest Status Feed (CSV/NDJSON)", actions.ingest_status_feed),
         ("R", "Reset Database and Reseed", reset_database),
     ]
     action_map = {key: handler for key, _, handler in menu_actions + extra_actions}
@@ -70,13 +114,39 @@ def main_menu() -> None:
             action = action_map.get(choice)
             if action:
                 safe_run(action)
+                MemoryMode.flush_if_due()
                 break
 
             print("Invalid Choice.")
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Flight Management")
+    parser.add_argument("--memory", action="store_true", help="Run on an in-memory copy of the database")
+    parser.add_argument(
+        "--from-template", action="store_true",
+        help="With --memory, start from the seed template instead of the database file",
+    )
+    parser.add_argument(
+        "--flush-every", type=float, default=MemoryMode.DEFAULT_FLUSH_SECONDS,
+        help="With --memory, seconds between flushes to the file (0 = only at exit)",
+    )
+    parser.add_argument("--no-flush", action="store_true", help="With --memory, never write back to the file")
+    args = parser.parse_args()
+
     initialise_db()
+    if args.memory:
+        source = ensure_template() if args.from_template else DB_PATH
+        if args.from_template and not args.no_flush:
+            # The first flush replaces the file, the same as a reset.
+            drop_partitions()
+            drop_snapshot()
+        memory = MemoryMode.start(DB_PATH, source, args.flush_every or None, persist=not args.no_flush)
+        if args.from_template:
+            with closing(memory.connect()) as conn:
+                drop_template_marker(conn)
+            MemoryMode.flush()
+        print(f"Running in memory from {source.name}" + ("" if args.no_flush else f", flushing to {DB_PATH.name}"))
     main_menu()
 
 
@@ -0,0 +1,253 @@
+import heapq
+import math
+import sqlite3
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from itertools import chain
+
+import Queries as q
+
+# Typo-tolerant autocomplete for the airport and airline pickers, held in
+# memory. Every record's codes (IATA, ICAO), name and city are split into
+# words; the index keeps the distinct words sorted (prefix lookups by
+# bisection), a trigram -> words table (fuzzy lookups) and word -> records
+# postings. Matching works on the vocabulary rather than on records, so a
+# word shared by thousands of airports ("international") costs one entry.
+#
+# Each query word must match a word of the record: exactly, as a fuzzy
+# trigram match (Jaccard similarity of at least FUZZY_THRESHOLD, so "londn"
+# finds "london"), or, for the last word only, as a prefix of it, since the
+# user may still be typing. A query that is exactly a record's code ranks
+# that record first. Completions of a name or city word rank above
+# completions of a code (otherwise "par" offers Arctic Village, ICAO PARC),
+# and among them shorter words only score slightly higher, so "park" is
+# barely ahead of "paris". Busier airports and airlines (routes served,
+# flights flown) get a lift, three times larger unless every query word
+# matched exactly: enough to put Paris-Orly first for "par", small next to
+# the gap between an exact match and anything else.
+#
+# An index is built on first use and rebuilt when the table's row in
+# ReferenceVersion (bumped by triggers on every Airport or Airline change)
+# no longer matches the version it was built from.
+
+FUZZY_THRESHOLD = 0.3
+# Longest run of completions tried for one prefix ("s" alone has thousands).
+PREFIX_LIMIT = 200
+DEFAULT_LIMIT = 10
+
+EXACT_SCORE = 1.0
+CODE_BONUS = 2.0
+# A completion scores PREFIX_SCORE plus up to PREFIX_LENGTH_BONUS for being
+# short, less CODE_PREFIX_PENALTY if the word is only ever a code.
+PREFIX_SCORE = 0.7
+PREFIX_LENGTH_BONUS = 0.1
+CODE_PREFIX_PENALTY = 0.3
+# Per e-fold of weight; 500 routes is worth about 0.12.
+POPULARITY = 0.02
+# Lift multiplier for records with a prefix or fuzzy match.
+INEXACT_POPULARITY = 3.0
+
+
+@dataclass(frozen=True)
+class Match:
+    record_id: int
+    row: tuple
+    score: float
+
+
+# Lower case, accents dropped, anything but letters and digits a space.
+def normalize(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(
+        c if c.isalnum() else " "
+        for c in decomposed.lower()
+        if not unicodedata.combining(c)
+    )
+
+
+# Trigrams of one word padded as "  word ", so short words and word starts
+# still produce a few.
+def trigrams(word: str) -> set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AutocompleteIndex:
+    # records: (record_id, codes, text fields, shown row, weight).
+    def __init__(self, headers: list[str], records: list[tuple[int, tuple, tuple, tuple, int]]) -> None:
+        self.headers = headers
+        self._ids = [record[0] for record in records]
+        self._rows = [record[3] for record in records]
+        self._lift = [POPULARITY * math.log1p(record[4] or 0) for record in records]
+
+        self._codes: dict[str, list[int]] = {}
+        postings: dict[str, set[int]] = {}
+        text_words: set[str] = set()
+        for entry, (_, codes, fields, _, _) in enumerate(records):
+            for code in codes:
+                if code:
+                    code = normalize(code).strip()
+                    self._codes.setdefault(code, []).append(entry)
+                    postings.setdefault(code, set()).add(entry)
+            for text in fields:
+                for word in normalize(text or "").split():
+                    postings.setdefault(word, set()).add(entry)
+                    text_words.add(word)
+
+        self._words = sorted(postings)
+        self._word_ids = {word: wid for wid, word in enumerate(self._words)}
+        self._code_only = {self._word_ids[word] for word in postings.keys() - text_words}
+        self._postings = [sorted(postings[word]) for word in self._words]
+        self._entry_words: list[set[int]] = [set() for _ in records]
+        self._trigrams: dict[str, list[int]] = {}
+        self._trigram_counts = []
+        for wid, word in enumerate(self._words):
+            for entry in self._postings[wid]:
+                self._entry_words[entry].add(wid)
+            grams = trigrams(word)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._trigrams.setdefault(gram, []).append(wid)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # Score of vocabulary word `wid` as a completion of `word`.
+    def _prefix_score(self, wid: int, word: str) -> float:
+        score = PREFIX_SCORE + PREFIX_LENGTH_BONUS * len(word) / len(self._words[wid])
+        if wid in self._code_only:
+            score -= CODE_PREFIX_PENALTY
+        return score
+
+    # Word id -> score for every vocabulary word one query word matches.
+    def _match_word(self, word: str, prefix: bool) -> dict[int, float]:
+        scores: dict[int, float] = {}
+
+        if prefix:
+            words = self._words
+            start = bisect_left(words, word)
+            for wid in range(start, min(start + PREFIX_LIMIT, len(words))):
+                if not words[wid].startswith(word):
+                    break
+                scores[wid] = self._prefix_score(wid, word)
+
+        wid = self._word_ids.get(word)
+        if wid is not None:
+            scores[wid] = EXACT_SCORE
+
+        if len(word) >= 3:
+            grams = trigrams(word)
+            shared = Counter(chain.from_iterable(self._trigrams.get(gram, ()) for gram in grams))
+            for wid, count in shared.items():
+                similarity = count / (len(grams) + self._trigram_counts[wid] - count)
+                if similarity >= FUZZY_THRESHOLD:
+                    score = 0.8 * similarity
+                    if score > scores.get(wid, 0.0):
+                        scores[wid] = score
+        return scores
+
+    def _prefix_scorer(self, word: str, scores: dict[int, float]):
+        words = self._words
+
+        def score_of(wid: int, default: float) -> float:
+            score = scores.get(wid)
+            if score is not None:
+                return score
+            if words[wid].startswith(word):
+                return self._prefix_score(wid, word)
+            return default
+
+        return score_of
+
+    def search(self, text: str, limit: int = DEFAULT_LIMIT) -> list[Match]:
+        words = normalize(text).split()
+        if not words:
+            return []
+
+        matched = [self._match_word(word, i == len(words) - 1) for i, word in enumerate(words)]
+        if not all(matched):
+            return []
+
+        # Start from the query word with the fewest records behind it and
+        # check the others against each candidate's own words.
+        order = sorted(range(len(words)), key=lambda i: sum(len(self._postings[wid]) for wid in matched[i]))
+        first = matched[order[0]]
+        scores: dict[int, float] = {}
+        for wid, score in first.items():
+            for entry in self._postings[wid]:
+                if score > scores.get(entry, 0.0):
+                    scores[entry] = score
+        for i in order[1:]:
+            score_of = matched[i].get
+            if i == len(words) - 1:
+                # Completions past PREFIX_LIMIT still count for candidates.
+                score_of = self._prefix_scorer(words[i], matched[i])
+            narrowed = {}
+            for entry, total in scores.items():
+                best = max((score_of(wid, 0.0) for wid in self._entry_words[entry]), default=0.0)
+                if best:
+                    narrowed[entry] = total + best
+            scores = narrowed
+
+        if len(words) == 1:
+            for entry in self._codes.get(words[0], ()):
+                scores[entry] = scores.get(entry, 0.0) + CODE_BONUS
+
+        lift = self._lift
+        exact = EXACT_SCORE * len(words)
+
+        def rank(item: tuple[int, float]) -> float:
+            entry, score = item
+            return score + lift[entry] * (INEXACT_POPULARITY if score < exact else 1.0)
+
+        best = heapq.nlargest(limit, scores.items(), key=rank)
+        return [Match(self._ids[entry], self._rows[entry], round(score / len(words), 3)) for entry, score in best]
+
+
+def load_airport_index(conn: sqlite3.Connection) -> AutocompleteIndex:
+    records = [
+        (airport_id, (iata, icao), (name, city), (airport_id, iata, icao, name, city, country), weight)
+        for airport_id, iata, icao, name, city, country, weight in conn.execute(q.SQL_AUTOCOMPLETE_AIRPORTS)
+    ]
+    return AutocompleteIndex(["AirportID", "IATA", "ICAO", "Name", "City", "Country"], records)
+
+
+def load_airline_index(conn: sqlite3.Connection) -> AutocompleteIndex:
+    records = [
+        (airline_id, (iata, icao), (name,), (airline_id, iata, icao, name), weight)
+        for airline_id, iata, icao, name, weight in conn.execute(q.SQL_AUTOCOMPLETE_AIRLINES)
+    ]
+    return AutocompleteIndex(["AirlineID", "IATA", "ICAO", "Name"], records)
+
+
+LOADERS = {"Airport": load_airport_index, "Airline": load_airline_index}
+
+# Table -> (ReferenceVersion it was built from, index).
+_indexes: dict[str, tuple[int, AutocompleteIndex]] = {}
+
+
+# The current index for "Airport" or "Airline": built on first use, rebuilt
+# after the table changes.
+def current_index(conn: sqlite3.Connection, table: str) -> AutocompleteIndex:
+    row = conn.execute(q.SQL_REFERENCE_VERSION, (table,)).fetchone()
+    version = row[0] if row else -1
+    cached = _indexes.get(table)
+    if cached is None or cached[0] != version:
+        cached = _indexes[table] = (version, LOADERS[table](conn))
+    return cached[1]
+
+
+def drop_indexes() -> None:
+    _indexes.clear()
+
+
+def search_airports(conn: sqlite3.Connection, text: str, limit: int = DEFAULT_LIMIT) -> tuple[list[str], list[Match]]:
+    index = current_index(conn, "Airport")
+    return index.headers, index.search(text, limit)
+
+
+def search_airlines(conn: sqlite3.Connection, text: str, limit: int = DEFAULT_LIMIT) -> tuple[list[str], list[Match]]:
+    index = current_index(conn, "Airline")
+    return index.headers, index.search(text, limit)
@@ -0,0 +1,1159 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from SeedDB import ensure_db
+
+# Benchmarks run against a scratch copy of the seeded database, never
+# DB/FlightManagement.db. Usage: python3 src/Bench.py <benchmark> [options]
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=60)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    return conn
+
+
+def scratch_db(tmp_dir: str) -> Path:
+    db_path = Path(tmp_dir) / "Bench.db"
+    ensure_db(db_path)
+    return db_path
+
+
+# Add `count` FlightInstances cycling through existing flights and in-service
+# aircraft, one day per round of flights, starting at start_date. Days a
+# flight already operates are skipped (FlightID, FlightDate is unique).
+def add_synthetic_instances(conn: sqlite3.Connection, count: int, start_date: str = "2027-01-01") -> None:
+    flights = [row[0] for row in conn.execute("SELECT FlightID FROM Flight ORDER BY FlightID;")]
+    aircraft = [row[0] for row in conn.execute("SELECT AircraftID FROM Aircraft WHERE InService = 1 ORDER BY AircraftID;")]
+    taken = set(conn.execute("SELECT FlightID, FlightDate FROM FlightInstance;"))
+    first_day = date.fromisoformat(start_date)
+    rows = []
+    for i in range(count):
+        day = (first_day + timedelta(days=i // len(flights))).isoformat()
+        if (flights[i % len(flights)], day) in taken:
+            continue
+        hour = 6 + (i % len(flights)) % 14
+        rows.append((
+            flights[i % len(flights)],
+            day,
+            f"{day} {hour:02d}:00:00",
+            f"{day} {hour + 2:02d}:30:00",
+            aircraft[i % len(aircraft)],
+        ))
+    conn.executemany(
+        """
+        INSERT INTO FlightInstance (FlightID, FlightDate, SchedDepUtc, SchedArrUtc, Status, AircraftID)
+        VALUES (?, ?, ?, ?, 'Scheduled', ?);
+        """,
+        rows,
+    )
+    conn.commit()
+
+
+def report(name: str, count: int, seconds: float, unit: str = "rows") -> None:
+    rate = count / seconds if seconds > 0 else float("inf")
+    print(f"{name:<40} {count:>10,} {unit} in {seconds:8.3f}s  ({rate:,.0f} {unit}/s)")
+
+
+# Bookings
+# --------
+
+def _booking_worker(db_path: str, worker: int, batches: int, batch_size: int, instance_ids: list[int]) -> tuple[int, int]:
+    from Bookings import BookingItemRequest, BookingRequest, PassengerInfo, create_bookings
+
+    rng = random.Random(worker)
+    created = rejected = 0
+    conn = connect(Path(db_path))
+    try:
+        for b in range(batches):
+            requests = []
+            for n in range(batch_size):
+                passenger = PassengerInfo(f"W{worker:02d}{b:05d}{n:04d}", "GBR", "Bench", f"Passenger{n}")
+                items = [BookingItemRequest(rng.choice(instance_ids), passenger.passport_no, "GBR")]
+                requests.append(BookingRequest([passenger], items))
+            for result in create_bookings(conn, requests):
+                if result.error:
+                    rejected += 1
+                else:
+                    created += 1
+    finally:
+        conn.close()
+    return created, rejected
+
+
+def bench_bookings(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            add_synthetic_instances(conn, args.instances)
+            instance_ids = [row[0] for row in conn.execute("SELECT InstanceID FROM FlightInstance;")]
+
+        batches = max(1, args.bookings // (args.batch_size * args.workers))
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [
+                pool.submit(_booking_worker, str(db_path), w, batches, args.batch_size, instance_ids)
+                for w in range(args.workers)
+            ]
+            outcomes = [f.result() for f in futures]
+        elapsed = time.perf_counter() - started
+
+        created = sum(c for c, _ in outcomes)
+        rejected = sum(r for _, r in outcomes)
+        report(f"create_bookings x{args.workers} processes", created, elapsed, "bookings")
+        if rejected:
+            print(f"Rejected (no seat left): {rejected:,}")
+
+        with connect(db_path) as conn:
+            doubles = conn.execute(
+                """
+                SELECT COUNT(*) FROM (
+                    SELECT InstanceID, SeatNo FROM BookingItem
+                    WHERE SeatNo IS NOT NULL AND ItemStatus IS NOT 'Cancelled'
+                    GROUP BY InstanceID, SeatNo HAVING COUNT(*) > 1
+                );
+                """
+            ).fetchone()[0]
+            drift = conn.execute(
+                """
+                SELECT COUNT(*)
+                FROM InstanceSeatCount sc
+                WHERE sc.SeatsTaken <> (
+                    SELECT COUNT(*) FROM BookingItem bi
+                    WHERE bi.InstanceID = sc.InstanceID
+                      AND bi.SeatNo IS NOT NULL AND bi.ItemStatus IS NOT 'Cancelled'
+                );
+                """
+            ).fetchone()[0]
+        print(f"Double-allocated seats: {doubles}   Seat counters out of sync: {drift}")
+
+
+# Reports
+# -------
+
+# Captain and First Officer on every instance that has no pilots yet.
+def add_synthetic_crew(conn: sqlite3.Connection) -> None:
+    pilots = [row[0] for row in conn.execute("SELECT StaffID FROM Staff WHERE Role = 'Pilot' ORDER BY StaffID;")]
+    instances = [
+        row[0]
+        for row in conn.execute(
+            """
+            SELECT InstanceID FROM FlightInstance fi
+            WHERE NOT EXISTS (SELECT 1 FROM CrewAssignment ca WHERE ca.InstanceID = fi.InstanceID);
+            """
+        )
+    ]
+    rows = []
+    for i, instance_id in enumerate(instances):
+        rows.append((instance_id, pilots[i % len(pilots)], "Captain"))
+        rows.append((instance_id, pilots[(i + 1) % len(pilots)], "First Officer"))
+    conn.executemany(
+        "INSERT INTO CrewAssignment (InstanceID, StaffID, DutyRole) VALUES (?, ?, ?);", rows
+    )
+    conn.commit()
+
+
+def bench_reports(args) -> None:
+    from Reports import REPORTS, run_report
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            add_synthetic_instances(conn, args.instances)
+            add_synthetic_crew(conn)
+
+        for name in args.report or list(REPORTS):
+            started = time.perf_counter()
+            _, serial_rows = run_report(name, db_path, workers=1)
+            serial = time.perf_counter() - started
+
+            started = time.perf_counter()
+            _, parallel_rows = run_report(name, db_path, workers=args.workers, parallel_min_rows=0)
+            parallel = time.perf_counter() - started
+
+            report(f"{name} (1 process)", len(serial_rows), serial)
+            report(f"{name} ({args.workers} processes)", len(parallel_rows), parallel)
+            same = "identical" if serial_rows == parallel_rows else "DIFFERENT"
+            print(f"{'':<40} speedup {serial / parallel:4.2f}x, results {same}")
+
+
+# Schedules
+# ---------
+
+def bench_schedule(args) -> None:
+    from Schedule import ScheduleRequest, generate_schedule
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            flights = [row[0] for row in conn.execute("SELECT FlightID FROM Flight ORDER BY FlightID;")]
+            aircraft = [row[0] for row in conn.execute("SELECT AircraftID FROM Aircraft WHERE InService = 1;")]
+            days = -(-args.instances // len(flights))
+            first = date.fromisoformat(args.start_date)
+            last = (first + timedelta(days=days - 1)).isoformat()
+            requests = [
+                ScheduleRequest(
+                    flight_id,
+                    first.isoformat(),
+                    last,
+                    "1234567",
+                    f"{6 + i % 14:02d}:{15 * (i % 4):02d}",
+                    90 + 10 * (i % 12),
+                    aircraft[i % len(aircraft)],
+                    args.time_basis,
+                )
+                for i, flight_id in enumerate(flights)
+            ]
+
+            started = time.perf_counter()
+            result = generate_schedule(conn, requests)
+            report(f"generate_schedule ({args.time_basis})", result.created, time.perf_counter() - started, "instances")
+
+            started = time.perf_counter()
+            again = generate_schedule(conn, requests)
+            report("generate_schedule (all duplicates)", len(again.duplicates), time.perf_counter() - started, "dates")
+
+
+# Rotations
+# ---------
+
+def add_synthetic_aircraft(conn: sqlite3.Connection, count: int) -> None:
+    conn.executemany(
+        """
+        INSERT INTO Aircraft (TailNumber, Manufacturer, Model, SeatCapacity, InService)
+        VALUES (?, 'Airbus', 'A320', 180, 1);
+        """,
+        [(f"X-B{n:04d}",) for n in range(count)],
+    )
+    conn.commit()
+
+
+def bench_rotation(args) -> None:
+    from Rotation import CONTINUITY, REASSIGN_KINDS, check_rotations, load_fleet, load_legs, propose_assignments
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            add_synthetic_aircraft(conn, args.aircraft)
+            add_synthetic_instances(conn, args.instances)
+
+            started = time.perf_counter()
+            legs = load_legs(conn)
+            fleet = load_fleet(conn)
+            report("load legs", len(legs), time.perf_counter() - started, "legs")
+
+            started = time.perf_counter()
+            issues = check_rotations(legs, fleet)
+            report("check_rotations", len(legs), time.perf_counter() - started, "legs")
+
+            started = time.perf_counter()
+            kinds = REASSIGN_KINDS + (CONTINUITY,) if args.include_continuity else REASSIGN_KINDS
+            proposals = propose_assignments(legs, fleet, issues, kinds=kinds)
+            report("propose_assignments", len(proposals), time.perf_counter() - started, "legs")
+            resolved = sum(p.to_aircraft_id is not None for p in proposals)
+            print(f"Issues: {len(issues):,}   Reassigned: {resolved:,}   Unresolved: {len(proposals) - resolved:,}")
+
+
+# Gates
+# -----
+
+# One busy day at the airport with the most flights: departures spread over
+# the day, each at a random gate or (ungated share) none.
+def add_hub_day(conn: sqlite3.Connection, departures: int, gates: int, ungated: float, day: str) -> int:
+    airport_id, = conn.execute(
+        """
+        SELECT r.OriginAirportID FROM Flight f JOIN Route r ON r.RouteID = f.RouteID
+        GROUP BY r.OriginAirportID ORDER BY COUNT(*) DESC, r.OriginAirportID LIMIT 1;
+        """
+    ).fetchone()
+    flights = [row[0] for row in conn.execute(
+        "SELECT f.FlightID FROM Flight f JOIN Route r ON r.RouteID = f.RouteID WHERE r.OriginAirportID = ?;",
+        (airport_id,),
+    )]
+    # A flight operates once a day, so add flights on the hub's routes until
+    # there is one per departure.
+    routes = [row[0] for row in conn.execute("SELECT RouteID FROM Route WHERE OriginAirportID = ?;", (airport_id,))]
+    airline_id, = conn.execute("SELECT MIN(AirlineID) FROM Airline;").fetchone()
+    for n in range(len(flights), departures):
+        flights.append(conn.execute(
+            "INSERT INTO Flight (AirlineID, FlightNumber, RouteID) VALUES (?, ?, ?);",
+            (airline_id, f"GB{n}", routes[n % len(routes)]),
+        ).lastrowid)
+    aircraft = [row[0] for row in conn.execute("SELECT AircraftID FROM Aircraft WHERE InService = 1;")]
+    pool = [(f"T{n % 3 + 1}", f"G{n:03d}") for n in range(gates)]
+    rng = random.Random(35)
+    rows = []
+    for i in range(departures):
+        minute = rng.randrange(24 * 60)
+        terminal, gate = rng.choice(pool)
+        if rng.random() < ungated:
+            gate = None
+        dep = f"{day} {minute // 60:02d}:{minute % 60:02d}:00"
+        rows.append((flights[i % len(flights)], day, dep, dep, terminal, gate, aircraft[i % len(aircraft)]))
+    conn.executemany(
+        """
+        INSERT INTO FlightInstance (FlightID, FlightDate, SchedDepUtc, SchedArrUtc, Status, Terminal, Gate, AircraftID)
+        VALUES (?, ?, ?, datetime(?, '+2 hours'), 'Scheduled', ?, ?, ?);
+        """,
+        rows,
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO AirportGate (AirportID, Terminal, Gate) VALUES (?, ?, ?);",
+        [(airport_id, terminal, gate) for terminal, gate in pool],
+    )
+    conn.commit()
+    return airport_id
+
+
+def bench_gates(args) -> None:
+    from Gates import allocate_gates, apply_gate_assignments, find_conflicts, gate_inventory, load_gate_day, GateDayPlan
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            airport_id = add_hub_day(conn, args.departures, args.gates, args.ungated, args.day)
+
+            started = time.perf_counter()
+            uses = load_gate_day(conn, airport_id, args.day)
+            report("load_gate_day", len(uses), time.perf_counter() - started, "flights")
+
+            started = time.perf_counter()
+            conflicts = find_conflicts(uses)
+            report("find_conflicts", len(uses), time.perf_counter() - started, "flights")
+
+            started = time.perf_counter()
+            inventory = gate_inventory(conn, airport_id, uses)
+            assignments = allocate_gates(uses, inventory, conflicts=conflicts)
+            report("allocate_gates", len(assignments), time.perf_counter() - started, "flights")
+
+            started = time.perf_counter()
+            plan = GateDayPlan(airport_id, args.day, uses, conflicts, assignments)
+            updated = apply_gate_assignments(conn, plan)
+            report("apply_gate_assignments", updated, time.perf_counter() - started, "flights")
+
+            remaining = find_conflicts(load_gate_day(conn, airport_id, args.day))
+            print(
+                f"Conflicts: {len(conflicts):,}   Assigned: {updated:,}   "
+                f"Unresolved: {len(plan.unresolved):,}   Conflicts after: {len(remaining):,}"
+            )
+
+
+# Delays
+# ------
+
+def bench_delays(args) -> None:
+    from Delays import load_delay_network
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            add_synthetic_aircraft(conn, args.aircraft)
+            add_synthetic_instances(conn, args.instances)
+            add_synthetic_crew(conn)
+
+            started = time.perf_counter()
+            network = load_delay_network(conn)
+            report("load_delay_network", len(network), time.perf_counter() - started, "legs")
+
+            rng = random.Random(36)
+            pending = sorted(i for i, leg in network.legs.items() if leg.actual_dep is None and leg.actual_arr is None)
+            ids = rng.sample(pending, min(args.what_ifs, len(pending)))
+            moved = 0
+            started = time.perf_counter()
+            for instance_id in ids:
+                moved += len(network.what_if(instance_id, args.delay_minutes))
+            report("what_if", len(ids), time.perf_counter() - started, "delays")
+            print(f"Legs moved per delay: {moved / max(1, len(ids)):,.1f}")
+
+            conn.executemany(
+                "UPDATE FlightInstance SET ActualDepUtc = datetime(SchedDepUtc, ?) WHERE InstanceID = ?;",
+                [(f"+{args.delay_minutes} minutes", instance_id) for instance_id in ids],
+            )
+            conn.commit()
+            started = time.perf_counter()
+            affected = network.sync(conn)
+            report("sync", len(ids), time.perf_counter() - started, "changes")
+            print(f"Legs moved by sync: {len(affected):,}")
+
+
+# Simulation
+# ----------
+
+def bench_simulation(args) -> None:
+    from Simulation import print_robustness, run_robustness
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            add_synthetic_aircraft(conn, args.aircraft)
+            # A year of history before the season, with random departure delays.
+            history_start = (date.fromisoformat(args.start_date) - timedelta(days=365)).isoformat()
+            flights = conn.execute("SELECT COUNT(*) FROM Flight;").fetchone()[0]
+            add_synthetic_instances(conn, 364 * flights, history_start)
+            conn.execute(
+                """
+                UPDATE FlightInstance
+                SET ActualDepUtc = datetime(SchedDepUtc, '+' || (abs(random()) % 5 * abs(random()) % 40) || ' minutes')
+                WHERE FlightDate >= ? AND FlightDate < ?;
+                """,
+                (history_start, args.start_date),
+            )
+            add_synthetic_instances(conn, args.instances, args.start_date)
+            add_synthetic_crew(conn)
+            last_day = conn.execute("SELECT MAX(FlightDate) FROM FlightInstance;").fetchone()[0]
+
+            started = time.perf_counter()
+            result = run_robustness(
+                conn, args.start_date, last_day, args.scenarios, args.workers, db_path, seed=37
+            )
+            seconds = time.perf_counter() - started
+        report("run_robustness", args.scenarios, seconds, "scenarios")
+        report("  leg-scenarios", len(result.model) * args.scenarios, seconds, "legs")
+        print(f"Levels: {len(result.model.levels):,}")
+        print_robustness(result, top=5)
+
+
+# Pairings
+# --------
+
+# A hub-and-spoke airline: out-and-back waves from each hub to its spokes
+# every day, and pilots based at the hubs.
+def add_hub_network(conn: sqlite3.Connection, hubs: int, spokes: int, waves: int, days: int, pilots: int, start_date: str) -> None:
+    airports = [row[0] for row in conn.execute("SELECT AirportID FROM Airport ORDER BY AirportID;")]
+    airline_id, = conn.execute("SELECT MIN(AirlineID) FROM Airline;").fetchone()
+    aircraft_id, = conn.execute("SELECT MIN(AircraftID) FROM Aircraft WHERE InService = 1;").fetchone()
+    rng = random.Random(38)
+    hub_ids = airports[:hubs]
+    legs = []
+    for h, hub in enumerate(hub_ids):
+        for spoke in rng.sample(airports[hubs:], min(spokes, len(airports) - hubs)):
+            block = rng.randrange(50, 150)
+            routes = [
+                conn.execute(
+                    "INSERT INTO Route (OriginAirportID, DestinationAirportID, DistanceKm) VALUES (?, ?, ?);",
+                    (origin, dest, block * 12),
+                ).lastrowid
+                for origin, dest in ((hub, spoke), (spoke, hub))
+            ]
+            # One flight number pair per wave: a flight operates once a day.
+            pairs = [
+                [
+                    conn.execute(
+                        "INSERT INTO Flight (AirlineID, FlightNumber, RouteID) VALUES (?, ?, ?);",
+                        (airline_id, f"P{route_id}W{wave}", route_id),
+                    ).lastrowid
+                    for route_id in routes
+                ]
+                for wave in range(waves)
+            ]
+            legs.append((pairs, block))
+
+    first_day = date.fromisoformat(start_date)
+    rows = []
+    for d in range(days):
+        day = datetime.combine(first_day + timedelta(days=d), datetime.min.time())
+        for pairs, block in legs:
+            for wave, (out_id, back_id) in enumerate(pairs):
+                out = day + timedelta(hours=5 + wave * 16 / waves, minutes=rng.randrange(0, 60, 5))
+                back = out + timedelta(minutes=block + 45)
+                for flight_id, dep in ((out_id, out), (back_id, back)):
+                    arr = dep + timedelta(minutes=block)
+                    rows.append((flight_id, dep.date().isoformat(), f"{dep:%Y-%m-%d %H:%M:%S}", f"{arr:%Y-%m-%d %H:%M:%S}", aircraft_id))
+    conn.executemany(
+        """
+        INSERT INTO FlightInstance (FlightID, FlightDate, SchedDepUtc, SchedArrUtc, Status, AircraftID)
+        VALUES (?, ?, ?, ?, 'Scheduled', ?);
+        """,
+        rows,
+    )
+    conn.executemany(
+        "INSERT INTO Staff (FirstName, LastName, Role, BaseAirportID) VALUES ('Bench', ?, 'Pilot', ?);",
+        [(f"Pilot{n}", hub_ids[n % hubs]) for n in range(pilots)],
+    )
+    conn.commit()
+
+
+def bench_pairings(args) -> None:
+    from Pairings import PILOT_ROLES, apply_crew_plan, plan_crew_for_dates
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            add_hub_network(conn, args.hubs, args.spokes, args.waves, args.days, args.pilots, args.start_date)
+            last_day = (date.fromisoformat(args.start_date) + timedelta(days=args.days - 1)).isoformat()
+            legs = conn.execute(
+                "SELECT COUNT(*) FROM FlightInstance WHERE FlightDate BETWEEN ? AND ?;", (args.start_date, last_day)
+            ).fetchone()[0]
+
+            started = time.perf_counter()
+            plan = plan_crew_for_dates(conn, args.start_date, last_day)
+            report("plan_crew_for_dates", legs, time.perf_counter() - started, "legs")
+
+            started = time.perf_counter()
+            written = apply_crew_plan(conn, plan)
+            report("apply_crew_plan", written, time.perf_counter() - started, "rows")
+
+            pairings = {id(a.pairing) for a in plan.assignments}
+            print(f"Pairings: {len(pairings):,}   Staffed seats: {len(plan.staffed):,} of {len(plan.assignments):,}")
+            for role in PILOT_ROLES:
+                print(f"{role} seats uncovered: {len(plan.uncovered[role]):,} of {legs:,}")
+
+
+# Station Board
+# -------------
+
+def bench_board(args) -> None:
+    import Queries as q
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            add_synthetic_instances(conn, args.instances, args.start_date)
+            airport_id, iata = conn.execute(
+                """
+                SELECT s.OriginAirportID, a.IataCode FROM InstanceStation s JOIN Airport a ON a.AirportID = s.OriginAirportID
+                GROUP BY s.OriginAirportID ORDER BY COUNT(*) DESC LIMIT 1;
+                """
+            ).fetchone()
+            first, last = conn.execute("SELECT MIN(SchedDepUtc), MAX(SchedDepUtc) FROM FlightInstance;").fetchone()
+            first, last = datetime.fromisoformat(first), datetime.fromisoformat(last)
+            rng = random.Random(39)
+            windows = []
+            for _ in range(args.queries):
+                start = first + timedelta(minutes=rng.randrange(int((last - first).total_seconds() // 60) + 1))
+                windows.append((start.strftime("%Y-%m-%d %H:%M:%S"), (start + timedelta(hours=args.hours)).strftime("%Y-%m-%d %H:%M:%S")))
+
+            started = time.perf_counter()
+            rows = 0
+            for window in windows:
+                rows += len(conn.execute(q.SQL_STATION_DEPARTURES, (airport_id,) + window).fetchall())
+                rows += len(conn.execute(q.SQL_STATION_ARRIVALS, (airport_id,) + window).fetchall())
+            report("station board (InstanceStation)", len(windows), time.perf_counter() - started, "boards")
+
+            # The old path: filter the grouped detail view on origin/destination IATA.
+            sample = windows[:args.baseline]
+            started = time.perf_counter()
+            for window in sample:
+                conn.execute(
+                    "SELECT * FROM View_FlightsDetailedWithPilots WHERE OriginIata = ? AND SchedDepUtc >= ? AND SchedDepUtc < ?;",
+                    (iata,) + window,
+                ).fetchall()
+                conn.execute(
+                    "SELECT * FROM View_FlightsDetailedWithPilots WHERE DestIata = ? AND SchedArrUtc >= ? AND SchedArrUtc < ?;",
+                    (iata,) + window,
+                ).fetchall()
+            report("station board (detail view)", len(sample), time.perf_counter() - started, "boards")
+            print(f"Airport: {iata}   Instances: {args.instances:,}   Rows per board: {rows / max(len(windows), 1):,.1f}")
+
+
+# Reset
+# -----
+
+def bench_reset(args) -> None:
+    from SeedDB import build_db, clone_template, ensure_template
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            build_db(tmp_dir / "Replay.db")
+        report("replay SQL files", args.repeat, time.perf_counter() - started, "dbs")
+
+        template = ensure_template(tmp_dir / "Template.db")
+        for method in ("copy", "backup"):
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                clone_template(tmp_dir / "Clone.db", template, method)
+            report(f"clone template ({method})", args.repeat, time.perf_counter() - started, "dbs")
+
+        # A large seed: the template grown by synthetic instances.
+        with connect(template) as conn:
+            add_synthetic_instances(conn, args.instances)
+        conn.close()
+        size_mb = template.stat().st_size / 1e6
+        for method in ("copy", "backup"):
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                clone_template(tmp_dir / "Clone.db", template, method)
+            report(f"clone {size_mb:,.0f} MB template ({method})", args.repeat, time.perf_counter() - started, "dbs")
+
+
+# Memory mode
+# -----------
+
+def _memory_workload(conn: sqlite3.Connection, args, label: str) -> None:
+    from Bookings import BookingItemRequest, BookingRequest, PassengerInfo, create_bookings
+
+    instance_ids = [row[0] for row in conn.execute("SELECT InstanceID FROM FlightInstance;")]
+    days = [row[0] for row in conn.execute("SELECT DISTINCT FlightDate FROM FlightInstance;")]
+    rng = random.Random(43)
+
+    started = time.perf_counter()
+    for n in range(args.updates):
+        conn.execute("UPDATE FlightInstance SET Gate = ? WHERE InstanceID = ?;", (f"G{n % 40}", rng.choice(instance_ids)))
+        conn.commit()
+    report(f"{label}: gate updates, commit each", args.updates, time.perf_counter() - started, "commits")
+
+    started = time.perf_counter()
+    created = 0
+    for n in range(args.bookings):
+        passenger = PassengerInfo(f"M{label[0]}{n:07d}", "GBR", "Bench", f"Passenger{n}")
+        request = BookingRequest([passenger], [BookingItemRequest(rng.choice(instance_ids), passenger.passport_no, "GBR")])
+        created += sum(1 for result in create_bookings(conn, [request]) if not result.error)
+    report(f"{label}: bookings, one per call", created, time.perf_counter() - started, "bookings")
+
+    started = time.perf_counter()
+    rows = 0
+    for _ in range(args.queries):
+        rows += len(conn.execute(
+            "SELECT * FROM View_FlightsDetailedWithPilots WHERE FlightDate = ?;", (rng.choice(days),)
+        ).fetchall())
+    report(f"{label}: day listings", args.queries, time.perf_counter() - started, "queries")
+
+
+def bench_memory(args) -> None:
+    from MemoryMode import MemoryDatabase
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            add_synthetic_instances(conn, args.instances)
+        conn.close()
+        print(f"Database: {db_path.stat().st_size / 1e6:,.1f} MB")
+
+        with connect(db_path) as conn:
+            _memory_workload(conn, args, "file")
+        conn.close()
+
+        started = time.perf_counter()
+        memory = MemoryDatabase(db_path, flush_every=None)
+        report("load into memory", 1, time.perf_counter() - started, "loads")
+        try:
+            conn = memory.connect()
+            _memory_workload(conn, args, "memory")
+            conn.close()
+            started = time.perf_counter()
+            for _ in range(args.flushes):
+                memory.flush()
+            report("flush to file (backup API)", args.flushes, time.perf_counter() - started, "flushes")
+        finally:
+            memory.close()
+
+
+# Export
+# ------
+
+def bench_export(args) -> None:
+    import tracemalloc
+
+    import Queries as q
+    from Export import EXPORT_FORMATS, export_query
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            add_synthetic_instances(conn, args.instances)
+        conn.close()
+        sql, params = q.build_flights_by_criteria({})
+
+        with connect(db_path) as conn:
+            started = time.perf_counter()
+            rows = 0
+            cur = conn.execute(sql, params)
+            while chunk := cur.fetchmany(args.chunk_size):
+                rows += len(chunk)
+            report("raw scan (fetchmany, no output)", rows, time.perf_counter() - started)
+        conn.close()
+
+        for fmt, suffix in EXPORT_FORMATS.items():
+            path = Path(tmp) / f"export{suffix}"
+            result = export_query(sql, params, path, fmt, db_path=db_path, chunk_size=args.chunk_size)
+            report(f"export {fmt} ({path.stat().st_size / 1e6:,.0f} MB)", result.rows, result.seconds)
+
+        # Peak Python memory is set by the chunk size, not the row count: it
+        # should come out the same for 2 and 20 chunks' worth of rows.
+        for chunks in (2, 20):
+            tracemalloc.start()
+            result = export_query(
+                f"SELECT * FROM ({sql.rstrip().rstrip(';')}) LIMIT ?;", params + (chunks * args.chunk_size,),
+                Path(tmp) / "peak.csv", "csv", db_path=db_path, chunk_size=args.chunk_size,
+            )
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{'csv peak memory, ' + format(result.rows, ',') + ' rows':<40} {peak / 1e6:>10.1f} MB")
+            if result.rows < chunks * args.chunk_size:
+                print(f"  (only {result.rows:,} rows to export; raise --instances to fill {chunks} chunks)")
+
+
+# Search
+# ------
+
+def add_synthetic_flights(conn: sqlite3.Connection, count: int) -> None:
+    airlines = conn.execute("SELECT AirlineID, COALESCE(IataCode, IcaoCode, 'ZZ') FROM Airline WHERE Active = 1;").fetchall()
+    routes = [row[0] for row in conn.execute("SELECT RouteID FROM Route;")]
+    rng = random.Random(46)
+    taken = set(conn.execute("SELECT AirlineID, FlightNumber FROM Flight;").fetchall())
+    rows = []
+    while len(rows) < count:
+        airline_id, code = rng.choice(airlines)
+        number = f"{code}{rng.randrange(1, 10000)}"
+        if (airline_id, number) not in taken:
+            taken.add((airline_id, number))
+            rows.append((airline_id, number, rng.choice(routes)))
+    conn.executemany("INSERT INTO Flight (AirlineID, FlightNumber, RouteID) VALUES (?, ?, ?);", rows)
+    conn.commit()
+
+
+def bench_search(args) -> None:
+    from dataclasses import replace
+
+    from AllFilterSpecs import AIRLINE_FILTER_SPECS, FLIGHT_FILTER_SPECS
+    from FilterSQL import apply_sql_filter
+    from ReferenceSync import sync_reference_data
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            sync_reference_data(conn)
+            add_synthetic_flights(conn, args.flights)
+
+            flight_spec = next(s for s in FLIGHT_FILTER_SPECS if s.key == "flight_no_like")
+            cases = [
+                ("Airline.Name", "Airline", "Name", next(s for s in AIRLINE_FILTER_SPECS if s.key == "name")),
+                ("Flight.FlightNumber", "Flight", "FlightNumber", replace(flight_spec, fts_key="FlightID")),
+            ]
+            rng = random.Random(46)
+            for label, table, column, fts_spec in cases:
+                values = [row[0] for row in conn.execute(f"SELECT {column} FROM {table} WHERE length({column}) >= 5;")]
+                needles = []
+                for _ in range(args.queries):
+                    value = rng.choice(values)
+                    size = rng.randint(3, 5)
+                    start = rng.randrange(len(value) - size + 1)
+                    needles.append(value[start:start + size])
+
+                like_spec = replace(fts_spec, sql_kind="like", col=column)
+                timings = {}
+                for kind, spec in (("LIKE scan", like_spec), ("trigram FTS", fts_spec)):
+                    started = time.perf_counter()
+                    matches = []
+                    for needle in needles:
+                        params: list = []
+                        sql = apply_sql_filter(f"SELECT COUNT(*) FROM {table} WHERE 1 = 1", params, spec, needle)
+                        matches.append(conn.execute(sql, params).fetchone()[0])
+                    timings[kind] = (time.perf_counter() - started, matches)
+                if timings["LIKE scan"][1] != timings["trigram FTS"][1]:
+                    print(f"{label}: FTS and LIKE disagree!")
+                rows = conn.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0]
+                for kind, (seconds, _) in timings.items():
+                    report(f"{label} ({rows:,} rows) {kind}", len(needles), seconds, "searches")
+        conn.close()
+
+
+# Autocomplete
+# ------------
+
+def _typo(word: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.choice(("drop", "swap", "replace"))
+    if kind == "drop":
+        return word[:i] + word[i + 1:]
+    if kind == "swap":
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice("aeioulnrst") + word[i + 1:]
+
+
+# Partial city names and the city the first airport offered should be in.
+AUTOCOMPLETE_RANKING = [("par", "Paris")]
+
+
+def bench_autocomplete(args) -> None:
+    import Autocomplete
+    from ReferenceSync import sync_reference_data
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            sync_reference_data(conn)
+            for table, search in (("Airport", Autocomplete.search_airports), ("Airline", Autocomplete.search_airlines)):
+                started = time.perf_counter()
+                index = Autocomplete.current_index(conn, table)
+                print(f"{table} index: {len(index):,} records built in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+                rows = conn.execute(
+                    "SELECT IataCode, Name, City FROM Airport;" if table == "Airport"
+                    else "SELECT IataCode, Name, NULL FROM Airline WHERE Active = 1;"
+                ).fetchall()
+                rng = random.Random(47)
+                words = [w for _, name, city in rows for w in Autocomplete.normalize(f"{name} {city or ''}").split() if len(w) >= 5]
+                codes = [code for code, _, _ in rows if code]
+                queries = {
+                    "code": [(code, code.lower()) for code in rng.choices(codes, k=args.queries)],
+                    "prefix": [(w[:rng.randint(2, len(w) - 1)], w) for w in rng.choices(words, k=args.queries)],
+                    "typo": [(_typo(w, rng), w) for w in rng.choices(words, k=args.queries)],
+                }
+                for kind, cases in queries.items():
+                    timings, hits = [], 0
+                    for text, wanted in cases:
+                        started = time.perf_counter()
+                        _, matches = search(conn, text)
+                        timings.append(time.perf_counter() - started)
+                        hits += any(wanted in Autocomplete.normalize(" ".join(str(v) for v in m.row)).split() for m in matches)
+                    timings.sort()
+                    p50, p99 = timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+                    print(
+                        f"  {kind:<7} {len(cases):>6,} searches  p50 {p50 * 1000:.3f} ms  p99 {p99 * 1000:.3f} ms  "
+                        f"max {timings[-1] * 1000:.2f} ms  found in top {Autocomplete.DEFAULT_LIMIT}: {hits / len(cases):.0%}"
+                    )
+
+            for text, city in AUTOCOMPLETE_RANKING:
+                _, matches = Autocomplete.search_airports(conn, text)
+                first = matches[0].row if matches else None
+                verdict = "ok" if first and first[4] == city else f"FAIL (wanted {city})"
+                print(f"Ranking: {text!r} -> {first[3] if first else 'nothing'} ({first[4] if first else '-'}): {verdict}")
+
+            conn.execute("UPDATE Airport SET Name = Name || ' ' WHERE AirportID = (SELECT MIN(AirportID) FROM Airport);")
+            started = time.perf_counter()
+            Autocomplete.search_airports(conn, "lhr")
+            print(f"Rebuild after an Airport change: {(time.perf_counter() - started) * 1000:.0f} ms")
+        conn.close()
+
+
+# Routes
+# ------
+
+def add_synthetic_routes(conn: sqlite3.Connection, total: int) -> None:
+    airports = [row[0] for row in conn.execute("SELECT AirportID FROM Airport WHERE IataCode IS NOT NULL;")]
+    # Hub-heavy like the real network: a few hundred airports get most routes.
+    hubs = airports[: max(len(airports) // 20, 2)]
+    rng = random.Random(48)
+    taken = set(conn.execute("SELECT OriginAirportID, DestinationAirportID FROM Route;").fetchall())
+    rows = []
+    while len(taken) < total:
+        origin = rng.choice(hubs) if rng.random() < 0.7 else rng.choice(airports)
+        dest = rng.choice(hubs) if rng.random() < 0.5 else rng.choice(airports)
+        if origin != dest and (origin, dest) not in taken:
+            taken.add((origin, dest))
+            rows.append((origin, dest, rng.randint(100, 12000)))
+    conn.executemany("INSERT INTO Route (OriginAirportID, DestinationAirportID, DistanceKm) VALUES (?, ?, ?);", rows)
+    conn.commit()
+
+
+def bench_routes(args) -> None:
+    import Queries as q
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            from ReferenceSync import sync_reference_data
+
+            sync_reference_data(conn)
+            add_synthetic_routes(conn, args.routes)
+            conn.execute("ANALYZE;")
+            pairs = conn.execute(
+                """
+                SELECT ao.IataCode, ao.IcaoCode, ad.IataCode, ad.IcaoCode
+                FROM Route r
+                JOIN Airport ao ON ao.AirportID = r.OriginAirportID
+                JOIN Airport ad ON ad.AirportID = r.DestinationAirportID
+                WHERE ao.IataCode IS NOT NULL AND ad.IataCode IS NOT NULL
+                  AND ao.IcaoCode IS NOT NULL AND ad.IcaoCode IS NOT NULL;
+                """
+            ).fetchall()
+            rng = random.Random(48)
+            sample = rng.sample(pairs, min(args.queries, len(pairs)))
+            routes = conn.execute("SELECT COUNT(*) FROM Route;").fetchone()[0]
+            print(f"Routes: {routes:,}")
+
+            cases = {
+                "origin + dest (IATA)": lambda p: {"origin": p[0], "dest": p[2]},
+                "origin + dest (ICAO)": lambda p: {"origin": p[1], "dest": p[3]},
+                "origin + dest, both ways": lambda p: {"origin": p[0], "dest": p[2], "reverse": "yes"},
+                "origin only": lambda p: {"origin": p[0]},
+                "origin only, both ways": lambda p: {"origin": p[0], "reverse": "yes"},
+                "unfiltered (first page)": lambda p: {},
+            }
+            for label, make_filters in cases.items():
+                started = time.perf_counter()
+                rows = 0
+                for pair in sample:
+                    sql, params = q.build_routes_for_new_flight(make_filters(pair))
+                    rows += len(conn.execute(sql, params).fetchall())
+                report(f"{label} ({rows / len(sample):,.1f} rows)", len(sample), time.perf_counter() - started, "lookups")
+
+            sql, params = q.build_routes_for_new_flight({"origin": sample[0][0], "dest": sample[0][2]})
+            for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+                print("  plan:", row[3])
+
+            # The old picker: every route, joined and sorted, on each display.
+            baseline = sample[: args.baseline]
+            started = time.perf_counter()
+            for _ in baseline:
+                conn.execute(
+                    """
+                    SELECT r.RouteID, ao.IataCode AS Origin, ad.IataCode AS Dest, r.DistanceKm AS Km
+                    FROM Route r
+                    JOIN Airport ao ON ao.AirportID = r.OriginAirportID
+                    JOIN Airport ad ON ad.AirportID = r.DestinationAirportID
+                    ORDER BY Origin, Dest, r.RouteID;
+                    """
+                ).fetchall()
+            report("full listing (old picker)", len(baseline), time.perf_counter() - started, "lookups")
+        conn.close()
+
+
+# List filters
+# ------------
+
+def bench_in_filters(args) -> None:
+    import FilterSQL
+    import Queries as q
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            add_synthetic_flights(conn, args.flights)
+            add_synthetic_instances(conn, args.instances)
+            numbers = [row[0] for row in conn.execute("SELECT FlightNumber FROM Flight;")]
+            rng = random.Random(49)
+            print(f"Flights: {len(numbers):,}   Instances: {args.instances:,}")
+
+            bind_limit = FilterSQL.IN_LIST_BIND_LIMIT
+            for size in args.sizes:
+                values = [n.lower() for n in rng.sample(numbers, min(size, len(numbers)))]
+                # Bound placeholders (while the list is short enough), then
+                # the json_each path forced for the same list.
+                for label, limit in (("bound", bind_limit), ("json_each", 0)):
+                    if len(values) > limit and label == "bound":
+                        continue
+                    FilterSQL.IN_LIST_BIND_LIMIT = limit
+                    try:
+                        sql, params = q.build_flights_by_criteria({"flight_no_list": values})
+                    finally:
+                        FilterSQL.IN_LIST_BIND_LIMIT = bind_limit
+                    started = time.perf_counter()
+                    rows = len(conn.execute(sql, params).fetchall())
+                    seconds = time.perf_counter() - started
+                    print(f"  {len(values):>6,} values  {label:<9} {rows:>8,} rows in {seconds * 1000:8.1f} ms")
+
+            # The old way: one FlightNo browse per value.
+            sample = rng.sample(numbers, min(args.baseline, len(numbers)))
+            started = time.perf_counter()
+            for value in sample:
+                sql, params = q.build_flights_by_criteria({"flight_no_list": [value]})
+                conn.execute(sql, params).fetchall()
+            report("one browse per value (old)", len(sample), time.perf_counter() - started, "values")
+        conn.close()
+
+
+# Status feed
+# -----------
+
+# Three events per instance (off blocks, gate change, on blocks), written in
+# event-time order so events for one instance arrive interleaved with many
+# others, with about one row in a hundred broken.
+def write_feed_events(path: Path, fmt: str, instances: list[tuple[int, str, str]], bad_every: int = 100) -> int:
+    import csv
+    import json
+
+    rng = random.Random(50)
+    events = []
+    for instance_id, dep, arr in instances:
+        off = datetime.fromisoformat(dep) + timedelta(minutes=rng.randrange(0, 40))
+        on = datetime.fromisoformat(arr) + timedelta(minutes=rng.randrange(-10, 40))
+        events.append((off - timedelta(minutes=30), instance_id, {"Gate": f"G{rng.randrange(1, 60)}"}))
+        events.append((off, instance_id, {"Status": "Active", "ActualDepUtc": off.strftime("%Y-%m-%d %H:%M:%S")}))
+        events.append((on, instance_id, {"Status": "Landed", "ActualArrUtc": on.strftime("%Y-%m-%d %H:%M:%S")}))
+    events.sort(key=lambda event: event[0])
+
+    columns = ["EventTime", "InstanceID", "Status", "ActualDepUtc", "ActualArrUtc", "Gate"]
+    with path.open("w", newline="" if fmt == "csv" else None, encoding="utf-8") as f:
+        writer = csv.DictWriter(f, columns) if fmt == "csv" else None
+        if writer:
+            writer.writeheader()
+        for n, (moment, instance_id, values) in enumerate(events):
+            record = {"EventTime": moment.isoformat() + "Z", "InstanceID": instance_id, **values}
+            if n % bad_every == bad_every - 1:
+                record["Status"] = "Boarding"
+            if writer:
+                writer.writerow(record)
+            else:
+                f.write(json.dumps(record) + "\n")
+    return len(events)
+
+
+def bench_feed(args) -> None:
+    import shutil
+
+    from StatusFeed import ingest_feed
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = scratch_db(tmp)
+        with connect(db_path) as conn:
+            add_synthetic_instances(conn, args.instances)
+            instances = conn.execute(
+                "SELECT InstanceID, SchedDepUtc, SchedArrUtc FROM FlightInstance WHERE FlightDate >= '2027-01-01';"
+            ).fetchall()
+        conn.close()
+        pristine = Path(tmp) / "Pristine.db"
+        shutil.copyfile(db_path, pristine)
+
+        for fmt in ("csv", "jsonl"):
+            feed = Path(tmp) / f"events.{fmt}"
+            events = write_feed_events(feed, fmt, instances)
+            for batch in args.batch:
+                shutil.copyfile(pristine, db_path)
+                with connect(db_path) as conn:
+                    result = ingest_feed(conn, feed, batch_size=batch)
+                conn.close()
+                report(f"ingest {fmt}, {batch:,} instances/txn", events, result.seconds, "events")
+                print(
+                    f"{'':<4}{result.updated:,} updates, {result.coalesced:,} coalesced, "
+                    f"{result.stale:,} stale, {result.rejected:,} rejected"
+                )
+
+        # The old way: one field per statement, one commit per change, as
+        # update_instance_information_fields does.
+        shutil.copyfile(pristine, db_path)
+        with connect(db_path) as conn:
+            sample = instances[: args.baseline]
+            started = time.perf_counter()
+            for instance_id, dep, arr in sample:
+                for column, value in (("Gate", "G1"), ("Status", "Active"), ("ActualDepUtc", dep), ("Status", "Landed"), ("ActualArrUtc", arr)):
+                    conn.execute(f"UPDATE FlightInstance SET {column} = ? WHERE InstanceID = ?;", (value, instance_id))
+                    conn.commit()
+            report("one commit per field (old)", len(sample) * 5, time.perf_counter() - started, "events")
+        conn.close()
+
+
+BENCHMARKS = {
+    "bookings": bench_bookings,
+    "reports": bench_reports,
+    "schedule": bench_schedule,
+    "rotation": bench_rotation,
+    "gates": bench_gates,
+    "delays": bench_delays,
+    "simulation": bench_simulation,
+    "pairings": bench_pairings,
+    "board": bench_board,
+    "reset": bench_reset,
+    "memory": bench_memory,
+    "export": bench_export,
+    "search": bench_search,
+    "autocomplete": bench_autocomplete,
+    "routes": bench_routes,
+    "in-filters": bench_in_filters,
+    "feed": bench_feed,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Flight Management DB benchmarks")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    p = sub.add_parser("bookings", help="Batched booking creation with concurrent writers")
+    p.add_argument("--bookings", type=int, default=20000)
+    p.add_argument("--batch-size", type=int, default=500)
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--instances", type=int, default=200)
+
+    p = sub.add_parser("reports", help="Summary reports, one process against a process pool")
+    p.add_argument("--instances", type=int, default=200000)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--report", action="append", help="Report name (repeatable); default all")
+
+    p = sub.add_parser("schedule", help="Recurring schedule expansion and bulk insert")
+    p.add_argument("--instances", type=int, default=100000)
+    p.add_argument("--start-date", default="2027-01-01")
+    p.add_argument("--time-basis", choices=["UTC", "Local"], default="Local")
+
+    p = sub.add_parser("rotation", help="Tail conflict sweep and greedy reassignment")
+    p.add_argument("--aircraft", type=int, default=300)
+    p.add_argument("--instances", type=int, default=100000)
+    p.add_argument("--include-continuity", action="store_true", help="Also reassign continuity breaks")
+
+    p = sub.add_parser("gates", help="Gate conflict sweep and auto-allocation for one hub day")
+    p.add_argument("--departures", type=int, default=1500)
+    p.add_argument("--gates", type=int, default=120)
+    p.add_argument("--ungated", type=float, default=0.3, help="Share of departures without a gate")
+    p.add_argument("--day", default="2027-03-01")
+
+    p = sub.add_parser("delays", help="Delay network load, what-if propagation and incremental sync")
+    p.add_argument("--aircraft", type=int, default=300)
+    p.add_argument("--instances", type=int, default=100000)
+    p.add_argument("--what-ifs", type=int, default=1000)
+    p.add_argument("--delay-minutes", type=int, default=90)
+
+    p = sub.add_parser("simulation", help="Monte Carlo schedule robustness over a process pool")
+    p.add_argument("--aircraft", type=int, default=300)
+    p.add_argument("--instances", type=int, default=50000)
+    p.add_argument("--scenarios", type=int, default=1000)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--start-date", default="2027-01-01")
+
+    p = sub.add_parser("pairings", help="Pilot pairing build and bulk crew assignment for a hub-and-spoke week")
+    p.add_argument("--hubs", type=int, default=3)
+    p.add_argument("--spokes", type=int, default=13)
+    p.add_argument("--waves", type=int, default=4)
+    p.add_argument("--days", type=int, default=7)
+    p.add_argument("--pilots", type=int, default=300)
+    p.add_argument("--start-date", default="2027-01-04")
+
+    p = sub.add_parser("board", help="Station board departures/arrivals for random time windows at the busiest airport")
+    p.add_argument("--instances", type=int, default=200000)
+    p.add_argument("--queries", type=int, default=2000)
+    p.add_argument("--hours", type=int, default=6)
+    p.add_argument("--baseline", type=int, default=20, help="Boards to time through the detail view for comparison")
+    p.add_argument("--start-date", default="2027-01-01")
+
+    p = sub.add_parser("reset", help="Reseed by replaying SQL files against cloning the template")
+    p.add_argument("--repeat", type=int, default=10)
+    p.add_argument("--instances", type=int, default=200000, help="Synthetic instances added for the large-template run")
+
+    p = sub.add_parser("memory", help="File-backed against in-memory mode, plus flush cost")
+    p.add_argument("--instances", type=int, default=100000)
+    p.add_argument("--updates", type=int, default=2000)
+    p.add_argument("--bookings", type=int, default=500)
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--flushes", type=int, default=5)
+
+    p = sub.add_parser("export", help="Streaming listing export to CSV, JSONL and columnar against a raw scan")
+    p.add_argument("--instances", type=int, default=1000000)
+    p.add_argument("--chunk-size", type=int, default=5000)
+
+    p = sub.add_parser("search", help="Substring filters: LIKE scans against trigram FTS5 over full OpenFlights data")
+    p.add_argument("--flights", type=int, default=200000)
+    p.add_argument("--queries", type=int, default=500)
+
+    p = sub.add_parser("autocomplete", help="In-memory airport/airline autocomplete: build time, latency, typo recovery")
+    p.add_argument("--queries", type=int, default=5000)
+
+    p = sub.add_parser("routes", help="Route lookup by origin/destination code against the full listing")
+    p.add_argument("--routes", type=int, default=67000)
+    p.add_argument("--queries", type=int, default=5000)
+    p.add_argument("--baseline", type=int, default=20)
+
+    p = sub.add_parser("in-filters", help="List (IN) filters: bound placeholders against json_each, by list size")
+    p.add_argument("--flights", type=int, default=40000)
+    p.add_argument("--instances", type=int, default=200000)
+    p.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000, 30000])
+    p.add_argument("--baseline", type=int, default=20)
+
+    p = sub.add_parser("feed", help="Status feed ingestion from CSV and NDJSON against one commit per field")
+    p.add_argument("--instances", type=int, default=100000)
+    p.add_argument("--batch", type=int, nargs="+", default=[100, 1000, 5000])
+    p.add_argument("--baseline", type=int, default=200)
+
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import Queries as q
+from SeatInventory import SeatInventory
+from Transactions import audited_transaction
+
+# PNRs are six symbols from a 32-letter alphabet (no 0/O/1/I), so there are
+# exactly 2**30 of them. BookingID is mapped onto that space with a bijection
+# (odd multiplier + xorshift), which makes generated PNRs collision-free
+# without a lookup per booking. Legacy PNRs are checked once per batch.
+PNR_ALPHABET = "23456789ABCDEFGHJKLMNPQRSTUVWXYZ"
+PNR_LENGTH = 6
+PNR_SPACE = len(PNR_ALPHABET) ** PNR_LENGTH
+PNR_MULTIPLIER = 0x2545F491
+PNR_ATTEMPT_OFFSET = 0x1F3D5B7
+
+BOOKING_STATUSES = ["Confirmed", "Pending"]
+
+# One writer per process at a time; across processes BEGIN IMMEDIATE does the job.
+_write_lock = threading.Lock()
+_inventory = SeatInventory()
+
+
+@dataclass(frozen=True)
+class PassengerInfo:
+    passport_no: str
+    nationality: str
+    first_name: str
+    last_name: str
+    dob: str | None = None
+    email: str | None = None
+    phone: str | None = None
+
+
+@dataclass(frozen=True)
+class BookingItemRequest:
+    instance_id: int
+    passport_no: str
+    nationality: str
+    cabin_class: str = "Economy"
+    seat_no: str | None = None
+
+
+@dataclass
+class BookingRequest:
+    passengers: list[PassengerInfo]
+    items: list[BookingItemRequest]
+    status: str = "Confirmed"
+
+
+@dataclass
+class BookingResult:
+    booking_id: int | None
+    pnr: str | None
+    # (BookingItemID, InstanceID, PassportNo, Nationality, SeatNo, CabinClass)
+    items: list[tuple] = field(default_factory=list)
+    error: str | None = None
+
+
+def encode_pnr(booking_id: int, attempt: int = 0) -> str:
+    x = (booking_id * PNR_MULTIPLIER + attempt * PNR_ATTEMPT_OFFSET) % PNR_SPACE
+    x ^= x >> 15
+    chars = []
+    for _ in range(PNR_LENGTH):
+        x, digit = divmod(x, len(PNR_ALPHABET))
+        chars.append(PNR_ALPHABET[digit])
+    return "".join(chars)
+
+
+def utc_now_text() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+# Hold seats for every item of one booking, or none of them.
+def _hold_booking_seats(
+    conn: sqlite3.Connection,
+    inventory: SeatInventory,
+    request: BookingRequest,
+) -> list[tuple[BookingItemRequest, str, str]]:
+    if request.status not in BOOKING_STATUSES:
+        raise ValueError(f"Booking status must be one of {', '.join(BOOKING_STATUSES)}.")
+    if not request.items:
+        raise ValueError("A booking needs at least one item.")
+
+    known = {(p.passport_no, p.nationality) for p in request.passengers}
+    held: list[tuple[BookingItemRequest, str, str]] = []
+    try:
+        for item in request.items:
+            if (item.passport_no, item.nationality) not in known:
+                raise ValueError(
+                    f"Passenger {item.passport_no}/{item.nationality} is not part of the booking."
+                )
+            seat_no, cabin = inventory.hold_seat(
+                conn, item.instance_id, item.seat_no, item.cabin_class
+            )
+            held.append((item, seat_no, cabin))
+    except ValueError:
+        for item, seat_no, _ in held:
+            inventory.release_hold(item.instance_id, seat_no)
+        raise
+    return held
+
+
+def _allocate_pnrs(conn: sqlite3.Connection, booking_ids: list[int]) -> dict[int, str]:
+    pnrs: dict[int, str] = {}
+    pending = {booking_id: 0 for booking_id in booking_ids}
+    while pending:
+        candidates = {encode_pnr(b, attempt): b for b, attempt in pending.items()}
+        in_use = {
+            row[0]
+            for row in conn.execute(q.SQL_PNRS_IN_USE, (json.dumps(list(candidates)),))
+        }
+        for pnr, booking_id in candidates.items():
+            if pnr in in_use:
+                pending[booking_id] += 1
+            else:
+                pnrs[booking_id] = pnr
+                del pending[booking_id]
+    return pnrs
+
+
+def _create_bookings_locked(
+    conn: sqlite3.Connection,
+    requests: list[BookingRequest],
+    inventory: SeatInventory,
+    booked_at: str,
+    touched: set[int],
+) -> list[BookingResult]:
+    results: list[BookingResult] = []
+    accepted: list[tuple[BookingResult, BookingRequest, list]] = []
+    for request in requests:
+        try:
+            held = _hold_booking_seats(conn, inventory, request)
+        except ValueError as e:
+            results.append(BookingResult(None, None, error=str(e)))
+            continue
+        touched.update(item.instance_id for item, _, _ in held)
+        result = BookingResult(None, None)
+        results.append(result)
+        accepted.append((result, request, held))
+
+    if not accepted:
+        return results
+
+    # Only passengers of bookings that got their seats are added or updated.
+    passengers = {
+        (p.passport_no, p.nationality): p for _, r, _ in accepted for p in r.passengers
+    }
+    conn.executemany(
+        q.SQL_UPSERT_PASSENGER,
+        [
+            (p.passport_no, p.nationality, p.first_name, p.last_name, p.dob, p.email, p.phone)
+            for p in passengers.values()
+        ],
+    )
+
+    next_booking_id, next_item_id = conn.execute(q.SQL_NEXT_BOOKING_IDS).fetchone()
+    booking_ids = list(range(next_booking_id, next_booking_id + len(accepted)))
+    pnrs = _allocate_pnrs(conn, booking_ids)
+
+    booking_rows = []
+    item_rows = []
+    seat_rows = []
+    for booking_id, (result, request, held) in zip(booking_ids, accepted):
+        result.booking_id = booking_id
+        result.pnr = pnrs[booking_id]
+        booking_rows.append((booking_id, result.pnr, booked_at, request.status))
+        for item, seat_no, cabin in held:
+            row = (next_item_id, booking_id, item.instance_id, item.passport_no, item.nationality, seat_no, cabin)
+            item_rows.append(row)
+            seat_rows.append((item.instance_id, seat_no))
+            result.items.append((next_item_id, item.instance_id, item.passport_no, item.nationality, seat_no, cabin))
+            next_item_id += 1
+
+    conn.executemany(q.SQL_RELEASE_CANCELLED_SEAT, seat_rows)
+    conn.executemany(q.SQL_INSERT_BOOKING, booking_rows)
+    conn.executemany(q.SQL_INSERT_BOOKING_ITEM, item_rows)
+    return results
+
+
+# Create a batch of bookings in one write transaction: hold seats in the seat
+# inventory, upsert the passengers of the bookings that were seated, allocate
+# PNRs and bulk insert Booking and BookingItem rows. A booking that cannot be
+# seated comes back with an error and takes no seats; the rest of the batch
+# still goes through.
+#
+# When conn is not already in a transaction, this takes the database write
+# lock up front (BEGIN IMMEDIATE), so concurrent callers in other processes
+# see each other's seats through the inventory Version check.
+def create_bookings(
+    conn: sqlite3.Connection,
+    requests: list[BookingRequest],
+    inventory: SeatInventory | None = None,
+    booked_at: str | None = None,
+) -> list[BookingResult]:
+    inventory = inventory or _inventory
+    booked_at = booked_at or utc_now_text()
+    touched: set[int] = set()
+
+    with _write_lock:
+        try:
+            with audited_transaction(conn):
+                results = _create_bookings_locked(conn, requests, inventory, booked_at, touched)
+                for instance_id in touched:
+                    inventory.adopt_version(conn, instance_id)
+        except Exception:
+            for instance_id in touched:
+                inventory.invalidate(instance_id)
+            raise
+    return results
+
+
+def create_booking(
+    conn: sqlite3.Connection,
+    request: BookingRequest,
+    inventory: SeatInventory | None = None,
+) -> BookingResult:
+    result = create_bookings(conn, [request], inventory)[0]
+    if result.error:
+        raise ValueError(result.error)
+    return result
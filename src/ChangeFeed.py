@@ -0,0 +1,204 @@
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Iterator
+
+import Queries as q
+
+# Change-data-capture over AuditLog. Events come out in commit order by
+# AuditSeq.Seq; a consumer's position is a Seq stored in CdcCursor, so a
+# restarted consumer carries on from the last batch it finished.
+#
+#   python3 src/ChangeFeed.py tail --consumer warehouse --follow
+#   python3 src/ChangeFeed.py cursors
+#   python3 src/ChangeFeed.py truncate --retention-days 30
+
+FEED_BATCH_SIZE = 500
+FEED_POLL_SECONDS = 1.0
+DEFAULT_RETENTION_DAYS = 30
+
+
+class CursorExpired(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    seq: int
+    log_id: str
+    table: str
+    operation: str
+    record_id: str
+    old: dict | None
+    new: dict | None
+    changed_at: str
+    changed_by: str
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "ChangeEvent":
+        seq, log_id, table, operation, record_id, old, new, changed_at, changed_by = row
+        return cls(
+            seq,
+            log_id,
+            table,
+            operation,
+            record_id,
+            json.loads(old) if old else None,
+            json.loads(new) if new else None,
+            changed_at,
+            changed_by,
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+
+def truncated_through(conn: sqlite3.Connection) -> int:
+    row = conn.execute(q.SQL_FEED_TRUNCATED_THROUGH).fetchone()
+    return row[0] if row else 0
+
+
+def last_seq(conn: sqlite3.Connection) -> int:
+    return conn.execute(q.SQL_FEED_LAST_SEQ).fetchone()[0]
+
+
+# Events with Seq > after_seq, oldest first. Each batch is one range scan on
+# the AuditSeq primary key. on_batch(seq) runs once the caller has taken every
+# event of a batch. With follow=True, keeps polling for new events.
+def stream_changes(
+    conn: sqlite3.Connection,
+    after_seq: int = 0,
+    batch_size: int = FEED_BATCH_SIZE,
+    follow: bool = False,
+    poll_seconds: float = FEED_POLL_SECONDS,
+    on_batch=None,
+) -> Iterator[ChangeEvent]:
+    cutoff = truncated_through(conn)
+    if after_seq < cutoff:
+        raise CursorExpired(
+            f"Events up to Seq {cutoff} were truncated; cannot resume after Seq {after_seq}."
+        )
+    while True:
+        rows = conn.execute(q.SQL_FEED_EVENTS_AFTER, (after_seq, batch_size)).fetchall()
+        for row in rows:
+            event = ChangeEvent.from_row(row)
+            after_seq = event.seq
+            yield event
+        if rows and on_batch:
+            on_batch(after_seq)
+        if len(rows) < batch_size:
+            if not follow:
+                return
+            time.sleep(poll_seconds)
+
+
+def read_cursor(conn: sqlite3.Connection, consumer: str) -> int | None:
+    row = conn.execute(q.SQL_CDC_CURSOR, (consumer,)).fetchone()
+    return row[0] if row else None
+
+
+def save_cursor(conn: sqlite3.Connection, consumer: str, seq: int) -> None:
+    conn.execute(q.SQL_CDC_SAVE_CURSOR, (consumer, seq))
+    conn.commit()
+
+
+# Stream for a named consumer. The cursor is saved after each batch has been
+# taken, so a crash replays at most one batch (at-least-once delivery). A new
+# consumer starts at from_seq, or at the oldest event still in the feed.
+def consume(
+    conn: sqlite3.Connection,
+    consumer: str,
+    from_seq: int | None = None,
+    batch_size: int = FEED_BATCH_SIZE,
+    follow: bool = False,
+    poll_seconds: float = FEED_POLL_SECONDS,
+) -> Iterator[ChangeEvent]:
+    position = read_cursor(conn, consumer)
+    if position is None:
+        position = from_seq if from_seq is not None else truncated_through(conn)
+        save_cursor(conn, consumer, position)
+    elif from_seq is not None:
+        position = from_seq
+
+    yield from stream_changes(
+        conn,
+        position,
+        batch_size,
+        follow,
+        poll_seconds,
+        on_batch=lambda seq: save_cursor(conn, consumer, seq),
+    )
+
+
+# Drop feed entries older than the retention window. AuditLog itself is kept;
+# only the sequence index shrinks. Consumers still behind the new truncation
+# point get CursorExpired on their next read. Returns (entries removed,
+# consumers expired).
+def truncate_feed(conn: sqlite3.Connection, retention_days: int = DEFAULT_RETENTION_DAYS) -> tuple[int, list[str]]:
+    through = conn.execute(q.SQL_FEED_SEQ_OLDER_THAN, (f"-{retention_days} days",)).fetchone()[0]
+    if through <= truncated_through(conn):
+        return 0, []
+    removed = conn.execute(q.SQL_FEED_TRUNCATE, (through,)).rowcount
+    conn.execute(q.SQL_FEED_SET_TRUNCATED_THROUGH, (through,))
+    conn.commit()
+    expired = [
+        row[0] for row in conn.execute(q.SQL_CDC_CURSORS) if row[4] == "Expired"
+    ]
+    return removed, expired
+
+
+def main() -> None:
+    from App import get_conn
+    from UI import fetch_rows_with_headers, print_rows
+
+    parser = argparse.ArgumentParser(description="Change-data-capture feed over AuditLog")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    tail = sub.add_parser("tail", help="Write change events as NDJSON to stdout")
+    tail.add_argument("--consumer", help="Durable cursor name; omit for a one-off read")
+    tail.add_argument("--from-seq", type=int, help="Start after this Seq")
+    tail.add_argument("--follow", action="store_true", help="Keep polling for new events")
+    tail.add_argument("--batch-size", type=int, default=FEED_BATCH_SIZE)
+
+    sub.add_parser("cursors", help="Show consumer cursors and their lag")
+
+    trunc = sub.add_parser("truncate", help="Drop feed entries older than the retention window")
+    trunc.add_argument("--retention-days", type=int, default=DEFAULT_RETENTION_DAYS)
+
+    args = parser.parse_args()
+
+    with get_conn() as conn:
+        if args.command == "cursors":
+            headers, rows = fetch_rows_with_headers(conn, q.SQL_CDC_CURSORS)
+            print_rows(headers, rows)
+            print(f"Last Seq: {last_seq(conn)}   Truncated through: {truncated_through(conn)}")
+            return
+
+        if args.command == "truncate":
+            removed, expired = truncate_feed(conn, args.retention_days)
+            print(f"Removed {removed} feed entries.")
+            if expired:
+                print(f"Expired cursors: {', '.join(expired)}")
+            return
+
+        if args.consumer:
+            events = consume(conn, args.consumer, args.from_seq, args.batch_size, args.follow)
+        else:
+            events = stream_changes(conn, args.from_seq or truncated_through(conn), args.batch_size, args.follow)
+        try:
+            for event in events:
+                sys.stdout.write(event.to_json() + "\n")
+                if args.follow:
+                    sys.stdout.flush()
+        except CursorExpired as e:
+            print(f"Cursor expired: {e}", file=sys.stderr)
+            sys.exit(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
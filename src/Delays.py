@@ -0,0 +1,286 @@
+import heapq
+import json
+import sqlite3
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import Queries as q
+from LocalTime import UTC_FORMAT
+from Rotation import MAX_DATE, MIN_DATE, MIN_TURN_MINUTES
+
+# Delay propagation. Each tail's legs and each crew member's legs, in
+# scheduled departure order, form sequences; a leg cannot depart before the
+# previous leg of every sequence it is in has arrived plus the minimum turn
+# (aircraft) or connection (crew) time. Sequences follow scheduled order, so
+# the links form a DAG and (SchedDep, InstanceID) is a topological order.
+#
+# Projected times are kept for every leg. A change (a delay, new actual
+# times, a tail or crew swap) is pushed through a heap in that order from
+# the legs it touches, and stops wherever a leg's projection comes out
+# unchanged, so only the affected part of the network is recomputed.
+
+MIN_CONNECT_MINUTES = 45
+AIRCRAFT = "Aircraft"
+CREW = "Crew"
+SYNC_CHUNK_SIZE = 500
+
+
+@dataclass(slots=True)
+class DelayLeg:
+    instance_id: int
+    aircraft_id: int | None
+    sched_dep: int
+    sched_arr: int
+    actual_dep: int | None = None
+    actual_arr: int | None = None
+    staff_ids: tuple[int, ...] = ()
+
+    @property
+    def rank(self) -> tuple[int, int]:
+        return self.sched_dep, self.instance_id
+
+
+@dataclass(frozen=True)
+class AffectedLeg:
+    instance_id: int
+    projected_dep: str
+    projected_arr: str
+    delay_minutes: int
+    # The leg whose arrival holds this one back, and through which sequence.
+    cause_instance_id: int | None
+    cause: str | None
+
+
+def _utc(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(UTC_FORMAT)
+
+
+class DelayNetwork:
+    def __init__(
+        self,
+        legs: list[DelayLeg] = (),
+        min_turn_minutes: int = MIN_TURN_MINUTES,
+        min_connect_minutes: int = MIN_CONNECT_MINUTES,
+    ) -> None:
+        self.gaps = {AIRCRAFT: min_turn_minutes * 60, CREW: min_connect_minutes * 60}
+        self.legs: dict[int, DelayLeg] = {}
+        # (kind, AircraftID or StaffID) -> ranks in scheduled order.
+        self.sequences: dict[tuple[str, int], list[tuple[int, int]]] = {}
+        # Extra departure delay in seconds set with set_delay.
+        self.injected: dict[int, int] = {}
+        self.dep: dict[int, int] = {}
+        self.arr: dict[int, int] = {}
+        self.cause: dict[int, tuple[int, str] | None] = {}
+        # Last InstanceChange.ChangeSeq folded in by sync.
+        self.last_seq = 0
+        for leg in legs:
+            self._link(leg)
+        self._propagate(self.legs)
+
+    def __len__(self) -> int:
+        return len(self.legs)
+
+    @staticmethod
+    def _keys(leg: DelayLeg) -> list[tuple[str, int]]:
+        keys = [(CREW, staff_id) for staff_id in leg.staff_ids]
+        if leg.aircraft_id is not None:
+            keys.append((AIRCRAFT, leg.aircraft_id))
+        return keys
+
+    def _link(self, leg: DelayLeg) -> None:
+        self.legs[leg.instance_id] = leg
+        for key in self._keys(leg):
+            insort(self.sequences.setdefault(key, []), leg.rank)
+
+    def _unlink(self, leg: DelayLeg) -> None:
+        del self.legs[leg.instance_id]
+        for key in self._keys(leg):
+            sequence = self.sequences[key]
+            del sequence[bisect_left(sequence, leg.rank)]
+            if not sequence:
+                del self.sequences[key]
+
+    # (InstanceID, kind) of the leg just before (step -1) or after (step 1)
+    # this one in each of its sequences.
+    def _neighbours(self, leg: DelayLeg, step: int) -> list[tuple[int, str]]:
+        found = []
+        for key in self._keys(leg):
+            sequence = self.sequences[key]
+            i = bisect_left(sequence, leg.rank) + step
+            if 0 <= i < len(sequence):
+                found.append((sequence[i][1], key[0]))
+        return found
+
+    def predecessors(self, instance_id: int) -> list[tuple[int, str]]:
+        return self._neighbours(self.legs[instance_id], -1)
+
+    def successors(self, instance_id: int) -> list[tuple[int, str]]:
+        return self._neighbours(self.legs[instance_id], 1)
+
+    def _project(self, leg: DelayLeg) -> tuple[int, int, tuple[int, str] | None]:
+        cause = None
+        if leg.actual_dep is not None:
+            dep = leg.actual_dep
+        else:
+            dep = leg.sched_dep + self.injected.get(leg.instance_id, 0)
+            for previous, kind in self._neighbours(leg, -1):
+                ready = self.arr[previous] + self.gaps[kind]
+                if ready > dep:
+                    dep, cause = ready, (previous, kind)
+        if leg.actual_arr is not None:
+            return dep, leg.actual_arr, cause
+        return dep, dep + leg.sched_arr - leg.sched_dep, cause
+
+    # Recompute the seeds, then every successor of a leg whose projection
+    # changed, in topological order. Returns the changed legs in that order.
+    def _propagate(self, seeds) -> list[int]:
+        heap = [self.legs[i].rank for i in set(seeds) if i in self.legs]
+        heapq.heapify(heap)
+        queued = {rank[1] for rank in heap}
+        changed = []
+        while heap:
+            _, instance_id = heapq.heappop(heap)
+            queued.discard(instance_id)
+            leg = self.legs[instance_id]
+            dep, arr, cause = self._project(leg)
+            if instance_id in self.dep and (dep, arr, cause) == (
+                self.dep[instance_id], self.arr[instance_id], self.cause[instance_id]
+            ):
+                continue
+            self.dep[instance_id], self.arr[instance_id], self.cause[instance_id] = dep, arr, cause
+            changed.append(instance_id)
+            for after, _ in self._neighbours(leg, 1):
+                if after not in queued:
+                    queued.add(after)
+                    heapq.heappush(heap, self.legs[after].rank)
+        return changed
+
+    def delay_minutes(self, instance_id: int) -> int:
+        leg = self.legs[instance_id]
+        return (self.dep[instance_id] - leg.sched_dep) // 60
+
+    def affected(self, instance_ids: list[int]) -> list[AffectedLeg]:
+        result = []
+        for instance_id in instance_ids:
+            if instance_id not in self.legs:
+                continue
+            cause = self.cause[instance_id]
+            result.append(AffectedLeg(
+                instance_id,
+                _utc(self.dep[instance_id]),
+                _utc(self.arr[instance_id]),
+                self.delay_minutes(instance_id),
+                cause[0] if cause else None,
+                cause[1] if cause else None,
+            ))
+        return result
+
+    # Hold a leg's departure back by `minutes` past schedule (0 clears it)
+    # and return every leg whose projected times moved, the leg included.
+    def set_delay(self, instance_id: int, minutes: int) -> list[AffectedLeg]:
+        if instance_id not in self.legs:
+            raise KeyError(instance_id)
+        if minutes < 0:
+            raise ValueError("Delay cannot be negative.")
+        if minutes:
+            self.injected[instance_id] = minutes * 60
+        else:
+            self.injected.pop(instance_id, None)
+        return self.affected(self._propagate([instance_id]))
+
+    # The legs a delay would move, leaving the network as it was.
+    def what_if(self, instance_id: int, minutes: int) -> list[AffectedLeg]:
+        previous = self.injected.get(instance_id, 0) // 60
+        try:
+            return self.set_delay(instance_id, minutes)
+        finally:
+            self.set_delay(instance_id, previous)
+
+    # Replace legs with their current state, or drop them (None), e.g. after
+    # new actual times, a different tail or a crew change. Legs that lose or
+    # gain a predecessor are recomputed along with the changed legs.
+    def update(self, changes: dict[int, DelayLeg | None]) -> list[AffectedLeg]:
+        seeds = set()
+        for instance_id, leg in changes.items():
+            old = self.legs.get(instance_id)
+            if old is not None:
+                seeds.update(after for after, _ in self._neighbours(old, 1))
+                self._unlink(old)
+                for projection in (self.dep, self.arr, self.cause):
+                    projection.pop(instance_id, None)
+            if leg is None:
+                self.injected.pop(instance_id, None)
+                continue
+            self._link(leg)
+            seeds.add(instance_id)
+            seeds.update(after for after, _ in self._neighbours(leg, 1))
+        return self.affected(self._propagate(seeds))
+
+    # Fold in FlightInstance and crew changes made since the last sync.
+    def sync(self, conn: sqlite3.Connection, date_from: str = MIN_DATE, date_to: str = MAX_DATE) -> list[AffectedLeg]:
+        changes = conn.execute(q.SQL_CHANGES_SINCE, (self.last_seq,)).fetchall()
+        if not changes:
+            return []
+        self.last_seq = changes[-1][1]
+        changed_ids = list(dict.fromkeys(instance_id for instance_id, _ in changes))
+        fresh: dict[int, DelayLeg | None] = dict.fromkeys(changed_ids)
+        for start in range(0, len(changed_ids), SYNC_CHUNK_SIZE):
+            chunk = changed_ids[start:start + SYNC_CHUNK_SIZE]
+            fresh.update((leg.instance_id, leg) for leg in load_delay_legs(conn, date_from, date_to, chunk))
+        return self.update(fresh)
+
+
+def _instances_filter(instance_ids: list[int] | None) -> tuple[str, tuple]:
+    if instance_ids is None:
+        return "1 = 1", ()
+    return "fi.InstanceID IN (SELECT value FROM json_each(?))", (json.dumps(instance_ids),)
+
+
+def load_delay_legs(
+    conn: sqlite3.Connection,
+    date_from: str = MIN_DATE,
+    date_to: str = MAX_DATE,
+    instance_ids: list[int] | None = None,
+) -> list[DelayLeg]:
+    predicate, extra = _instances_filter(instance_ids)
+    params = (date_from, date_to) + extra
+    crew: dict[int, list[int]] = {}
+    for instance_id, staff_id in conn.execute(q.SQL_DELAY_CREW.format(instances=predicate), params):
+        crew.setdefault(instance_id, []).append(staff_id)
+    return [
+        DelayLeg(*row, staff_ids=tuple(crew.get(row[0], ())))
+        for row in conn.execute(q.SQL_DELAY_LEGS.format(instances=predicate), params)
+    ]
+
+
+def load_delay_network(
+    conn: sqlite3.Connection,
+    date_from: str = MIN_DATE,
+    date_to: str = MAX_DATE,
+    min_turn_minutes: int = MIN_TURN_MINUTES,
+    min_connect_minutes: int = MIN_CONNECT_MINUTES,
+) -> DelayNetwork:
+    # Taken first, so changes made while loading are picked up by sync.
+    last_seq = conn.execute(q.SQL_LAST_CHANGE_SEQ).fetchone()[0]
+    network = DelayNetwork(load_delay_legs(conn, date_from, date_to), min_turn_minutes, min_connect_minutes)
+    network.last_seq = last_seq
+    return network
+
+
+_network: DelayNetwork | None = None
+
+
+# The app's network over the main database: loaded on first use, then kept
+# current by sync. Returns it with the legs moved since the previous call.
+def current_network(conn: sqlite3.Connection) -> tuple[DelayNetwork, list[AffectedLeg]]:
+    global _network
+    if _network is None:
+        _network = load_delay_network(conn)
+        return _network, []
+    return _network, _network.sync(conn)
+
+
+def drop_network() -> None:
+    global _network
+    _network = None
@@ -0,0 +1,222 @@
+import argparse
+import csv
+import json
+import struct
+import time
+import zlib
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+
+import Queries as q
+from AllFilterSpecs import (
+    AIRPORT_FILTER_SPECS,
+    AUDIT_LOG_FILTER_SPECS,
+    FLIGHT_FILTER_SPECS,
+    PILOT_SCHEDULE_FILTER_SPECS,
+)
+from FilterSQL import parse_list_value
+from LocalTime import add_local_times, airport_zones
+from Reports import open_read_only
+from SeedDB import BASE_DIR
+from Snapshot import report_db_path
+
+# Streaming export of any listing query. Rows are pulled from the cursor
+# EXPORT_CHUNK_SIZE at a time with fetchmany and written straight out, so
+# memory stays flat however many rows there are. Exports read the same file
+# as reports (the snapshot when one is in use).
+#
+# Formats:
+#   csv       header row, then one line per row
+#   jsonl     one JSON object per row
+#   columnar  row groups stored column by column, each compressed; see
+#             COLUMNAR_MAGIC below and read_columnar
+#
+#   python3 src/Export.py flights --format csv --out Exports/flights.csv
+#   python3 src/Export.py audit --format columnar --filter op=UPDATE
+#   python3 src/Export.py flights --filter flight_no_list=@flight_numbers.txt
+
+EXPORT_DIR = BASE_DIR / "Exports"
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_FORMATS = {"csv": ".csv", "jsonl": ".jsonl", "columnar": ".fmcol"}
+
+# Columnar layout: MAGIC, then a length-prefixed JSON header
+# {"columns": [...]}, then one length-prefixed zlib block per row group
+# holding {"rows": n, "columns": [[column 0 values], ...]} as JSON, then a
+# zero length.
+COLUMNAR_MAGIC = b"FMCOL1\n"
+_LENGTH = struct.Struct("<I")
+
+# Listings the command line can export: (builder, filter specs, whether
+# the listing shows local times).
+LISTINGS = {
+    "flights": (q.build_flights_by_criteria, FLIGHT_FILTER_SPECS, True),
+    "pilots": (q.build_pilot_schedule, PILOT_SCHEDULE_FILTER_SPECS, True),
+    "airports": (q.build_airports, AIRPORT_FILTER_SPECS, False),
+    "audit": (q.build_audit_log, AUDIT_LOG_FILTER_SPECS, False),
+}
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    path: Path
+    rows: int
+    seconds: float
+
+
+class _CsvWriter:
+    def __init__(self, f, headers: list[str]) -> None:
+        self._writer = csv.writer(f)
+        self._writer.writerow(headers)
+
+    def write(self, rows: list[tuple]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        pass
+
+
+class _JsonlWriter:
+    def __init__(self, f, headers: list[str]) -> None:
+        self._f = f
+        self._headers = headers
+
+    def write(self, rows: list[tuple]) -> None:
+        headers = self._headers
+        self._f.write("".join(json.dumps(dict(zip(headers, row)), default=str) + "\n" for row in rows))
+
+    def close(self) -> None:
+        pass
+
+
+class _ColumnarWriter:
+    def __init__(self, f, headers: list[str]) -> None:
+        self._f = f
+        f.write(COLUMNAR_MAGIC)
+        self._block(json.dumps({"columns": headers}).encode("utf-8"))
+
+    def _block(self, data: bytes) -> None:
+        self._f.write(_LENGTH.pack(len(data)))
+        self._f.write(data)
+
+    def write(self, rows: list[tuple]) -> None:
+        group = {"rows": len(rows), "columns": [list(column) for column in zip(*rows)]}
+        self._block(zlib.compress(json.dumps(group, default=str, separators=(",", ":")).encode("utf-8"), 6))
+
+    def close(self) -> None:
+        self._f.write(_LENGTH.pack(0))
+
+
+_WRITERS = {"csv": _CsvWriter, "jsonl": _JsonlWriter, "columnar": _ColumnarWriter}
+
+
+def _open_output(path: Path, fmt: str):
+    if fmt == "columnar":
+        return path.open("wb")
+    return path.open("w", newline="" if fmt == "csv" else None, encoding="utf-8")
+
+
+# Run sql and stream its rows to path. render_rows, if given, reshapes each
+# chunk the way the listing shows it (e.g. adding local times); progress is
+# called with (rows so far, seconds so far) after every chunk. The file is
+# written under a temporary name and renamed when complete.
+def export_query(
+    sql: str,
+    params: tuple,
+    path: Path,
+    fmt: str = "csv",
+    db_path: Path | None = None,
+    render_rows=None,
+    progress=None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> ExportResult:
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}; choose from {', '.join(EXPORT_FORMATS)}.")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    building = path.with_name(path.name + ".tmp")
+    started = time.perf_counter()
+    written = 0
+    try:
+        with closing(open_read_only(db_path or report_db_path())) as conn, _open_output(building, fmt) as f:
+            cur = conn.execute(sql, params)
+            headers = [col[0] for col in cur.description]
+            writer = None
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                out_headers, out_rows = render_rows(headers, rows) if render_rows else (headers, rows)
+                if writer is None:
+                    writer = _WRITERS[fmt](f, out_headers)
+                if not rows:
+                    break
+                writer.write(out_rows)
+                written += len(rows)
+                if progress:
+                    progress(written, time.perf_counter() - started)
+            writer.close()
+    except BaseException:
+        building.unlink(missing_ok=True)
+        raise
+    building.replace(path)
+    return ExportResult(path, written, time.perf_counter() - started)
+
+
+# Read a columnar export back one row group at a time, as (headers, columns).
+def read_columnar(path: Path):
+    with path.open("rb") as f:
+        if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{path} is not a columnar export.")
+
+        def block() -> bytes:
+            (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+            return f.read(length)
+
+        headers = json.loads(block())["columns"]
+        while data := block():
+            yield headers, json.loads(zlib.decompress(data))["columns"]
+
+
+def default_export_path(name: str, fmt: str) -> Path:
+    slug = "".join(c if c.isalnum() else "_" for c in name.strip().lower()).strip("_") or "export"
+    return EXPORT_DIR / f"{slug}_{time.strftime('%Y%m%d_%H%M%S')}{EXPORT_FORMATS[fmt]}"
+
+
+def print_progress(rows: int, seconds: float) -> None:
+    print(f"\rExported {rows:,} rows ({rows / seconds if seconds else 0:,.0f}/s)", end="", flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream a listing to CSV, JSONL or columnar file")
+    parser.add_argument("listing", choices=list(LISTINGS))
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--out", type=Path)
+    parser.add_argument("--filter", action="append", default=[], metavar="KEY=VALUE", help="Listing filter (repeatable); list filters take comma-separated values or @file")
+    parser.add_argument("--db", type=Path, help="Database file (default: where reports read)")
+    args = parser.parse_args()
+
+    build_query, specs, local_times = LISTINGS[args.listing]
+    kinds = {spec.key: spec.ui_kind for spec in specs}
+    filters = {}
+    for item in args.filter:
+        key, sep, value = item.partition("=")
+        if not sep or key not in kinds:
+            parser.error(f"--filter expects KEY=VALUE with KEY one of {', '.join(kinds)}")
+        if kinds[key] in ("list", "int_list"):
+            filters[key] = parse_list_value(value, kinds[key])
+        else:
+            filters[key] = int(value) if kinds[key] == "int" else value
+
+    db_path = args.db or report_db_path()
+    render_rows = None
+    if local_times:
+        zones = airport_zones(lambda: open_read_only(db_path))
+        render_rows = lambda headers, rows: add_local_times(headers, rows, zones)
+    sql, params = build_query(filters)
+    result = export_query(
+        sql, params, args.out or default_export_path(args.listing, args.format), args.format,
+        db_path=db_path, render_rows=render_rows, progress=print_progress,
+    )
+    print(f"\nWrote {result.rows:,} rows to {result.path} in {result.seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
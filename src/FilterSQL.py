@@ -1,5 +1,39 @@
+import json
+import re
+from pathlib import Path
+
 from AllFilterSpecs import FilterSpec
 
+# Trigram search tables (SQL/02_Derived.sql) and the column holding each
+# row's source key.
+SEARCH_TABLE_KEYS = {
+    "AirlineSearch": "rowid",
+    "FlightSearch": "rowid",
+    "AuditSearch": "LogID",
+}
+
+# List filters ("in", "in_ci") up to this many values are bound one per
+# placeholder: SQLite compiles the IN list into a temporary b-tree once, uses
+# the column's index where it has one, and can push the test into grouped
+# views (View_FlightsDetailedWithPilots), which a subquery stops. Longer
+# lists go in as one JSON array read back with json_each, so a paste of any
+# size is a single bound value and never meets SQLite's limit on variables.
+IN_LIST_BIND_LIMIT = 20000
+
+LIST_SEPARATORS = re.compile(r"[\s,;]+")
+
+# Pasted text (or "@path" to a file) -> list of values, in order, without
+# repeats. int_list values must be whole numbers.
+
+def parse_list_value(raw: str, ui_kind: str = "list") -> list:
+    raw = raw.strip()
+    if raw.startswith("@"):
+        raw = Path(raw[1:]).expanduser().read_text(encoding="utf-8")
+    values = [v for v in LIST_SEPARATORS.split(raw) if v]
+    if ui_kind == "int_list":
+        values = [int(v) for v in values]
+    return list(dict.fromkeys(values))
+
 # Create a filters dict with all spec keys set to None.
 
 def init_filters(specs: list[FilterSpec]) -> dict:
@@ -9,7 +43,11 @@ def format_filters(filters: dict, specs: list[FilterSpec]) -> str:
     parts: list[str] = []
     for s in specs:
         v = filters.get(s.key)
-        if v not in (None, ""):
+        if isinstance(v, (list, tuple)):
+            if v:
+                shown = ", ".join(str(x) for x in v[:3])
+                parts.append(f"{s.label}=[{shown}{f' +{len(v) - 3} more' if len(v) > 3 else ''}]")
+        elif v not in (None, ""):
             parts.append(f"{s.label}={v}")
     return ", ".join(parts) if parts else "(none)"
 
@@ -54,6 +92,21 @@ def prompt_filter(
             print("Invalid value. Enter Yes or No. Use -q to cancel.")
             continue
 
+        if spec.ui_kind in ("list", "int_list"):
+            try:
+                values = parse_list_value(raw, spec.ui_kind)
+            except ValueError:
+                print("Invalid value. Enter whole numbers. Use -q to cancel.")
+                continue
+            except OSError as e:
+                print(f"Could not read {raw.strip()[1:]}: {e.strerror}. Use -q to cancel.")
+                continue
+            if not values:
+                print("Invalid value. Enter at least one value. Use -q to cancel.")
+                continue
+            filters[spec.key] = values
+            return
+
         # default: treat anything else as text
         filters[spec.key] = raw
         return
@@ -61,7 +114,7 @@ def prompt_filter(
 # Append WHERE clause + params for a single spec/value.
 
 def apply_sql_filter(sql: str, params: list, spec: FilterSpec, value) -> str:
-    if value in (None, "") or not spec.col:
+    if value is None or (not isinstance(value, (list, tuple, set)) and value == "") or not spec.col:
         return sql
 
     kind = spec.sql_kind
@@ -71,6 +124,26 @@ def apply_sql_filter(sql: str, params: list, spec: FilterSpec, value) -> str:
         params.append(f"%{value}%")
         return sql + f" AND {col} LIKE ?"
 
+    # col is "<SearchTable>.<Column>". LIKE on a trigram table matches what
+    # "like" would on the source column but is answered from the trigram
+    # index once the value has 3 characters.
+    if kind == "fts":
+        table, column = col.split(".", 1)
+        params.append(f"%{value}%")
+        return sql + (
+            f" AND {spec.fts_key} IN"
+            f" (SELECT {SEARCH_TABLE_KEYS[table]} FROM {table} WHERE {column} LIKE ?)"
+        )
+
+    # col holds an AirportID; value is an IATA or ICAO code. Each branch is
+    # an index lookup on Airport, and the IDs then probe col's index.
+    if kind == "airport_code":
+        params.extend((value, value))
+        return sql + (
+            f" AND {col} IN (SELECT AirportID FROM Airport WHERE IataCode = upper(?)"
+            f" UNION SELECT AirportID FROM Airport WHERE IcaoCode = upper(?))"
+        )
+
     if kind == "equal":
         params.append(value)
         return sql + f" AND {col} = ?"
@@ -79,6 +152,19 @@ def apply_sql_filter(sql: str, params: list, spec: FilterSpec, value) -> str:
         params.append(value)
         return sql + f" AND {col} = ? COLLATE NOCASE"
 
+    # value is a list (a single value is taken as a list of one); an empty
+    # list filters nothing, like a blank value.
+    if kind in ("in", "in_ci"):
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        if not values:
+            return sql
+        lhs = f"{col} COLLATE NOCASE" if kind == "in_ci" else col
+        if len(values) <= IN_LIST_BIND_LIMIT:
+            params.extend(values)
+            return sql + f" AND {lhs} IN ({', '.join('?' * len(values))})"
+        params.append(json.dumps(values))
+        return sql + f" AND {lhs} IN (SELECT value FROM json_each(?))"
+
     if kind == "presence":
         if value == "yes":
             return sql + f" AND {col} IS NOT NULL AND trim({col}) <> ''"
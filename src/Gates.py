@@ -0,0 +1,227 @@
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+import Queries as q
+from LocalTime import UTC_FORMAT
+from Timeline import IntervalTimeline
+from Transactions import audited_transaction
+
+# Departure gates per airport and UTC day. A flight holds its gate from
+# before_minutes ahead of scheduled departure until after_minutes past its
+# actual (or scheduled, if later) off-block time, and a gate needs gap_minutes
+# clear between two flights. find_conflicts sorts each gate's uses and sweeps
+# them once keeping the latest release seen so far. allocate_gates gives the
+# flights without a gate, and the later flight of each clash, the free gate
+# that has been idle the shortest (best fit), preferring the flight's own
+# terminal.
+
+@dataclass(frozen=True)
+class GateBuffers:
+    before_minutes: int = 40
+    after_minutes: int = 10
+    gap_minutes: int = 5
+
+
+@dataclass(slots=True)
+class GateUse:
+    instance_id: int
+    flight_no: str
+    # As stored; key is the normalised (terminal, gate) used for matching.
+    terminal: str | None
+    gate: str | None
+    start: int
+    end: int
+    # False for flights just outside the day, loaded only as context.
+    in_day: bool = True
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return normalise_gate(self.terminal, self.gate)
+
+
+@dataclass(frozen=True)
+class GateConflict:
+    terminal: str
+    gate: str
+    instance_id: int
+    other_instance_id: int
+    overlap_minutes: int
+
+
+@dataclass(frozen=True)
+class GateAssignment:
+    instance_id: int
+    flight_no: str
+    from_terminal: str | None
+    from_gate: str | None
+    # None when no gate is free for the whole occupancy.
+    to_terminal: str | None
+    to_gate: str | None
+    reason: str
+
+
+@dataclass
+class GateDayPlan:
+    airport_id: int
+    day: str
+    uses: list[GateUse] = field(default_factory=list)
+    conflicts: list[GateConflict] = field(default_factory=list)
+    assignments: list[GateAssignment] = field(default_factory=list)
+
+    @property
+    def unresolved(self) -> list[GateAssignment]:
+        return [a for a in self.assignments if a.to_gate is None]
+
+
+def normalise_gate(terminal: str | None, gate: str | None) -> tuple[str, str]:
+    return (terminal or "").strip().upper(), (gate or "").strip().upper()
+
+
+def load_gate_day(
+    conn: sqlite3.Connection,
+    airport_id: int,
+    day: str,
+    buffers: GateBuffers = GateBuffers(),
+) -> list[GateUse]:
+    first = datetime.combine(date.fromisoformat(day), datetime.min.time())
+    last = first + timedelta(days=1)
+    # Flights either side of the day can still hold a gate inside it.
+    margin = timedelta(minutes=buffers.before_minutes + buffers.after_minutes + buffers.gap_minutes)
+    lower, upper = first - margin, last + margin
+    params = (
+        airport_id,
+        (first - timedelta(days=1)).date().isoformat(),
+        (last + timedelta(days=1)).date().isoformat(),
+        lower.strftime(UTC_FORMAT),
+        upper.strftime(UTC_FORMAT),
+    )
+    before, after = buffers.before_minutes * 60, buffers.after_minutes * 60
+    day_from, day_to = _epoch(first), _epoch(last)
+    return [
+        GateUse(instance_id, flight_no, terminal, gate, dep - before, off_block + after, day_from <= dep < day_to)
+        for instance_id, flight_no, terminal, gate, dep, off_block in conn.execute(q.SQL_GATE_DEPARTURES, params)
+    ]
+
+
+def _epoch(moment: datetime) -> int:
+    return int((moment - datetime(1970, 1, 1)).total_seconds())
+
+
+def by_gate(uses: list[GateUse]) -> dict[tuple[str, str], list[GateUse]]:
+    gates: dict[tuple[str, str], list[GateUse]] = {}
+    for use in uses:
+        if use.key[1]:
+            gates.setdefault(use.key, []).append(use)
+    for gate_uses in gates.values():
+        gate_uses.sort(key=lambda use: (use.start, use.instance_id))
+    return gates
+
+
+def find_conflicts(uses: list[GateUse], buffers: GateBuffers = GateBuffers()) -> list[GateConflict]:
+    gap = buffers.gap_minutes * 60
+    conflicts = []
+    for (terminal, gate), gate_uses in by_gate(uses).items():
+        latest: GateUse | None = None
+        for use in gate_uses:
+            if latest is not None and use.start < latest.end + gap and (use.in_day or latest.in_day):
+                overlap = latest.end + gap - use.start
+                conflicts.append(GateConflict(terminal, gate, use.instance_id, latest.instance_id, -(-overlap // 60)))
+                # The later flight is the one to move, so it does not hold the gate.
+                continue
+            if latest is None or use.end > latest.end:
+                latest = use
+    return conflicts
+
+
+# Gates known for the airport plus any the day's flights use.
+def gate_inventory(conn: sqlite3.Connection, airport_id: int, uses: list[GateUse] = ()) -> list[tuple[str, str]]:
+    gates = {normalise_gate(*row) for row in conn.execute(q.SQL_AIRPORT_GATES, (airport_id,))}
+    gates.update(use.key for use in uses)
+    return sorted(gate for gate in gates if gate[1])
+
+
+# One gate's uses, searchable by start time.
+class _GateTimeline(IntervalTimeline):
+    __slots__ = ("key",)
+
+    def __init__(self, key: tuple[str, str], uses: list[GateUse]) -> None:
+        super().__init__([(use.start, use.end, use) for use in uses])
+        self.key = key
+
+
+# Plan gates for the day's flights that have none or clash with an earlier
+# flight at their gate; everything else stays where it is. Flights are taken
+# in start order. A flight with a terminal only looks at that terminal's
+# gates; one without looks everywhere.
+def allocate_gates(
+    uses: list[GateUse],
+    inventory: list[tuple[str, str]],
+    buffers: GateBuffers = GateBuffers(),
+    conflicts: list[GateConflict] | None = None,
+) -> list[GateAssignment]:
+    gap = buffers.gap_minutes * 60
+    if conflicts is None:
+        conflicts = find_conflicts(uses, buffers)
+    in_day = {use.instance_id for use in uses if use.in_day}
+    reasons = {c.instance_id: "Conflict" for c in conflicts if c.instance_id in in_day}
+    for use in uses:
+        if use.in_day and not use.key[1]:
+            reasons[use.instance_id] = "No gate"
+
+    fixed = by_gate([use for use in uses if use.instance_id not in reasons])
+    timelines = {key: _GateTimeline(key, fixed.get(key, [])) for key in inventory}
+    for key, gate_uses in fixed.items():
+        timelines.setdefault(key, _GateTimeline(key, gate_uses))
+    by_terminal: dict[str, list[_GateTimeline]] = {}
+    for key in sorted(timelines):
+        by_terminal.setdefault(key[0], []).append(timelines[key])
+    everywhere = [timelines[key] for key in sorted(timelines)]
+
+    to_place = sorted(
+        (use for use in uses if use.instance_id in reasons),
+        key=lambda use: (use.start, use.instance_id),
+    )
+    assignments = []
+    for use in to_place:
+        terminal = use.key[0]
+        candidates = by_terminal.get(terminal, []) if terminal else everywhere
+        best: _GateTimeline | None = None
+        best_idle = float("inf")
+        for timeline in candidates:
+            idle = timeline.fit(use.start, use.end, gap)
+            if idle is not None and (best is None or idle < best_idle):
+                best, best_idle = timeline, idle
+        reason = reasons[use.instance_id]
+        if best is None:
+            assignments.append(GateAssignment(use.instance_id, use.flight_no, use.terminal, use.gate, None, None, reason))
+            continue
+        best.insert(use.start, use.end, use)
+        assignments.append(GateAssignment(use.instance_id, use.flight_no, use.terminal, use.gate, *best.key, reason))
+    return assignments
+
+
+def plan_gate_day(
+    conn: sqlite3.Connection,
+    airport_id: int,
+    day: str,
+    buffers: GateBuffers = GateBuffers(),
+) -> GateDayPlan:
+    uses = load_gate_day(conn, airport_id, day, buffers)
+    conflicts = find_conflicts(uses, buffers)
+    inventory = gate_inventory(conn, airport_id, uses)
+    return GateDayPlan(airport_id, day, uses, conflicts, allocate_gates(uses, inventory, buffers, conflicts))
+
+
+# Write the resolved assignments in one transaction. A flight whose gate changed since the plan was
+# made is left alone. Returns the number of flights updated.
+def apply_gate_assignments(conn: sqlite3.Connection, plan: GateDayPlan) -> int:
+    rows = [
+        (a.to_terminal or None, a.to_gate, a.instance_id, a.from_terminal, a.from_gate)
+        for a in plan.assignments
+        if a.to_gate is not None
+    ]
+    if not rows:
+        return 0
+    with audited_transaction(conn):
+        return conn.executemany(q.SQL_SET_INSTANCE_GATE, rows).rowcount
@@ -0,0 +1,273 @@
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from operator import itemgetter
+
+import Queries as q
+
+# Airport local time from the OpenFlights columns: Timezone is the standard
+# offset from UTC in hours (may be fractional) and Dst is the daylight-saving
+# region code. Transitions follow each region's usual rule; for E (Europe)
+# that is 01:00 UTC, for the others the local standard times in
+# DST_SWITCH_HOURS. U (unknown) and N (none) never shift. check_zoneinfo
+# compares each rule with the IANA zones in ZONEINFO_SAMPLES.
+
+SUNDAY = 6
+# The text form of every UTC column (SchedDepUtc, ActualArrUtc, ...).
+UTC_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _nth_sunday(year: int, month: int, n: int) -> date:
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(SUNDAY - first.weekday()) % 7 + 7 * (n - 1))
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - SUNDAY) % 7)
+
+
+# Dst code -> (start month, nth Sunday, end month, nth Sunday); n = -1 is the
+# last Sunday. When start is later in the year than end, DST spans New Year
+# (southern hemisphere).
+DST_RULES = {
+    "E": (3, -1, 10, -1),
+    "A": (3, 2, 11, 1),
+    "S": (9, 1, 4, 1),
+    "O": (10, 1, 4, 1),
+    "Z": (9, -1, 4, 1),
+}
+
+# Dst code -> (start, end) switch as hours of local standard time on the
+# rule's Sunday. North America ends at 02:00 daylight = 01:00 standard;
+# South America (Chile) switches at midnight, so it ends at 00:00 daylight =
+# 23:00 standard the evening before.
+DST_SWITCH_HOURS = {
+    "A": (2, 1),
+    "S": (0, -1),
+    "O": (2, 2),
+    "Z": (2, 2),
+}
+
+
+@dataclass(frozen=True)
+class Zone:
+    standard_hours: float = 0.0
+    dst: str = "N"
+
+    @property
+    def standard(self) -> timedelta:
+        return timedelta(hours=self.standard_hours)
+
+
+UTC_ZONE = Zone()
+
+
+def parse_zone(timezone: str | float | None, dst: str | None) -> Zone:
+    try:
+        hours = float(timezone)
+    except (TypeError, ValueError):
+        hours = 0.0
+    return Zone(hours, (dst or "N").upper())
+
+
+# DST start and end of one year, as naive UTC datetimes.
+@lru_cache(maxsize=None)
+def dst_window(zone: Zone, year: int) -> tuple[datetime, datetime] | None:
+    rule = DST_RULES.get(zone.dst)
+    if rule is None:
+        return None
+    start_month, start_n, end_month, end_n = rule
+    start = datetime.combine(_nth_sunday(year, start_month, start_n), datetime.min.time())
+    end = datetime.combine(_nth_sunday(year, end_month, end_n), datetime.min.time())
+    if zone.dst == "E":
+        return start + timedelta(hours=1), end + timedelta(hours=1)
+    start_hour, end_hour = DST_SWITCH_HOURS[zone.dst]
+    return start + timedelta(hours=start_hour) - zone.standard, end + timedelta(hours=end_hour) - zone.standard
+
+
+def is_dst(zone: Zone, utc: datetime) -> bool:
+    window = dst_window(zone, utc.year)
+    if window is None:
+        return False
+    start, end = window
+    if start <= end:
+        return start <= utc < end
+    return utc >= start or utc < end
+
+
+def utc_offset(zone: Zone, utc: datetime) -> timedelta:
+    return zone.standard + (timedelta(hours=1) if is_dst(zone, utc) else timedelta(0))
+
+
+def utc_to_local(zone: Zone, utc: datetime) -> datetime:
+    return utc + utc_offset(zone, utc)
+
+
+# Local wall-clock time to UTC. In the spring-forward gap the time is read
+# as standard time; in the autumn overlap the daylight reading wins.
+def local_to_utc(zone: Zone, local: datetime) -> datetime:
+    daylight = local - zone.standard - timedelta(hours=1)
+    if is_dst(zone, daylight):
+        return daylight
+    return local - zone.standard
+
+
+def airport_zone(conn: sqlite3.Connection, airport_id: int) -> Zone:
+    row = conn.execute(q.SQL_AIRPORT_ZONE, (airport_id,)).fetchone()
+    return parse_zone(*row) if row else UTC_ZONE
+
+
+# Dst code -> (IANA zone, standard hours) that follow the code's rule, for
+# check_zoneinfo. Chile starts and ends on the first Sunday on or after the
+# 2nd, so Santiago is a week off in years where the month starts on a Sunday.
+ZONEINFO_SAMPLES = {
+    "E": (("Europe/London", 0), ("Europe/Paris", 1), ("Europe/Athens", 2)),
+    "A": (("America/New_York", -5), ("America/Denver", -7), ("America/Los_Angeles", -8)),
+    "S": (("America/Santiago", -4),),
+    "O": (("Australia/Sydney", 10), ("Australia/Adelaide", 9.5)),
+    "Z": (("Pacific/Auckland", 12),),
+}
+CHECK_STEP = timedelta(minutes=30)
+
+
+# Step through each year and compare utc_to_local with zoneinfo for every
+# sample zone. Returns (code, IANA zone, first UTC time that differs, count).
+def check_zoneinfo(years: range) -> list[tuple[str, str, datetime, int]]:
+    from zoneinfo import ZoneInfo
+
+    mismatches = []
+    for code, samples in ZONEINFO_SAMPLES.items():
+        for name, hours in samples:
+            zone, tz = Zone(hours, code), ZoneInfo(name)
+            first, count = None, 0
+            utc = datetime(years.start, 1, 1)
+            while utc.year < years.stop:
+                expected = utc.replace(tzinfo=timezone.utc).astimezone(tz).replace(tzinfo=None)
+                if utc_to_local(zone, utc) != expected:
+                    first = first or utc
+                    count += 1
+                utc += CHECK_STEP
+            if count:
+                mismatches.append((code, name, first, count))
+    return mismatches
+
+
+# Rendering
+# ---------
+# Listings carry raw UTC times and airport IDs in hidden columns (a leading
+# underscore); add_local_times turns them into compact local columns for the
+# whole page in one pass. Zones are loaded once per session and each zone's
+# DST window once per year, as text in the same format as the UTC columns, so
+# each row costs a string comparison and one addition.
+
+# (shown header, hidden UTC column, hidden AirportID column)
+LOCAL_COLUMNS = (("DepLocal", "_DepUtc", "_OriginID"), ("ArrLocal", "_ArrUtc", "_DestID"))
+
+_zones: dict[int, Zone] | None = None
+
+
+# AirportID -> Zone for every airport with a usable Timezone. `connect` opens
+# a new connection, closed here; it is only called when the cache is empty.
+def airport_zones(connect) -> dict[int, Zone]:
+    global _zones
+    if _zones is None:
+        zones = {}
+        with closing(connect()) as conn:
+            for airport_id, timezone, dst in conn.execute(q.SQL_AIRPORT_ZONES):
+                try:
+                    float(timezone)
+                except (TypeError, ValueError):
+                    continue
+                zones[airport_id] = parse_zone(timezone, dst)
+        _zones = zones
+    return _zones
+
+
+def drop_zones() -> None:
+    global _zones
+    _zones = None
+
+
+# (standard offset, daylight offset, DST start, DST end) for one year, with
+# the window as UTC text; start and end are None where the zone never shifts.
+@lru_cache(maxsize=None)
+def _year_offsets(zone: Zone, year: int) -> tuple[timedelta, timedelta, str | None, str | None]:
+    window = dst_window(zone, year)
+    daylight = zone.standard + timedelta(hours=1)
+    if window is None:
+        return zone.standard, daylight, None, None
+    return zone.standard, daylight, window[0].strftime(UTC_FORMAT), window[1].strftime(UTC_FORMAT)
+
+
+# "HH:MM", with " +1" / " -1" when the local date is not the FlightDate.
+def _local_text(utc_text: str, zone: Zone, flight_day: date) -> str:
+    standard, daylight, start, end = _year_offsets(zone, int(utc_text[:4]))
+    offset = standard
+    if start is not None:
+        if start <= end:
+            in_dst = start <= utc_text < end
+        else:
+            in_dst = utc_text >= start or utc_text < end
+        if in_dst:
+            offset = daylight
+    local = datetime.fromisoformat(utc_text) + offset
+    days = (local.date() - flight_day).days
+    return f"{local.hour:02d}:{local.minute:02d}" + (f" {days:+d}" if days else "")
+
+
+# Drop the hidden columns and add DepLocal/ArrLocal after ArrUTC (or at the
+# end). Rows without the hidden columns come back unchanged.
+def add_local_times(headers: list[str], rows: list[tuple], zones: dict[int, Zone]) -> tuple[list[str], list[tuple]]:
+    col = {h: i for i, h in enumerate(headers)}
+    if any(utc not in col or airport not in col for _, utc, airport in LOCAL_COLUMNS):
+        return headers, rows
+    visible = [i for i, h in enumerate(headers) if not h.startswith("_")]
+    at = visible.index(col["ArrUTC"]) + 1 if "ArrUTC" in col else len(visible)
+    shown = [headers[i] for i in visible]
+    shown[at:at] = [name for name, _, _ in LOCAL_COLUMNS]
+
+    pick = itemgetter(*visible)
+    sources = [(col[utc], col[airport]) for _, utc, airport in LOCAL_COLUMNS]
+    date_col = col.get("Date")
+    days: dict[str, date] = {}
+    out = []
+    for row in rows:
+        kept = list(pick(row)) if len(visible) > 1 else [pick(row)]
+        flight_date = row[date_col] if date_col is not None else None
+        local = []
+        for utc_col, airport_col in sources:
+            utc_text = row[utc_col]
+            zone = zones.get(row[airport_col])
+            if utc_text is None or zone is None:
+                local.append(None)
+                continue
+            key = flight_date or utc_text[:10]
+            flight_day = days.get(key)
+            if flight_day is None:
+                flight_day = days[key] = date.fromisoformat(key)
+            local.append(_local_text(utc_text, zone, flight_day))
+        kept[at:at] = local
+        out.append(tuple(kept))
+    return shown, out
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check the Dst rules against zoneinfo")
+    parser.add_argument("--first-year", type=int, default=date.today().year)
+    parser.add_argument("--years", type=int, default=2)
+    args = parser.parse_args()
+
+    years = range(args.first_year, args.first_year + args.years)
+    mismatches = check_zoneinfo(years)
+    for code, name, first, count in mismatches:
+        print(f"{code} {name}: {count} time(s) differ, first at {first:%Y-%m-%d %H:%M} UTC")
+    checked = sum(len(samples) for samples in ZONEINFO_SAMPLES.values())
+    print(f"{checked - len(mismatches)}/{checked} zones match zoneinfo for {years.start}-{years.stop - 1}.")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import atexit
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+from SeedDB import DB_PATH
+
+# In-memory run mode (python3 src/App.py --memory). The database is loaded
+# once into a named shared-cache memory database; get_conn() then opens
+# connections to that instead of the file, and the memory copy is written
+# back to the file with the backup API every flush_every seconds, before
+# anything that reads the file directly, and at exit.
+#
+# Crash safety, explicitly:
+# - Only flushed state survives. Work since the last flush is lost if the
+#   process crashes or is killed (atexit does not run on SIGKILL, a segfault
+#   or os._exit).
+# - A flush copies the whole database in one backup step inside a single
+#   transaction on the file, under SQLite's rollback journal, so a crash
+#   during a flush leaves the file as of the previous flush.
+# - Flushes are checked between menu actions, never from another thread:
+#   shared-cache connections fail with "database table is locked" rather
+#   than wait, so a background flush could break a write in progress. A
+#   change is on disk at most flush_every seconds after the action that made
+#   it finishes.
+# - Other processes (report workers, Snapshot) read the file, so they see the
+#   last flush; report routing flushes first (readable_path).
+# - With persist=False (--no-flush; demos, CI replays) the database file is
+#   never written: flushes do nothing, reports and exports read a scratch
+#   copy of memory next to it, and archiving and reset, which work on the
+#   file itself, are refused.
+
+MEMORY_URI = "file:FlightManagementMemory?mode=memory&cache=shared"
+# Suffix of the scratch copy read by reports when persist=False; it sits next
+# to the file so archived partitions are still found.
+SCRATCH_SUFFIX = ".memory.db"
+DEFAULT_FLUSH_SECONDS = 60.0
+
+
+class MemoryDatabase:
+    def __init__(
+        self,
+        db_path: Path = DB_PATH,
+        source: Path | None = None,
+        flush_every: float | None = DEFAULT_FLUSH_SECONDS,
+        persist: bool = True,
+        uri: str = MEMORY_URI,
+    ) -> None:
+        self.db_path = db_path
+        self.flush_every = flush_every
+        self.persist = persist
+        self.uri = uri
+        # Keeps the shared memory database alive while other connections
+        # come and go.
+        self._anchor = sqlite3.connect(uri, uri=True)
+        self.flushes = 0
+        self.flush_seconds = 0.0
+        self.load(source or db_path)
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.uri, uri=True)
+        conn.execute("PRAGMA foreign_keys = ON;")
+        return conn
+
+    # Replace the memory copy with the contents of a database file.
+    def load(self, path: Path) -> None:
+        with closing(sqlite3.connect(path.resolve().as_uri() + "?mode=ro", uri=True)) as source:
+            source.backup(self._anchor)
+        self.loaded_from = path
+        self.last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        if not self.persist:
+            return
+        started = time.perf_counter()
+        with closing(sqlite3.connect(self.db_path, timeout=60)) as target:
+            self._anchor.backup(target)
+        self.last_flush = time.monotonic()
+        self.flushes += 1
+        self.flush_seconds += time.perf_counter() - started
+
+    @property
+    def scratch_path(self) -> Path:
+        return self.db_path.with_name(self.db_path.stem + SCRATCH_SUFFIX)
+
+    # A file holding the memory copy as it is now, for readers in other
+    # connections or processes: the database file after a flush, or with
+    # persist=False a scratch copy that leaves the file alone.
+    def readable_path(self) -> Path:
+        if self.persist:
+            self.flush()
+            return self.db_path
+        with closing(sqlite3.connect(self.scratch_path, timeout=60)) as target:
+            self._anchor.backup(target)
+        return self.scratch_path
+
+    def flush_if_due(self) -> bool:
+        if not self.persist or not self.flush_every or time.monotonic() - self.last_flush < self.flush_every:
+            return False
+        self.flush()
+        return True
+
+    def close(self) -> None:
+        self._anchor.close()
+        self.scratch_path.unlink(missing_ok=True)
+
+
+_memory: MemoryDatabase | None = None
+
+
+def start(
+    db_path: Path = DB_PATH,
+    source: Path | None = None,
+    flush_every: float | None = DEFAULT_FLUSH_SECONDS,
+    persist: bool = True,
+) -> MemoryDatabase:
+    global _memory
+    if _memory is not None:
+        stop()
+    _memory = MemoryDatabase(db_path, source, flush_every, persist)
+    atexit.register(stop)
+    return _memory
+
+
+# Flush (unless told not to) and drop the memory copy; get_conn goes back
+# to the file.
+def stop(flush: bool = True) -> None:
+    global _memory
+    if _memory is None:
+        return
+    memory, _memory = _memory, None
+    atexit.unregister(stop)
+    try:
+        if flush:
+            memory.flush()
+    finally:
+        memory.close()
+
+
+def active() -> MemoryDatabase | None:
+    return _memory
+
+
+def flush() -> None:
+    if _memory is not None:
+        _memory.flush()
+
+
+def flush_if_due() -> None:
+    if _memory is not None:
+        _memory.flush_if_due()
+
+
+def readable_path(db_path: Path = DB_PATH) -> Path:
+    if _memory is None:
+        return db_path
+    return _memory.readable_path()
+
+
+# False under --no-flush, where work that rewrites the file must not run.
+def writes_to_disk() -> bool:
+    return _memory is None or _memory.persist
+
+
+# For work done on the file itself (archiving, reset): flush the memory copy
+# first, then load the file back once it is done. Refused with persist=False,
+# since the file would be written and the reload would drop every change
+# made in memory.
+@contextmanager
+def on_disk(flush_first: bool = True):
+    if _memory is None:
+        yield
+        return
+    if not _memory.persist:
+        raise RuntimeError("Not available with --no-flush: it would write the database file.")
+    if flush_first:
+        _memory.flush()
+    yield
+    _memory.load(_memory.db_path)
@@ -0,0 +1,296 @@
+import sqlite3
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import Queries as q
+from Timeline import IntervalTimeline
+from Transactions import audited_transaction
+
+# Pilot pairings: a pairing is a run of duties that leaves a pilot's base
+# and comes back to it, with legal connections inside a duty and legal rest
+# between duties. Pairings are built greedily, earliest open leg first: from
+# a leg leaving a base, keep taking the earliest open leg out of wherever the
+# pilot is, and cut the chain back to the last time it reached base. Each
+# pairing is then given to the least-used pilot at that base whose existing
+# legs leave rest either side. Captain and First Officer seats are covered
+# separately; a leg missing both gets the same pairing twice, so the two
+# pilots fly together.
+
+CAPTAIN = "Captain"
+FIRST_OFFICER = "First Officer"
+PILOT_ROLES = (CAPTAIN, FIRST_OFFICER)
+AUDIT_USER = "PAIRING"
+
+
+@dataclass(frozen=True)
+class PairingRules:
+    min_connect_minutes: int = 45
+    min_rest_hours: int = 10
+    max_duty_hours: int = 13
+    max_legs_per_duty: int = 6
+    max_days: int = 4
+    # Duty starts this long before the first departure and ends this long
+    # after the last arrival.
+    report_minutes: int = 60
+    release_minutes: int = 30
+
+
+@dataclass(slots=True)
+class PairingLeg:
+    instance_id: int
+    dep: int
+    arr: int
+    origin: int
+    dest: int
+    has_captain: bool = False
+    has_first_officer: bool = False
+
+    def needs(self, role: str) -> bool:
+        return not (self.has_captain if role == CAPTAIN else self.has_first_officer)
+
+
+@dataclass
+class Pairing:
+    base_airport_id: int
+    duties: list[list[PairingLeg]]
+
+    @property
+    def legs(self) -> list[PairingLeg]:
+        return [leg for duty in self.duties for leg in duty]
+
+    @property
+    def start(self) -> int:
+        return self.duties[0][0].dep
+
+    @property
+    def end(self) -> int:
+        return self.duties[-1][-1].arr
+
+
+@dataclass(frozen=True)
+class PairingAssignment:
+    role: str
+    staff_id: int | None
+    pairing: Pairing
+
+
+@dataclass
+class CrewPlan:
+    assignments: list[PairingAssignment] = field(default_factory=list)
+    # Role -> legs that still lack that role (no pairing, or no free pilot).
+    uncovered: dict[str, list[int]] = field(default_factory=dict)
+
+    @property
+    def staffed(self) -> list[PairingAssignment]:
+        return [a for a in self.assignments if a.staff_id is not None]
+
+    def rows(self) -> list[tuple[int, int, str]]:
+        return [
+            (leg.instance_id, a.staff_id, a.role)
+            for a in self.staffed
+            for leg in a.pairing.legs
+        ]
+
+
+class _OpenLegs:
+    __slots__ = ("by_origin", "deps", "covered")
+
+    def __init__(self, legs: list[PairingLeg]) -> None:
+        self.by_origin: dict[int, list[PairingLeg]] = {}
+        for leg in sorted(legs, key=lambda leg: (leg.dep, leg.instance_id)):
+            self.by_origin.setdefault(leg.origin, []).append(leg)
+        self.deps = {origin: [leg.dep for leg in out] for origin, out in self.by_origin.items()}
+        self.covered: set[int] = set()
+
+    # Earliest open leg out of `airport` departing in [earliest, latest]
+    # that `accept` allows.
+    def next_leg(self, airport: int, earliest: int, latest: int, used: set[int], accept) -> PairingLeg | None:
+        out = self.by_origin.get(airport)
+        if not out:
+            return None
+        for i in range(bisect_left(self.deps[airport], earliest), len(out)):
+            leg = out[i]
+            if leg.dep > latest:
+                return None
+            if leg.instance_id in self.covered or leg.instance_id in used:
+                continue
+            if accept(leg):
+                return leg
+        return None
+
+
+def _build_from(first: PairingLeg, open_legs: _OpenLegs, rules: PairingRules) -> Pairing | None:
+    base = first.origin
+    connect = rules.min_connect_minutes * 60
+    rest = rules.min_rest_hours * 3600
+    report, release = rules.report_minutes * 60, rules.release_minutes * 60
+    max_duty = rules.max_duty_hours * 3600
+    last_day = first.dep - report + rules.max_days * 86400
+
+    duties = [[first]]
+    used = {first.instance_id}
+    # (duties, legs in last duty) the last time the chain reached base.
+    closed = (1, 1) if first.dest == base else None
+    current = first
+    while True:
+        duty = duties[-1]
+        duty_start = duty[0].dep - report
+        following = None
+        if len(duty) < rules.max_legs_per_duty:
+            def fits(leg: PairingLeg) -> bool:
+                return leg.arr + release - duty_start <= max_duty and leg.arr + release <= last_day
+
+            # Within a duty, take a leg only if the pilot can still get home
+            # the same duty (straight back if it goes out). Away from base,
+            # fall back to any leg that fits.
+            def homeward(leg: PairingLeg) -> bool:
+                if not fits(leg):
+                    return False
+                if leg.dest == base:
+                    return True
+                return len(duty) + 1 < rules.max_legs_per_duty and open_legs.next_leg(
+                    leg.dest, leg.arr + connect, duty_start + max_duty, used,
+                    lambda back: back.dest == base and fits(back),
+                ) is not None
+
+            following = open_legs.next_leg(current.dest, current.arr + connect, duty_start + max_duty, used, homeward)
+            if following is None and current.dest != base:
+                following = open_legs.next_leg(current.dest, current.arr + connect, duty_start + max_duty, used, fits)
+        if following is not None:
+            duty.append(following)
+        elif current.dest != base:
+            following = open_legs.next_leg(
+                current.dest, current.arr + release + rest + report, last_day, used,
+                lambda leg: leg.arr + release <= last_day,
+            )
+            if following is None:
+                break
+            duties.append([following])
+        else:
+            break
+        used.add(following.instance_id)
+        current = following
+        if current.dest == base:
+            closed = (len(duties), len(duties[-1]))
+
+    if closed is None:
+        return None
+    kept = duties[:closed[0]]
+    kept[-1] = kept[-1][:closed[1]]
+    return Pairing(base, kept)
+
+
+def build_pairings(legs: list[PairingLeg], bases: set[int], rules: PairingRules = PairingRules()) -> list[Pairing]:
+    open_legs = _OpenLegs(legs)
+    pairings = []
+    for leg in sorted(legs, key=lambda leg: (leg.dep, leg.instance_id)):
+        if leg.instance_id in open_legs.covered or leg.origin not in bases:
+            continue
+        pairing = _build_from(leg, open_legs, rules)
+        if pairing is None:
+            continue
+        open_legs.covered.update(l.instance_id for l in pairing.legs)
+        pairings.append(pairing)
+    return pairings
+
+
+# One pilot's busy spans (duty start, duty end), kept sorted.
+class _Roster(IntervalTimeline):
+    __slots__ = ("staff_id", "used")
+
+    def __init__(self, staff_id: int) -> None:
+        super().__init__()
+        self.staff_id = staff_id
+        self.used = 0
+
+    def free(self, start: int, end: int, rest: int) -> bool:
+        return self.fit(start, end, rest) is not None
+
+
+def assign_pilots(
+    pairings: dict[str, list[Pairing]],
+    pilots: dict[int, int],
+    busy: list[tuple[int, int, int]],
+    rules: PairingRules = PairingRules(),
+) -> list[PairingAssignment]:
+    report, release = rules.report_minutes * 60, rules.release_minutes * 60
+    rest = rules.min_rest_hours * 3600
+    rosters = {staff_id: _Roster(staff_id) for staff_id in pilots}
+    for staff_id, dep, arr in busy:
+        if staff_id in rosters:
+            rosters[staff_id].insert(dep - report, arr + release)
+    by_base: dict[int, list[_Roster]] = {}
+    for staff_id, base in sorted(pilots.items()):
+        by_base.setdefault(base, []).append(rosters[staff_id])
+
+    work = sorted(
+        ((pairing.start, role, pairing) for role, role_pairings in pairings.items() for pairing in role_pairings),
+        key=lambda item: (item[0], PILOT_ROLES.index(item[1])),
+    )
+    assignments = []
+    for _, role, pairing in work:
+        start, end = pairing.start - report, pairing.end + release
+        best = None
+        for roster in by_base.get(pairing.base_airport_id, ()):
+            if (best is None or roster.used < best.used) and roster.free(start, end, rest):
+                best = roster
+        if best is not None:
+            best.insert(start, end)
+            best.used += end - start
+        assignments.append(PairingAssignment(role, best.staff_id if best else None, pairing))
+    return assignments
+
+
+def plan_crew(
+    legs: list[PairingLeg],
+    pilots: dict[int, int],
+    busy: list[tuple[int, int, int]] = (),
+    rules: PairingRules = PairingRules(),
+) -> CrewPlan:
+    bases = set(pilots.values())
+    pairings: dict[str, list[Pairing]] = {}
+    built: dict[frozenset[int], list[Pairing]] = {}
+    for role in PILOT_ROLES:
+        needing = [leg for leg in legs if leg.needs(role)]
+        key = frozenset(leg.instance_id for leg in needing)
+        if key not in built:
+            built[key] = build_pairings(needing, bases, rules)
+        pairings[role] = built[key]
+
+    plan = CrewPlan(assign_pilots(pairings, pilots, busy, rules))
+    for role in PILOT_ROLES:
+        covered = {
+            leg.instance_id
+            for a in plan.staffed if a.role == role
+            for leg in a.pairing.legs
+        }
+        plan.uncovered[role] = [leg.instance_id for leg in legs if leg.needs(role) and leg.instance_id not in covered]
+    return plan
+
+
+def plan_crew_for_dates(
+    conn: sqlite3.Connection,
+    date_from: str,
+    date_to: str,
+    rules: PairingRules = PairingRules(),
+) -> CrewPlan:
+    legs = [PairingLeg(*row) for row in conn.execute(q.SQL_PAIRING_LEGS, (date_from, date_to))]
+    pilots = dict(conn.execute(q.SQL_PILOT_BASES).fetchall())
+    # Pairings may run max_days past either end of the range.
+    margin = timedelta(days=rules.max_days)
+    busy = conn.execute(
+        q.SQL_PILOT_BUSY,
+        ((date.fromisoformat(date_from) - margin).isoformat(), (date.fromisoformat(date_to) + margin).isoformat()),
+    ).fetchall()
+    return plan_crew(legs, pilots, busy, rules)
+
+
+# Insert the staffed pairings in one transaction. Returns the number of
+# CrewAssignment rows written; seats taken since planning are skipped.
+def apply_crew_plan(conn: sqlite3.Connection, plan: CrewPlan) -> int:
+    rows = plan.rows()
+    if not rows:
+        return 0
+    with audited_transaction(conn, AUDIT_USER):
+        return conn.executemany(q.SQL_INSERT_CREW_IF_ROLE_FREE, rows).rowcount
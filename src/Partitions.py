@@ -0,0 +1,341 @@
+import re
+import shutil
+import sqlite3
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+import MemoryMode
+from SeedDB import DB_PATH
+from Transactions import audited_transaction
+
+# Past seasons (calendar years) of FlightInstance and its CrewAssignment and
+# BookingItem children can be moved out of the main file into
+# DB/Partitions/FlightInstance_<year>.db. Those files are attached read-only
+# to every app connection; the current season always stays in the main file.
+#
+# SQLite attaches at most 10 databases to a connection (SQLITE_LIMIT_ATTACHED),
+# so at most MAX_PARTITION_FILES partitions are kept: archiving a season that
+# would go past it first merges the oldest partitions into one file covering
+# their years (FlightInstance_<first>-<last>.db), which then counts as one.
+
+PARTITION_DIR_NAME = "Partitions"
+# Leaves one attach slot for archive_year's own working attaches.
+MAX_PARTITION_FILES = 8
+AUDIT_USER = "ARCHIVE"
+PARTITIONED_TABLES = ["FlightInstance", "CrewAssignment", "BookingItem"]
+PARTITION_INDEXES = {
+    "FlightInstance": ["FlightDate", "FlightID"],
+    "CrewAssignment": ["InstanceID", "StaffID"],
+    "BookingItem": ["InstanceID"],
+}
+
+# Views that read partitioned tables. Each attached partition gets a TEMP
+# copy of these views pointed at its own tables.
+PARTITIONED_VIEWS = ["View_FlightsDetailedWithPilots", "View_PilotSchedule", "View_FlightsPerPilot"]
+
+_TABLE_REF = re.compile(r"\b(FROM|JOIN)\s+(" + "|".join(PARTITIONED_TABLES) + r")\b")
+
+_registry: list["Partition"] | None = None
+
+
+@dataclass(frozen=True)
+class Partition:
+    year: int
+    file_name: str
+    first_date: str
+    last_date: str
+    instances: int
+
+    @property
+    def schema(self) -> str:
+        return f"p{self.year}"
+
+    # Seasons held by the file; more than one after a merge.
+    def covers_year(self, year: int) -> bool:
+        return int(self.first_date[:4]) <= year <= int(self.last_date[:4])
+
+    def overlaps(self, date_from: str | None, date_to: str | None) -> bool:
+        if date_from and date_from > self.last_date:
+            return False
+        if date_to and date_to < self.first_date:
+            return False
+        return True
+
+
+def main_db_path(conn: sqlite3.Connection) -> Path:
+    for _, name, file in conn.execute("PRAGMA database_list;"):
+        if name == "main" and file:
+            return Path(file)
+        if name == "main" and MemoryMode.active() is not None:
+            # In-memory copy: partitions sit next to the file it flushes to.
+            return MemoryMode.active().db_path
+    raise sqlite3.OperationalError("Main database has no file.")
+
+
+def _read_registry(conn: sqlite3.Connection) -> list[Partition]:
+    try:
+        rows = conn.execute(
+            """
+            SELECT PartitionYear, FileName, FirstDate, LastDate, Instances
+            FROM InstancePartition
+            ORDER BY PartitionYear;
+            """
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    return [Partition(*row) for row in rows]
+
+
+# Registry as last seen by this process. Query builders use it to decide which
+# partitions a date range needs before any connection is open.
+def registry() -> list[Partition]:
+    global _registry
+    if _registry is None:
+        if not DB_PATH.exists():
+            return []
+        with sqlite3.connect(DB_PATH) as conn:
+            _registry = _read_registry(conn)
+    return _registry
+
+
+def reset_registry() -> None:
+    global _registry
+    _registry = None
+
+
+# Partitions registered in conn's database whose span overlaps
+# [date_from, date_to]; unlike registry(), this works for any database file.
+def partitions_in_range(
+    conn: sqlite3.Connection, date_from: str | None = None, date_to: str | None = None
+) -> list[Partition]:
+    return [p for p in _read_registry(conn) if p.overlaps(date_from, date_to)]
+
+
+def _partition_view_sql(view_sql: str, view: str, partition: Partition) -> str:
+    body = view_sql.split(" AS", 1)[1]
+    body = _TABLE_REF.sub(lambda m: f"{m.group(1)} {partition.schema}.{m.group(2)}", body)
+    return f"CREATE TEMP VIEW IF NOT EXISTS {view}_{partition.year} AS{body}"
+
+
+# Attach every registered partition read-only and create its TEMP views.
+def attach_partitions(conn: sqlite3.Connection) -> None:
+    global _registry
+    partitions = _read_registry(conn)
+    _registry = partitions
+    if not partitions:
+        return
+
+    db_dir = main_db_path(conn).parent
+    attached = {row[1] for row in conn.execute("PRAGMA database_list;")}
+    limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    missing = [p for p in partitions if p.schema not in attached]
+    if len(attached - {"main", "temp"}) + len(missing) > limit:
+        raise sqlite3.OperationalError(
+            f"{len(partitions)} archive partitions need more than SQLite's {limit} attached databases; "
+            f"archive a season from the app (option P) to merge the oldest ones."
+        )
+    view_sql = dict(
+        conn.execute(
+            f"""
+            SELECT name, sql FROM main.sqlite_master
+            WHERE type = 'view' AND name IN ({", ".join("?" * len(PARTITIONED_VIEWS))});
+            """,
+            PARTITIONED_VIEWS,
+        ).fetchall()
+    )
+    for partition in partitions:
+        if partition.schema in attached:
+            continue
+        uri = (db_dir / partition.file_name).resolve().as_uri() + "?mode=ro"
+        conn.execute("ATTACH DATABASE ? AS " + partition.schema + ";", (uri,))
+        for view in PARTITIONED_VIEWS:
+            if view in view_sql:
+                conn.execute(_partition_view_sql(view_sql[view], view, partition))
+
+
+# FROM-clause source for a partitioned view, limited to the partitions whose
+# date span overlaps [date_from, date_to]. With no archived partition in range
+# this is just the main view, so current-season queries never touch archives.
+def view_source(view: str, date_from: str | None = None, date_to: str | None = None) -> str:
+    partitions = [p for p in registry() if p.overlaps(date_from, date_to)]
+    if not partitions:
+        return view
+    branches = [f"SELECT * FROM main.{view}"]
+    branches += [f"SELECT * FROM temp.{view}_{p.year}" for p in partitions]
+    return "(" + " UNION ALL ".join(branches) + ")"
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> list[tuple[str, str, int]]:
+    return [
+        (name, col_type, pk)
+        for _, name, col_type, _, _, pk in conn.execute(f"PRAGMA {schema}.table_info({table});")
+    ]
+
+
+# Create (or widen) the partition copy of a table: same columns and primary
+# key, no foreign keys, since SQLite cannot enforce them across files.
+def _ensure_partition_table(conn: sqlite3.Connection, table: str) -> list[str]:
+    main_cols = _columns(conn, "main", table)
+    existing = {name for name, _, _ in _columns(conn, "archive", table)}
+    if not existing:
+        col_defs = ", ".join(f'"{name}" {col_type}' for name, col_type, _ in main_cols)
+        pk = ", ".join(name for name, _, pk in sorted(main_cols, key=lambda c: c[2]) if pk)
+        conn.execute(f"CREATE TABLE archive.{table} ({col_defs}, PRIMARY KEY ({pk}));")
+        for column in PARTITION_INDEXES.get(table, []):
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS archive.Idx{table}{column} ON {table} ({column});"
+            )
+    else:
+        for name, col_type, _ in main_cols:
+            if name not in existing:
+                conn.execute(f'ALTER TABLE archive.{table} ADD COLUMN "{name}" {col_type};')
+    return [name for name, _, _ in main_cols]
+
+
+# Copy the given partitions (oldest first, in autocommit mode on conn) into
+# one new file and point the registry at it in place of theirs. The new file
+# is complete before the registry changes and the old files are removed only
+# after, so a crash at any point leaves a registry that matches its files.
+def _merge_partitions(conn: sqlite3.Connection, db_path: Path, partitions: list[Partition]) -> None:
+    first_year = partitions[0].year
+    last_year = int(partitions[-1].last_date[:4])
+    file_name = f"{PARTITION_DIR_NAME}/FlightInstance_{first_year}-{last_year}.db"
+    merged_path = db_path.parent / file_name
+    building = merged_path.with_name(merged_path.name + ".tmp")
+    building.unlink(missing_ok=True)
+
+    conn.execute("ATTACH DATABASE ? AS archive;", (str(building),))
+    try:
+        for table in PARTITIONED_TABLES:
+            _ensure_partition_table(conn, table)
+        for partition in partitions:
+            uri = (db_path.parent / partition.file_name).resolve().as_uri() + "?mode=ro"
+            conn.execute("ATTACH DATABASE ? AS merging;", (uri,))
+            try:
+                conn.execute("BEGIN;")
+                for table in PARTITIONED_TABLES:
+                    col_list = ", ".join(f'"{name}"' for name, _, _ in _columns(conn, "merging", table))
+                    if col_list:
+                        conn.execute(f"INSERT INTO archive.{table} ({col_list}) SELECT {col_list} FROM merging.{table};")
+                conn.execute("COMMIT;")
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK;")
+                raise
+            finally:
+                conn.execute("DETACH DATABASE merging;")
+    finally:
+        conn.execute("DETACH DATABASE archive;")
+    building.replace(merged_path)
+
+    years = [p.year for p in partitions]
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        conn.execute(
+            f"DELETE FROM InstancePartition WHERE PartitionYear IN ({', '.join('?' * len(years))});", years
+        )
+        conn.execute(
+            """
+            INSERT INTO InstancePartition (PartitionYear, FileName, FirstDate, LastDate, Instances)
+            VALUES (?, ?, ?, ?, ?);
+            """,
+            (
+                first_year, file_name, partitions[0].first_date, max(p.last_date for p in partitions),
+                sum(p.instances for p in partitions),
+            ),
+        )
+        conn.execute("COMMIT;")
+    except Exception:
+        conn.execute("ROLLBACK;")
+        raise
+    for partition in partitions:
+        (db_path.parent / partition.file_name).unlink(missing_ok=True)
+    reset_registry()
+
+
+# Move one past season out of the main file. Returns the number of
+# FlightInstances moved. Audit entries for the move are written as ARCHIVE,
+# so they stay out of the USER audit log view.
+def archive_year(year: int, db_path: Path = DB_PATH, vacuum: bool = False) -> int:
+    if year >= date.today().year:
+        raise ValueError("Only past seasons can be archived; the current season stays in the main file.")
+
+    first_date, last_date = f"{year}-01-01", f"{year}-12-31"
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA foreign_keys = ON;")
+        if conn.execute(
+            "SELECT 1 FROM FlightInstance WHERE FlightDate BETWEEN ? AND ? LIMIT 1;",
+            (first_date, last_date),
+        ).fetchone() is None:
+            return 0
+        partitions = _read_registry(conn)
+        # A season archived before (into its own or a merged file) goes back
+        # into the same file.
+        target = next((p for p in partitions if p.covers_year(year)), None)
+        if target is None and len(partitions) >= MAX_PARTITION_FILES:
+            _merge_partitions(conn, db_path, partitions[: len(partitions) - MAX_PARTITION_FILES + 2])
+        registry_year = target.year if target else year
+        file_name = target.file_name if target else f"{PARTITION_DIR_NAME}/FlightInstance_{year}.db"
+        partition_path = db_path.parent / file_name
+        partition_path.parent.mkdir(parents=True, exist_ok=True)
+        conn.execute("ATTACH DATABASE ? AS archive;", (str(partition_path),))
+        with audited_transaction(conn, AUDIT_USER):
+            columns = {table: _ensure_partition_table(conn, table) for table in PARTITIONED_TABLES}
+
+            conn.execute("DROP TABLE IF EXISTS temp.ArchiveIds;")
+            conn.execute(
+                """
+                CREATE TEMP TABLE ArchiveIds AS
+                SELECT InstanceID FROM main.FlightInstance
+                WHERE FlightDate BETWEEN ? AND ?;
+                """,
+                (first_date, last_date),
+            )
+            moved = conn.execute("SELECT COUNT(*) FROM temp.ArchiveIds;").fetchone()[0]
+
+            for table in PARTITIONED_TABLES:
+                col_list = ", ".join(f'"{c}"' for c in columns[table])
+                conn.execute(
+                    f"""
+                    INSERT INTO archive.{table} ({col_list})
+                    SELECT {col_list} FROM main.{table}
+                    WHERE InstanceID IN (SELECT InstanceID FROM temp.ArchiveIds);
+                    """
+                )
+            for table in reversed(PARTITIONED_TABLES):
+                conn.execute(
+                    f"DELETE FROM main.{table} WHERE InstanceID IN (SELECT InstanceID FROM temp.ArchiveIds);"
+                )
+
+            conn.execute(
+                """
+                INSERT INTO InstancePartition (PartitionYear, FileName, FirstDate, LastDate, Instances)
+                SELECT ?, ?, COALESCE(MIN(FlightDate), ?), COALESCE(MAX(FlightDate), ?), COUNT(*)
+                FROM archive.FlightInstance
+                WHERE true
+                ON CONFLICT(PartitionYear) DO UPDATE
+                SET FirstDate = excluded.FirstDate,
+                    LastDate = excluded.LastDate,
+                    Instances = excluded.Instances,
+                    ArchivedAt = CURRENT_TIMESTAMP;
+                """,
+                (registry_year, file_name, first_date, last_date),
+            )
+            conn.execute("DROP TABLE temp.ArchiveIds;")
+        conn.execute("DETACH DATABASE archive;")
+        if vacuum:
+            conn.execute("VACUUM;")
+    finally:
+        conn.close()
+
+    reset_registry()
+    return moved
+
+
+# Used by a full reset: the new main file has an empty registry.
+def drop_partitions(db_path: Path = DB_PATH) -> None:
+    shutil.rmtree(db_path.parent / PARTITION_DIR_NAME, ignore_errors=True)
+    reset_registry()
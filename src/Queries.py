@@ -1,10 +1,15 @@
 from AllFilterSpecs import (
+    AIRLINE_FILTER_SPECS,
     AIRPORT_FILTER_SPECS,
     AUDIT_LOG_FILTER_SPECS,
     FLIGHT_FILTER_SPECS,
     PILOT_SCHEDULE_FILTER_SPECS,
+    ROUTE_FILTER_SPECS,
 )
+from datetime import date, timedelta
+
 from FilterSQL import apply_sql_filter
+from Partitions import view_source
 
 
 def compact_utc_expr(datetime_expr: str, flight_date_expr: str) -> str:
@@ -18,7 +23,30 @@ def compact_utc_expr(datetime_expr: str, flight_date_expr: str) -> str:
     )
 
 
-def build_flights_by_criteria(filters: dict):
+# FlightDate range implied by the date filters, used to prune partitions.
+# An arrival date can belong to a flight that departed the day before.
+def flight_date_range(departure_date: str | None, arrival_date: str | None) -> tuple[str | None, str | None]:
+    date_from = date_to = None
+    try:
+        if arrival_date:
+            arrival = date.fromisoformat(arrival_date)
+            date_from, date_to = (arrival - timedelta(days=1)).isoformat(), arrival.isoformat()
+        if departure_date:
+            date.fromisoformat(departure_date)
+            date_from = max(date_from or departure_date, departure_date)
+            date_to = min(date_to or departure_date, departure_date)
+    except ValueError:
+        return None, None
+    return date_from, date_to
+
+
+# instance_ids limits the result to those instances; live boards use it to
+# fetch only the rows that changed since their last poll.
+def build_flights_by_criteria(filters: dict, instance_ids: list[int] | None = None):
+    source = view_source(
+        "View_FlightsDetailedWithPilots",
+        *flight_date_range(filters.get("departure_date"), filters.get("arrival_date")),
+    )
     dep_utc = compact_utc_expr("v.SchedDepUtc", "v.FlightDate")
     arr_utc = compact_utc_expr("v.SchedArrUtc", "v.FlightDate")
     actual_dep_utc = compact_utc_expr("v.ActualDepUtc", "v.FlightDate")
@@ -28,7 +56,7 @@ def build_flights_by_criteria(filters: dict):
         SELECT
             v.InstanceID,
             v.FlightNumber AS FlightNo,
-            COALESCE(al.IcaoCode, al.IataCode, l.AirlineName) AS Airline,
+            COALESCE(al.IcaoCode, al.IataCode, al.Name) AS Airline,
             v.FlightDate   AS Date,
             {dep_utc} AS DepUTC,
             {arr_utc} AS ArrUTC,
@@ -40,10 +68,15 @@ def build_flights_by_criteria(filters: dict):
             '(' || v.OriginIata || ') ' || v.OriginName AS Departure,
             '(' || v.DestIata || ') ' || v.DestinationName AS Arrival,
             v.Captain,
-            v."First Officer" AS FirstOfficer
-        FROM View_FlightsDetailedWithPilots v
-        LEFT JOIN View_FlightLookup l ON l.FlightID = v.FlightID
-        LEFT JOIN Airline al ON al.AirlineID = l.AirlineID
+            v."First Officer" AS FirstOfficer,
+            v.SchedDepUtc AS _DepUtc,
+            v.SchedArrUtc AS _ArrUtc,
+            lr.OriginAirportID AS _OriginID,
+            lr.DestinationAirportID AS _DestID
+        FROM {source} v
+        LEFT JOIN Flight lf ON lf.FlightID = v.FlightID
+        LEFT JOIN Airline al ON al.AirlineID = lf.AirlineID
+        LEFT JOIN Route lr ON lr.RouteID = lf.RouteID
         WHERE 1 = 1
     """
     params: list = []
@@ -52,11 +85,41 @@ def build_flights_by_criteria(filters: dict):
         value = filters.get(spec.key)
         sql = apply_sql_filter(sql, params, spec, value)
 
+    # A literal IN list (not a subquery) lets SQLite push the filter into the
+    # grouped view, so each changed instance is a primary-key lookup.
+    if instance_ids is not None:
+        sql += f" AND v.InstanceID IN ({', '.join('?' * len(instance_ids)) or 'NULL'})"
+        params.extend(instance_ids)
+
     sql += " ORDER BY v.FlightDate DESC, v.SchedDepUtc DESC, v.FlightNumber ASC, v.InstanceID DESC;"
     return sql, tuple(params)
 
 
+class _Descending:
+    __slots__ = ("value",)
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+    def __eq__(self, other: "_Descending") -> bool:
+        return self.value == other.value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+
+# Python mirror of the ORDER BY above, for boards patched in memory: a key
+# under which rows in ascending order are in the listing's order. Uses the
+# full SchedDepUtc (_DepUtc), not the compact DepUTC text, which puts
+# "00:30 +1" before "23:00".
+def flights_by_criteria_sort_key(headers: list[str]):
+    col = {h: i for i, h in enumerate(headers)}
+    date_col, dep_col, number_col, id_col = col["Date"], col["_DepUtc"], col["FlightNo"], col["InstanceID"]
+    return lambda r: (_Descending((r[date_col], r[dep_col] or "")), r[number_col], -r[id_col])
+
+
 def build_pilot_schedule(filters: dict):
+    source = view_source("View_PilotSchedule", *flight_date_range(filters.get("date"), None))
     dep_utc = compact_utc_expr("SchedDepUtc", "FlightDate")
     arr_utc = compact_utc_expr("SchedArrUtc", "FlightDate")
 
@@ -71,8 +134,12 @@ def build_pilot_schedule(filters: dict):
             FlightDate   AS Date,
             {dep_utc} AS DepUTC,
             {arr_utc} AS ArrUTC,
-            Status
-        FROM View_PilotSchedule
+            Status,
+            SchedDepUtc AS _DepUtc,
+            SchedArrUtc AS _ArrUtc,
+            OriginAirportID AS _OriginID,
+            DestinationAirportID AS _DestID
+        FROM {source}
         WHERE 1 = 1
     """
     params: list = []
@@ -127,7 +194,7 @@ def build_flights_for_new_instance(_filters: dict):
     return sql, tuple(params)
 
 
-def build_airlines_for_new_flight(_filters: dict):
+def build_airlines_for_new_flight(filters: dict):
     sql = """
         SELECT
             AirlineID,
@@ -139,12 +206,20 @@ def build_airlines_for_new_flight(_filters: dict):
     """
     params: list = []
 
+    for spec in AIRLINE_FILTER_SPECS:
+        value = filters.get(spec.key)
+        sql = apply_sql_filter(sql, params, spec, value)
+
     sql += " ORDER BY Name, AirlineID;"
     return sql, tuple(params)
 
 
-def build_routes_for_new_flight(_filters: dict):
-    sql = """
+# Unfiltered route listings stop here; the full OpenFlights set has ~67k.
+ROUTE_LISTING_LIMIT = 200
+
+
+def build_routes_for_new_flight(filters: dict):
+    select = """
         SELECT
             r.RouteID,
             ao.IataCode AS Origin,
@@ -157,7 +232,24 @@ def build_routes_for_new_flight(_filters: dict):
     """
     params: list = []
 
-    sql += " ORDER BY Origin, Dest, r.RouteID;"
+    sql = select
+    for spec in ROUTE_FILTER_SPECS:
+        value = filters.get(spec.key)
+        sql = apply_sql_filter(sql, params, spec, value)
+
+    origin, dest = filters.get("origin"), filters.get("dest")
+    if not origin and not dest:
+        sql += " ORDER BY r.RouteID LIMIT ?;"
+        return sql, tuple(params) + (ROUTE_LISTING_LIMIT,)
+
+    # Reverse direction: the same lookup with origin and destination swapped.
+    if filters.get("reverse") == "yes":
+        swapped = {**filters, "origin": dest, "dest": origin}
+        sql += " UNION ALL " + select
+        for spec in ROUTE_FILTER_SPECS:
+            sql = apply_sql_filter(sql, params, spec, swapped.get(spec.key))
+
+    sql += " ORDER BY Origin, Dest, RouteID;"
     return sql, tuple(params)
 
 
@@ -408,14 +500,722 @@ SQL_INSERT_FLIGHT_INSTANCE = """
 
 SQL_LAST_INSERT_ROWID = "SELECT last_insert_rowid();"
 
-SQL_REPORT_DESTINATION = """
-    SELECT *
-    FROM View_FlightsPerDestination
-    ORDER BY Flights DESC, DestIata, DestinationName;
+# Report shards. Each query returns partial aggregates for one shard; the
+# report executor fills in the schema-qualified tables and the shard
+# predicate, then merges the partials. Key columns come first.
+
+SQL_SHARD_FLIGHTS_PER_DESTINATION = """
+    SELECT
+        a2.IataCode AS DestIata,
+        a2.Name     AS DestinationName,
+        COUNT(*)    AS Flights
+    FROM Flight f
+    JOIN Route r ON r.RouteID = f.RouteID
+    JOIN Airport a2 ON a2.AirportID = r.DestinationAirportID
+    WHERE {shard}
+    GROUP BY a2.IataCode, a2.Name;
+"""
+
+SQL_SHARD_FLIGHTS_PER_PILOT = """
+    SELECT
+        s.StaffID,
+        s.FirstName,
+        s.LastName,
+        COUNT(*) AS AssignedInstances
+    FROM {FlightInstance} fi
+    JOIN {CrewAssignment} ca ON ca.InstanceID = fi.InstanceID
+    JOIN Staff s ON s.StaffID = ca.StaffID
+    WHERE s.Role = 'Pilot' AND {shard}
+    GROUP BY s.StaffID, s.FirstName, s.LastName;
+"""
+
+SQL_SHARD_LOAD_FACTOR = """
+    SELECT
+        fi.InstanceID,
+        f.FlightNumber  AS FlightNo,
+        fi.FlightDate   AS Date,
+        ac.TailNumber   AS Tail,
+        ac.SeatCapacity AS Seats,
+        (
+            SELECT COUNT(*)
+            FROM {BookingItem} bi
+            WHERE bi.InstanceID = fi.InstanceID
+              AND bi.SeatNo IS NOT NULL AND bi.ItemStatus IS NOT 'Cancelled'
+        ) AS Taken
+    FROM {FlightInstance} fi
+    JOIN Flight f ON f.FlightID = fi.FlightID
+    JOIN Aircraft ac ON ac.AircraftID = fi.AircraftID
+    WHERE {shard};
+"""
+
+SQL_SHARD_MONTHLY_AIRLINE_TRAFFIC = """
+    SELECT
+        substr(fi.FlightDate, 1, 7) AS Month,
+        al.Name AS Airline,
+        COUNT(*) AS Flights,
+        SUM(fi.Status = 'Cancelled') AS Cancelled,
+        SUM(CASE WHEN fi.Status <> 'Cancelled' THEN ac.SeatCapacity ELSE 0 END) AS Seats,
+        SUM((
+            SELECT COUNT(*)
+            FROM {BookingItem} bi
+            WHERE bi.InstanceID = fi.InstanceID
+              AND bi.SeatNo IS NOT NULL AND bi.ItemStatus IS NOT 'Cancelled'
+        )) AS Taken
+    FROM {FlightInstance} fi
+    JOIN Flight f ON f.FlightID = fi.FlightID
+    JOIN Airline al ON al.AirlineID = f.AirlineID
+    JOIN Aircraft ac ON ac.AircraftID = fi.AircraftID
+    WHERE {shard}
+    GROUP BY Month, al.Name;
+"""
+
+SQL_SHARD_ROUTE_PUNCTUALITY = """
+    SELECT
+        ao.IataCode AS Origin,
+        ad.IataCode AS Dest,
+        COUNT(*) AS Flights,
+        SUM(fi.ActualDepUtc IS NOT NULL) AS Departed,
+        SUM((julianday(fi.ActualDepUtc) - julianday(fi.SchedDepUtc)) * 1440 <= 15) AS OnTime,
+        SUM(ROUND((julianday(fi.ActualDepUtc) - julianday(fi.SchedDepUtc)) * 1440)) AS DelayMinutes,
+        MAX(ROUND((julianday(fi.ActualDepUtc) - julianday(fi.SchedDepUtc)) * 1440)) AS MaxDelay
+    FROM {FlightInstance} fi
+    JOIN Flight f ON f.FlightID = fi.FlightID
+    JOIN Route r ON r.RouteID = f.RouteID
+    JOIN Airport ao ON ao.AirportID = r.OriginAirportID
+    JOIN Airport ad ON ad.AirportID = r.DestinationAirportID
+    WHERE {shard}
+    GROUP BY ao.IataCode, ad.IataCode;
+"""
+
+SQL_INSTANCE_DATE_SPAN = """
+    SELECT COUNT(*)
+    FROM {FlightInstance}
+    WHERE FlightDate >= ? AND FlightDate < ?;
+"""
+
+SQL_INSTANCE_DATE_AT = """
+    SELECT FlightDate
+    FROM {FlightInstance}
+    WHERE FlightDate >= ? AND FlightDate < ?
+    ORDER BY FlightDate
+    LIMIT 1 OFFSET ?;
+"""
+
+SQL_FLIGHTS_PER_AIRLINE = """
+    SELECT AirlineID, COUNT(*)
+    FROM Flight
+    GROUP BY AirlineID
+    ORDER BY COUNT(*) DESC, AirlineID;
+"""
+
+SQL_SEAT_VERSION = """
+    SELECT SeatsTaken, Version
+    FROM InstanceSeatCount
+    WHERE InstanceID = ?;
+"""
+
+SQL_INSTANCE_CAPACITY = """
+    SELECT ac.SeatCapacity
+    FROM FlightInstance fi
+    JOIN Aircraft ac ON ac.AircraftID = fi.AircraftID
+    WHERE fi.InstanceID = ?;
+"""
+
+SQL_HELD_SEATS = """
+    SELECT SeatNo
+    FROM BookingItem
+    WHERE InstanceID = ?
+      AND SeatNo IS NOT NULL
+      AND ItemStatus IS NOT 'Cancelled';
+"""
+
+SQL_BOOKING_ITEM_SEAT = """
+    SELECT InstanceID, SeatNo, CabinClass, ItemStatus
+    FROM BookingItem
+    WHERE BookingItemID = ?;
+"""
+
+# A cancelled item keeps its SeatNo for history until someone else takes the
+# seat; UNIQUE(InstanceID, SeatNo) means it has to let go first.
+SQL_RELEASE_CANCELLED_SEAT = """
+    UPDATE BookingItem
+    SET SeatNo = NULL
+    WHERE InstanceID = ? AND SeatNo = ? AND ItemStatus = 'Cancelled';
+"""
+
+SQL_SET_BOOKING_ITEM_SEAT = """
+    UPDATE BookingItem
+    SET SeatNo = ?, CabinClass = ?
+    WHERE BookingItemID = ?;
+"""
+
+SQL_CANCEL_BOOKING_ITEM = """
+    UPDATE BookingItem
+    SET ItemStatus = 'Cancelled'
+    WHERE BookingItemID = ?;
+"""
+
+SQL_UPSERT_PASSENGER = """
+    INSERT INTO Passenger (PassportNo, Nationality, FirstName, LastName, Dob, Email, Phone)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(PassportNo, Nationality) DO UPDATE
+    SET FirstName = excluded.FirstName,
+        LastName  = excluded.LastName,
+        Dob       = COALESCE(excluded.Dob, Dob),
+        Email     = COALESCE(excluded.Email, Email),
+        Phone     = COALESCE(excluded.Phone, Phone);
+"""
+
+SQL_NEXT_BOOKING_IDS = """
+    SELECT
+        (SELECT COALESCE(MAX(BookingID), 0) + 1 FROM Booking),
+        (SELECT COALESCE(MAX(BookingItemID), 0) + 1 FROM BookingItem);
+"""
+
+SQL_PNRS_IN_USE = """
+    SELECT Pnr
+    FROM Booking
+    WHERE Pnr IN (SELECT value FROM json_each(?));
 """
 
-SQL_REPORT_PILOT = """
-    SELECT *
-    FROM View_FlightsPerPilot
-    ORDER BY AssignedInstances DESC, LastName, FirstName, StaffID;
+SQL_INSERT_BOOKING = """
+    INSERT INTO Booking (BookingID, Pnr, BookedAt, Status)
+    VALUES (?, ?, ?, ?);
+"""
+
+SQL_INSERT_BOOKING_ITEM = """
+    INSERT INTO BookingItem (
+        BookingItemID,
+        BookingID,
+        InstanceID,
+        PassportNo,
+        Nationality,
+        SeatNo,
+        CabinClass,
+        ItemStatus
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, 'Confirmed');
+"""
+
+SQL_BOOKING_ITEMS_BY_PNR = """
+    SELECT
+        b.Pnr,
+        bi.BookingItemID,
+        bi.InstanceID,
+        f.FlightNumber AS FlightNo,
+        fi.FlightDate  AS Date,
+        p.FirstName || ' ' || p.LastName AS Passenger,
+        bi.SeatNo,
+        bi.CabinClass,
+        bi.ItemStatus
+    FROM Booking b
+    JOIN BookingItem bi ON bi.BookingID = b.BookingID
+    JOIN Passenger p ON p.PassportNo = bi.PassportNo AND p.Nationality = bi.Nationality
+    JOIN FlightInstance fi ON fi.InstanceID = bi.InstanceID
+    JOIN Flight f ON f.FlightID = fi.FlightID
+    WHERE b.Pnr = ?
+    ORDER BY bi.BookingItemID;
 """
+
+SQL_PARTITIONS = """
+    SELECT
+        PartitionYear AS Season,
+        FileName,
+        FirstDate,
+        LastDate,
+        Instances,
+        ArchivedAt
+    FROM InstancePartition
+    ORDER BY PartitionYear;
+"""
+
+SQL_SEASONS_IN_MAIN = """
+    SELECT
+        CAST(substr(FlightDate, 1, 4) AS INTEGER) AS Season,
+        MIN(FlightDate) AS FirstDate,
+        MAX(FlightDate) AS LastDate,
+        COUNT(*) AS Instances
+    FROM main.FlightInstance
+    GROUP BY Season
+    ORDER BY Season;
+"""
+
+SQL_LAST_CHANGE_SEQ = """
+    SELECT COALESCE(MAX(ChangeSeq), 0)
+    FROM InstanceChange;
+"""
+
+SQL_CHANGES_SINCE = """
+    SELECT InstanceID, ChangeSeq
+    FROM InstanceChange
+    WHERE ChangeSeq > ?
+    ORDER BY ChangeSeq;
+"""
+
+SQL_FEED_EVENTS_AFTER = """
+    SELECT
+        s.Seq,
+        a.LogID,
+        a.TableName,
+        a.Operation,
+        a.RecordID,
+        a.OldValue,
+        a.NewValue,
+        a.ChangedAt,
+        a.ChangedBy
+    FROM AuditSeq s
+    JOIN AuditLog a ON a.LogID = s.LogID
+    WHERE s.Seq > ?
+    ORDER BY s.Seq
+    LIMIT ?;
+"""
+
+SQL_FEED_TRUNCATED_THROUGH = """
+    SELECT TruncatedThrough
+    FROM CdcFeed
+    WHERE FeedID = 1;
+"""
+
+# Highest Seq ever handed out, which survives truncation.
+SQL_FEED_LAST_SEQ = """
+    SELECT COALESCE(MAX(seq), 0)
+    FROM sqlite_sequence
+    WHERE name = 'AuditSeq';
+"""
+
+SQL_FEED_SEQ_OLDER_THAN = """
+    SELECT COALESCE(MAX(Seq), 0)
+    FROM AuditSeq
+    WHERE LoggedAt < datetime('now', ?);
+"""
+
+SQL_FEED_TRUNCATE = """
+    DELETE FROM AuditSeq
+    WHERE Seq <= ?;
+"""
+
+SQL_FEED_SET_TRUNCATED_THROUGH = """
+    UPDATE CdcFeed
+    SET TruncatedThrough = max(TruncatedThrough, ?)
+    WHERE FeedID = 1;
+"""
+
+SQL_CDC_CURSOR = """
+    SELECT LastSeq
+    FROM CdcCursor
+    WHERE Consumer = ?;
+"""
+
+SQL_CDC_SAVE_CURSOR = """
+    INSERT INTO CdcCursor (Consumer, LastSeq)
+    VALUES (?, ?)
+    ON CONFLICT(Consumer) DO UPDATE
+    SET LastSeq = excluded.LastSeq,
+        UpdatedAt = CURRENT_TIMESTAMP
+    WHERE excluded.LastSeq > LastSeq;
+"""
+
+SQL_CDC_CURSORS = """
+    SELECT
+        c.Consumer,
+        c.LastSeq,
+        c.UpdatedAt,
+        (SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'AuditSeq') - c.LastSeq AS Lag,
+        CASE WHEN c.LastSeq < f.TruncatedThrough THEN 'Expired' ELSE 'OK' END AS State
+    FROM CdcCursor c
+    CROSS JOIN CdcFeed f
+    ORDER BY c.Consumer;
+"""
+
+# Written into the reporting snapshot only, never into the live file.
+SQL_CREATE_SNAPSHOT_INFO = """
+    CREATE TABLE IF NOT EXISTS SnapshotInfo
+    (
+        SnapshotID  INTEGER PRIMARY KEY CHECK (SnapshotID = 1),
+        TakenAt     TEXT NOT NULL,
+        AuditSeq    INTEGER NOT NULL,
+        CopySeconds REAL NOT NULL
+    );
+"""
+
+SQL_SAVE_SNAPSHOT_INFO = """
+    INSERT OR REPLACE INTO SnapshotInfo (SnapshotID, TakenAt, AuditSeq, CopySeconds)
+    VALUES (1, ?, ?, ?);
+"""
+
+SQL_SNAPSHOT_INFO = """
+    SELECT TakenAt, AuditSeq, CopySeconds
+    FROM SnapshotInfo
+    WHERE SnapshotID = 1;
+"""
+
+SQL_AIRPORT_ZONE = """
+    SELECT Timezone, Dst
+    FROM Airport
+    WHERE AirportID = ?;
+"""
+
+SQL_AIRPORT_ZONES = """
+    SELECT AirportID, Timezone, Dst
+    FROM Airport;
+"""
+
+# Autocomplete
+# ------------
+# Rows for the in-memory autocomplete index: ID, codes, the shown columns
+# and a weight (routes served, flights flown) that breaks ties.
+
+SQL_REFERENCE_VERSION = """
+    SELECT Version
+    FROM ReferenceVersion
+    WHERE TableName = ?;
+"""
+
+SQL_AUTOCOMPLETE_AIRPORTS = """
+    SELECT
+        a.AirportID,
+        a.IataCode,
+        a.IcaoCode,
+        a.Name,
+        a.City,
+        a.Country,
+        (SELECT COUNT(*) FROM Route r WHERE r.OriginAirportID = a.AirportID)
+            + (SELECT COUNT(*) FROM Route r WHERE r.DestinationAirportID = a.AirportID) AS Weight
+    FROM Airport a;
+"""
+
+SQL_AUTOCOMPLETE_AIRLINES = """
+    SELECT
+        al.AirlineID,
+        al.IataCode,
+        al.IcaoCode,
+        al.Name,
+        (SELECT COUNT(*) FROM Flight f WHERE f.AirlineID = al.AirlineID) AS Weight
+    FROM Airline al
+    WHERE al.Active = 1;
+"""
+
+SQL_FLIGHT_SCHEDULE_INFO = """
+    SELECT
+        f.FlightNumber,
+        ao.Timezone,
+        ao.Dst
+    FROM Flight f
+    JOIN Route r ON r.RouteID = f.RouteID
+    JOIN Airport ao ON ao.AirportID = r.OriginAirportID
+    WHERE f.FlightID = ?;
+"""
+
+SQL_AIRCRAFT_IN_SERVICE_BY_ID = """
+    SELECT 1
+    FROM Aircraft
+    WHERE AircraftID = ? AND InService = 1;
+"""
+
+# Formatted with the FlightInstance table of one database file, main or an
+# archived partition.
+SQL_INSTANCE_DATES_FOR_FLIGHT = """
+    SELECT FlightDate
+    FROM {FlightInstance}
+    WHERE FlightID = ? AND FlightDate BETWEEN ? AND ?;
+"""
+
+SQL_INSERT_SCHEDULED_INSTANCE = """
+    INSERT INTO FlightInstance (FlightID, FlightDate, SchedDepUtc, SchedArrUtc, Status, Terminal, Gate, AircraftID)
+    VALUES (?, ?, ?, ?, 'Scheduled', ?, ?, ?);
+"""
+
+# One row per non-cancelled leg, in rotation order per aircraft. Times are
+# Unix seconds so the rotation checks can do arithmetic on them directly.
+# Main file only: archived seasons are attached read-only, so their legs
+# could not be moved to another tail anyway.
+SQL_ROTATION_LEGS = """
+    SELECT
+        fi.InstanceID,
+        fi.AircraftID,
+        CAST(strftime('%s', fi.SchedDepUtc) AS INTEGER) AS Dep,
+        CAST(strftime('%s', fi.SchedArrUtc) AS INTEGER) AS Arr,
+        r.OriginAirportID,
+        r.DestinationAirportID,
+        COALESCE(sc.SeatsTaken, 0) AS SeatsTaken
+    FROM main.FlightInstance fi
+    JOIN Flight f ON f.FlightID = fi.FlightID
+    JOIN Route r ON r.RouteID = f.RouteID
+    LEFT JOIN InstanceSeatCount sc ON sc.InstanceID = fi.InstanceID
+    WHERE fi.Status <> 'Cancelled'
+      AND fi.FlightDate BETWEEN ? AND ?
+    ORDER BY fi.AircraftID, fi.SchedDepUtc, fi.InstanceID;
+"""
+
+SQL_FLEET = """
+    SELECT AircraftID, TailNumber, SeatCapacity, InService
+    FROM Aircraft
+    ORDER BY AircraftID;
+"""
+
+SQL_ROTATION_LEG_DETAILS = """
+    SELECT
+        fi.InstanceID,
+        f.FlightNumber AS FlightNo,
+        fi.SchedDepUtc,
+        ao.IataCode AS Origin,
+        ad.IataCode AS Dest
+    FROM main.FlightInstance fi
+    JOIN Flight f ON f.FlightID = fi.FlightID
+    JOIN Route r ON r.RouteID = f.RouteID
+    JOIN Airport ao ON ao.AirportID = r.OriginAirportID
+    JOIN Airport ad ON ad.AirportID = r.DestinationAirportID
+    WHERE fi.InstanceID IN (SELECT value FROM json_each(?));
+"""
+
+SQL_SET_INSTANCE_AIRCRAFT = """
+    UPDATE FlightInstance
+    SET AircraftID = ?
+    WHERE InstanceID = ? AND AircraftID = ?;
+"""
+
+SQL_AIRPORT_BY_IATA = """
+    SELECT AirportID, IataCode, Name
+    FROM Airport
+    WHERE IataCode = upper(?)
+    ORDER BY AirportID
+    LIMIT 1;
+"""
+
+# Departures from one airport whose scheduled time falls in [?, ?). The
+# FlightDate range lets the date index narrow the scan first. Main file
+# only, like the rotation legs: gates are allocated for the live season.
+SQL_GATE_DEPARTURES = """
+    SELECT
+        fi.InstanceID,
+        f.FlightNumber,
+        fi.Terminal,
+        fi.Gate,
+        CAST(strftime('%s', fi.SchedDepUtc) AS INTEGER) AS Dep,
+        CAST(strftime('%s', COALESCE(max(fi.ActualDepUtc, fi.SchedDepUtc), fi.SchedDepUtc)) AS INTEGER) AS OffBlock
+    FROM main.FlightInstance fi
+    JOIN Flight f ON f.FlightID = fi.FlightID
+    JOIN Route r ON r.RouteID = f.RouteID
+    WHERE r.OriginAirportID = ?
+      AND fi.FlightDate BETWEEN ? AND ?
+      AND fi.SchedDepUtc >= ? AND fi.SchedDepUtc < ?
+      AND fi.Status <> 'Cancelled'
+    ORDER BY fi.SchedDepUtc, fi.InstanceID;
+"""
+
+SQL_AIRPORT_GATES = """
+    SELECT Terminal, Gate
+    FROM AirportGate
+    WHERE AirportID = ?
+    ORDER BY Terminal, Gate;
+"""
+
+SQL_SET_INSTANCE_GATE = """
+    UPDATE FlightInstance
+    SET Terminal = ?, Gate = ?
+    WHERE InstanceID = ? AND Terminal IS ? AND Gate IS ?;
+"""
+
+# Legs and crew for the delay network, as epoch seconds. Standby crew do not
+# fly the leg, so they do not link it to their next one. Only live instances
+# are projected; archived seasons feed the simulator through SQL_DELAY_HISTORY.
+SQL_DELAY_LEGS = """
+    SELECT
+        fi.InstanceID,
+        fi.AircraftID,
+        CAST(strftime('%s', fi.SchedDepUtc) AS INTEGER) AS Dep,
+        CAST(strftime('%s', fi.SchedArrUtc) AS INTEGER) AS Arr,
+        CAST(strftime('%s', fi.ActualDepUtc) AS INTEGER) AS ActualDep,
+        CAST(strftime('%s', fi.ActualArrUtc) AS INTEGER) AS ActualArr
+    FROM main.FlightInstance fi
+    WHERE fi.Status <> 'Cancelled'
+      AND fi.FlightDate BETWEEN ? AND ?
+      AND {instances};
+"""
+
+SQL_DELAY_CREW = """
+    SELECT ca.InstanceID, ca.StaffID
+    FROM main.CrewAssignment ca
+    JOIN main.FlightInstance fi ON fi.InstanceID = ca.InstanceID
+    WHERE ca.DutyRole <> 'Standby'
+      AND fi.Status <> 'Cancelled'
+      AND fi.FlightDate BETWEEN ? AND ?
+      AND {instances};
+"""
+
+# Departure delays and cancellations of past instances in one database file,
+# for fitting the simulator's delay distributions.
+SQL_DELAY_HISTORY = """
+    SELECT
+        fi.FlightID,
+        f.AirlineID,
+        fi.Status = 'Cancelled' AS Cancelled,
+        (CAST(strftime('%s', fi.ActualDepUtc) AS INTEGER)
+            - CAST(strftime('%s', fi.SchedDepUtc) AS INTEGER)) / 60.0 AS DelayMinutes
+    FROM {FlightInstance} fi
+    JOIN Flight f ON f.FlightID = fi.FlightID
+    WHERE fi.FlightDate >= ? AND fi.FlightDate < ?
+      AND (fi.ActualDepUtc IS NOT NULL OR fi.Status = 'Cancelled');
+"""
+
+SQL_INSTANCE_FLIGHTS = """
+    SELECT fi.InstanceID, fi.FlightID, f.AirlineID
+    FROM main.FlightInstance fi
+    JOIN Flight f ON f.FlightID = fi.FlightID
+    WHERE fi.Status <> 'Cancelled'
+      AND fi.FlightDate BETWEEN ? AND ?;
+"""
+
+# Instances still to fly in a FlightDate range, with the pilot roles they
+# already have. Archived seasons have none left to fly, so main is enough.
+SQL_PAIRING_LEGS = """
+    SELECT
+        fi.InstanceID,
+        CAST(strftime('%s', fi.SchedDepUtc) AS INTEGER) AS Dep,
+        CAST(strftime('%s', fi.SchedArrUtc) AS INTEGER) AS Arr,
+        r.OriginAirportID,
+        r.DestinationAirportID,
+        EXISTS (
+            SELECT 1 FROM CrewAssignment ca
+            WHERE ca.InstanceID = fi.InstanceID AND ca.DutyRole = 'Captain'
+        ) AS HasCaptain,
+        EXISTS (
+            SELECT 1 FROM CrewAssignment ca
+            WHERE ca.InstanceID = fi.InstanceID AND ca.DutyRole = 'First Officer'
+        ) AS HasFirstOfficer
+    FROM main.FlightInstance fi
+    JOIN Flight f ON f.FlightID = fi.FlightID
+    JOIN Route r ON r.RouteID = f.RouteID
+    WHERE fi.Status IN ('Scheduled', 'Delayed')
+      AND fi.FlightDate BETWEEN ? AND ?
+    ORDER BY fi.SchedDepUtc, fi.InstanceID;
+"""
+
+SQL_PILOT_BASES = """
+    SELECT StaffID, BaseAirportID
+    FROM Staff
+    WHERE Role = 'Pilot'
+    ORDER BY StaffID;
+"""
+
+# Legs pilots already fly in a FlightDate range, from the main file like
+# SQL_PAIRING_LEGS.
+SQL_PILOT_BUSY = """
+    SELECT
+        ca.StaffID,
+        CAST(strftime('%s', fi.SchedDepUtc) AS INTEGER) AS Dep,
+        CAST(strftime('%s', fi.SchedArrUtc) AS INTEGER) AS Arr
+    FROM main.CrewAssignment ca
+    JOIN main.FlightInstance fi ON fi.InstanceID = ca.InstanceID
+    JOIN Staff s ON s.StaffID = ca.StaffID
+    WHERE s.Role = 'Pilot'
+      AND fi.Status <> 'Cancelled'
+      AND fi.FlightDate BETWEEN ? AND ?;
+"""
+
+# Skipped if someone else took the role in the meantime.
+SQL_INSERT_CREW_IF_ROLE_FREE = """
+    INSERT OR IGNORE INTO CrewAssignment (InstanceID, StaffID, DutyRole)
+    SELECT ?1, ?2, ?3
+    WHERE NOT EXISTS (
+        SELECT 1 FROM CrewAssignment
+        WHERE InstanceID = ?1 AND DutyRole = ?3
+    );
+"""
+
+# Station board: one airport's departures (or arrivals) scheduled in [?, ?),
+# read off InstanceStation's (airport, time) index. CROSS JOIN keeps that
+# range scan as the outer loop; everything else is a primary-key lookup.
+# InstanceStation lives in the main file, so the board shows live instances
+# only; archived seasons are searched through the flight search instead.
+SQL_STATION_DEPARTURES = """
+    SELECT
+        s.InstanceID,
+        f.FlightNumber,
+        a.IataCode AS ToIata,
+        s.SchedDepUtc,
+        fi.ActualDepUtc,
+        fi.Status,
+        fi.Terminal,
+        fi.Gate
+    FROM InstanceStation s
+    CROSS JOIN main.FlightInstance fi ON fi.InstanceID = s.InstanceID
+    CROSS JOIN Flight f ON f.FlightID = fi.FlightID
+    LEFT JOIN Airport a ON a.AirportID = s.DestAirportID
+    WHERE s.OriginAirportID = ?
+      AND s.SchedDepUtc >= ? AND s.SchedDepUtc < ?
+    ORDER BY s.SchedDepUtc, s.InstanceID;
+"""
+
+SQL_STATION_ARRIVALS = """
+    SELECT
+        s.InstanceID,
+        f.FlightNumber,
+        a.IataCode AS FromIata,
+        s.SchedArrUtc,
+        fi.ActualArrUtc,
+        fi.Status
+    FROM InstanceStation s
+    CROSS JOIN main.FlightInstance fi ON fi.InstanceID = s.InstanceID
+    CROSS JOIN Flight f ON f.FlightID = fi.FlightID
+    LEFT JOIN Airport a ON a.AirportID = s.OriginAirportID
+    WHERE s.DestAirportID = ?
+      AND s.SchedArrUtc >= ? AND s.SchedArrUtc < ?
+    ORDER BY s.SchedArrUtc, s.InstanceID;
+"""
+
+# OpenFlights reference sync (ReferenceSync.py).
+SQL_REFERENCE_HASHES = """
+    SELECT RowID, RowHash
+    FROM ReferenceRowHash
+    WHERE TableName = ?;
+"""
+
+# Formatted with the table's columns and one placeholder per key.
+SQL_REFERENCE_ROWS = """
+    SELECT {columns}
+    FROM {table}
+    WHERE {key} IN ({placeholders});
+"""
+
+SQL_UPSERT_REFERENCE_HASH = """
+    INSERT INTO ReferenceRowHash (TableName, RowID, RowHash)
+    VALUES (?, ?, ?)
+    ON CONFLICT (TableName, RowID) DO UPDATE SET RowHash = excluded.RowHash;
+"""
+
+SQL_DELETE_REFERENCE_HASH = """
+    DELETE FROM ReferenceRowHash
+    WHERE TableName = ? AND RowID = ?;
+"""
+
+SQL_USER_TABLES = """
+    SELECT name
+    FROM main.sqlite_master
+    WHERE type = 'table' AND name NOT LIKE 'sqlite_%';
+"""
+
+# Status feed ingestion (StatusFeed.py). Both take a JSON array so a whole
+# batch is one statement.
+SQL_FEED_RESOLVE_FLIGHTS = """
+    SELECT upper(f.FlightNumber), fi.FlightDate, fi.InstanceID
+    FROM json_each(?) AS k
+    JOIN Flight f
+        ON f.FlightNumber = json_extract(k.value, '$[0]') COLLATE NOCASE
+    JOIN FlightInstance fi
+        ON fi.FlightID = f.FlightID AND fi.FlightDate = json_extract(k.value, '$[1]');
+"""
+
+SQL_FEED_INSTANCE_STATE = """
+    SELECT InstanceID, Status, ActualDepUtc, ActualArrUtc, Terminal, Gate
+    FROM FlightInstance
+    WHERE InstanceID IN (SELECT value FROM json_each(?));
+"""
+
+
+
+# One UPDATE per set of changed fields; the field names come from
+# StatusFeed.FEED_FIELDS, never from the feed.
+def build_feed_update(fields: tuple[str, ...]) -> str:
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    return f"UPDATE FlightInstance SET {assignments} WHERE InstanceID = ?;"
@@ -0,0 +1,262 @@
+import argparse
+import csv
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from pathlib import Path
+
+import Queries as q
+from SeedDB import BASE_DIR, DB_PATH
+from Transactions import audited_transaction
+
+# Incremental refresh of the OpenFlights reference tables (Airline, Airport,
+# Route) from Data/OpenFlights/*.csv without touching operational data.
+# Every source row is hashed and the hash kept in ReferenceRowHash, so a
+# re-sync only looks at rows whose hash changed: new IDs are inserted,
+# changed rows updated (local edits to a row survive until its source row
+# changes), and rows the source dropped are deactivated. Airlines have an
+# Active flag for that; airports and routes are deleted, unless something
+# still references them under an ON DELETE RESTRICT key, in which case they
+# are kept and reported. Primary keys never change, so ON UPDATE CASCADE
+# never fires. Parents are written before children and deleted after them.
+
+OPENFLIGHTS_DIR = BASE_DIR / "Data" / "OpenFlights"
+BATCH_SIZE = 500
+# OpenFlights writes \N for a missing value.
+NULLS = ("", "\\N")
+
+
+def _text(value: str) -> str | None:
+    value = value.strip()
+    return None if value in NULLS else value
+
+
+def _int(value: str) -> int | None:
+    value = value.strip()
+    return None if value in NULLS else int(value)
+
+
+@dataclass(frozen=True)
+class ReferenceTable:
+    name: str
+    key: str
+    # (column, converter), key first; CSV headers match the column names.
+    columns: tuple[tuple[str, object], ...]
+    # Column set to 0 for rows the source dropped; None deletes them.
+    active_column: str | None = None
+
+    @property
+    def path(self) -> Path:
+        return OPENFLIGHTS_DIR / f"{self.name}.csv"
+
+    @property
+    def column_names(self) -> list[str]:
+        return [name for name, _ in self.columns]
+
+
+# Parent tables first.
+REFERENCE_TABLES = (
+    ReferenceTable(
+        "Airline", "AirlineID",
+        (("AirlineID", _int), ("IataCode", _text), ("IcaoCode", _text), ("Name", _text), ("Active", _int)),
+        active_column="Active",
+    ),
+    ReferenceTable(
+        "Airport", "AirportID",
+        (("AirportID", _int), ("IataCode", _text), ("IcaoCode", _text), ("Name", _text), ("City", _text),
+         ("Country", _text), ("Timezone", _text), ("Dst", _text)),
+    ),
+    ReferenceTable(
+        "Route", "RouteID",
+        (("RouteID", _int), ("OriginAirportID", _int), ("DestinationAirportID", _int), ("DistanceKm", _int)),
+    ),
+)
+
+
+@dataclass
+class TableSync:
+    table: str
+    source_rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    deactivated: int = 0
+    unchanged: int = 0
+    # Dropped by the source but still referenced, so left in place.
+    kept: list[int] = field(default_factory=list)
+    # Source rows that failed conversion: (line number, error).
+    rejected: list[tuple[int, str]] = field(default_factory=list)
+
+
+@dataclass
+class ReferenceSyncResult:
+    tables: list[TableSync] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def changed(self) -> int:
+        return sum(t.inserted + t.updated + t.deactivated for t in self.tables)
+
+
+def row_hash(values: tuple) -> int:
+    return int.from_bytes(blake2b(repr(values).encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+def read_source(table: ReferenceTable, sync: TableSync) -> tuple[dict[int, tuple], set[int]]:
+    rows: dict[int, tuple] = {}
+    # Keys of rows that failed conversion, so they are not taken as dropped.
+    bad_keys: set[int] = set()
+    with table.path.open(newline="", encoding="utf-8") as f:
+        for line, record in enumerate(csv.DictReader(f), start=2):
+            try:
+                values = tuple(convert(record[name]) for name, convert in table.columns)
+                if values[0] is None:
+                    raise ValueError(f"missing {table.key}")
+            except (KeyError, TypeError, ValueError) as e:
+                sync.rejected.append((line, f"{type(e).__name__}: {e}"))
+                try:
+                    bad_keys.add(int(record[table.key]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+                continue
+            rows[values[0]] = values
+    sync.source_rows = len(rows)
+    return rows, bad_keys
+
+
+# WHERE clause that keeps a delete from tripping a RESTRICT / NO ACTION
+# foreign key, built from the schema so new referencing tables are covered.
+def _unreferenced_guard(conn: sqlite3.Connection, table: ReferenceTable) -> str:
+    guards = []
+    for (child,) in conn.execute(q.SQL_USER_TABLES).fetchall():
+        for fk in conn.execute(f'PRAGMA main.foreign_key_list("{child}");'):
+            parent, from_col, on_delete = fk[2], fk[3], fk[6]
+            if parent == table.name and on_delete not in ("CASCADE", "SET NULL", "SET DEFAULT"):
+                guards.append(f'NOT EXISTS (SELECT 1 FROM "{child}" WHERE "{from_col}" = ?1)')
+    return " AND ".join(guards) or "1 = 1"
+
+
+def _batches(rows: list, size: int = BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+# Insert new rows and update changed ones. Returns the table's counts and
+# the keys the source no longer has.
+def upsert_table(conn: sqlite3.Connection, table: ReferenceTable) -> tuple[TableSync, list[int]]:
+    sync = TableSync(table.name)
+    source, bad_keys = read_source(table, sync)
+    stored = dict(conn.execute(q.SQL_REFERENCE_HASHES, (table.name,)))
+
+    changed = {}
+    for key, values in source.items():
+        digest = row_hash(values)
+        if stored.get(key) != digest:
+            changed[key] = (values, digest)
+    sync.unchanged = len(source) - len(changed)
+
+    if changed:
+        columns = table.column_names
+        current = {}
+        for chunk in _batches(list(changed)):
+            sql = q.SQL_REFERENCE_ROWS.format(
+                columns=", ".join(columns), table=table.name, key=table.key,
+                placeholders=", ".join("?" * len(chunk)),
+            )
+            current.update((row[0], tuple(row)) for row in conn.execute(sql, chunk))
+        inserts = [values for key, (values, _) in changed.items() if key not in current]
+        # Rows that already match (e.g. seeded ones) only get their hash.
+        updates = [
+            values[1:] + (key,)
+            for key, (values, _) in changed.items()
+            if key in current and current[key] != values
+        ]
+        insert_sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))});"
+        update_sql = f"UPDATE {table.name} SET {', '.join(f'{c} = ?' for c in columns[1:])} WHERE {table.key} = ?;"
+        for chunk in _batches(inserts):
+            conn.executemany(insert_sql, chunk)
+        for chunk in _batches(updates):
+            conn.executemany(update_sql, chunk)
+        for chunk in _batches([(table.name, key, digest) for key, (_, digest) in changed.items()]):
+            conn.executemany(q.SQL_UPSERT_REFERENCE_HASH, chunk)
+        sync.inserted, sync.updated = len(inserts), len(updates)
+        sync.unchanged += len(changed) - len(inserts) - len(updates)
+
+    # Only rows the source once had (they have a hash) count as dropped;
+    # rows added locally are left alone.
+    return sync, [key for key in stored if key not in source and key not in bad_keys]
+
+
+# Deactivate or delete the rows the source dropped.
+def drop_rows(conn: sqlite3.Connection, table: ReferenceTable, sync: TableSync, gone: list[int]) -> None:
+    if not gone:
+        return
+    forget = []
+    if table.active_column:
+        sql = f"UPDATE {table.name} SET {table.active_column} = 0 WHERE {table.key} = ? AND {table.active_column} <> 0;"
+        for chunk in _batches(gone):
+            before = conn.total_changes
+            conn.executemany(sql, [(key,) for key in chunk])
+            sync.deactivated += conn.total_changes - before
+        forget = gone
+    else:
+        sql = f"DELETE FROM {table.name} WHERE {table.key} = ?1 AND {_unreferenced_guard(conn, table)};"
+        exists_sql = f"SELECT 1 FROM {table.name} WHERE {table.key} = ?;"
+        for key in gone:
+            if conn.execute(sql, (key,)).rowcount:
+                sync.deactivated += 1
+                forget.append(key)
+            elif conn.execute(exists_sql, (key,)).fetchone():
+                sync.kept.append(key)
+            else:
+                forget.append(key)
+    for chunk in _batches([(table.name, key) for key in forget]):
+        conn.executemany(q.SQL_DELETE_REFERENCE_HASH, chunk)
+
+
+# Sync every table in one transaction: inserts and updates parents first,
+# then removals children first.
+def sync_reference_data(
+    conn: sqlite3.Connection,
+    tables: tuple[ReferenceTable, ...] = REFERENCE_TABLES,
+) -> ReferenceSyncResult:
+    started = time.perf_counter()
+    result = ReferenceSyncResult()
+    with audited_transaction(conn):
+        pending = [(table, *upsert_table(conn, table)) for table in tables]
+        for table, sync, gone in reversed(pending):
+            drop_rows(conn, table, sync, gone)
+        result.tables = [sync for _, sync, _ in pending]
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def print_sync_result(result: ReferenceSyncResult) -> None:
+    print(f"{'Table':<10} {'Source':>8} {'Inserted':>9} {'Updated':>8} {'Removed':>8} {'Kept':>6} {'Rejected':>9}")
+    for t in result.tables:
+        print(
+            f"{t.table:<10} {t.source_rows:>8,} {t.inserted:>9,} {t.updated:>8,} "
+            f"{t.deactivated:>8,} {len(t.kept):>6,} {len(t.rejected):>9,}"
+        )
+    for t in result.tables:
+        for line, error in t.rejected[:10]:
+            print(f"{t.table}.csv line {line}: {error}")
+        if t.kept:
+            print(f"{t.table} rows dropped by the source but still in use: {', '.join(map(str, t.kept[:20]))}")
+    print(f"Synced in {result.seconds:.3f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incremental OpenFlights reference data sync")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    args = parser.parse_args()
+    conn = sqlite3.connect(args.db)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    try:
+        print_sync_result(sync_reference_data(conn))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+import argparse
+import builtins
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Scripted sessions for end-to-end workflow latency. A session is a text
+# file with one input line per prompt, exactly as typed at the menu (blank
+# lines are blank answers; lines starting with "#" are comments). The driver
+# feeds it to App.main_menu through input(), captures the output, and times
+# every menu action (UI.safe_run) and every call into SQLite made through
+# get_conn connections. Sessions run against a scratch copy of the seeded
+# database, grown by --instances synthetic flight instances, never against
+# DB/FlightManagement.db. Summary reports read through their own read-only
+# connections (a process pool on large databases), so their queries count
+# towards the action's time but not its query count or DB time.
+#
+#   python3 src/Replay.py record Data/Sessions/my_session.txt
+#   python3 src/Replay.py run --instances 100000 --repeat 5
+#   python3 src/Replay.py run Data/Sessions/update_gate.txt
+
+SESSIONS_DIR = Path(__file__).resolve().parent.parent / "Data" / "Sessions"
+
+
+@dataclass
+class ActionTiming:
+    action: str
+    seconds: float = 0.0
+    queries: int = 0
+    db_seconds: float = 0.0
+    # Exception type the action failed with (shown by safe_run), if any;
+    # backing out with -q is not a failure.
+    error: str | None = None
+
+
+@dataclass
+class ReplayResult:
+    session: str
+    actions: list[ActionTiming] = field(default_factory=list)
+    seconds: float = 0.0
+    # Input left unread when the menu exited, or the action the script ran
+    # out inside.
+    unread_lines: int = 0
+    ran_out_in: str | None = None
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.current: ActionTiming | None = None
+
+    def timed(self, fn, *args):
+        if self.current is None:
+            return fn(*args)
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.current.db_seconds += time.perf_counter() - started
+
+
+class _TimedCursor:
+    def __init__(self, cursor, stats: _Stats) -> None:
+        self._cursor = cursor
+        self._stats = stats
+
+    def _query(self, fn, *args):
+        if self._stats.current is not None:
+            self._stats.current.queries += 1
+        self._stats.timed(fn, *args)
+        return self
+
+    def execute(self, sql: str, params=()):
+        return self._query(self._cursor.execute, sql, params)
+
+    def executemany(self, sql: str, rows):
+        return self._query(self._cursor.executemany, sql, rows)
+
+    def executescript(self, script: str):
+        return self._query(self._cursor.executescript, script)
+
+    def fetchone(self):
+        return self._stats.timed(self._cursor.fetchone)
+
+    def fetchmany(self, size: int | None = None):
+        return self._stats.timed(self._cursor.fetchmany, size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._stats.timed(self._cursor.fetchall)
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+
+# Stands in for the sqlite3.Connection get_conn returns; statement calls,
+# fetches, commits and rollbacks are timed against the running action.
+class TimedConnection:
+    def __init__(self, conn, stats: _Stats) -> None:
+        self._conn = conn
+        self._stats = stats
+
+    def cursor(self) -> _TimedCursor:
+        return _TimedCursor(self._conn.cursor(), self._stats)
+
+    def execute(self, sql: str, params=()) -> _TimedCursor:
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql: str, rows) -> _TimedCursor:
+        return self.cursor().executemany(sql, rows)
+
+    def executescript(self, script: str) -> _TimedCursor:
+        return self.cursor().executescript(script)
+
+    def commit(self) -> None:
+        self._stats.timed(self._conn.commit)
+
+    def rollback(self) -> None:
+        self._stats.timed(self._conn.rollback)
+
+    def __enter__(self) -> "TimedConnection":
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return self._stats.timed(self._conn.__exit__, *exc)
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+
+def read_session(path: Path) -> list[str]:
+    return [line for line in path.read_text(encoding="utf-8").splitlines() if not line.startswith("#")]
+
+
+# Point the app at a fresh scratch database in tmp_dir with `instances`
+# synthetic flight instances added. Must run before any app module is
+# imported, since they read DB_PATH at import time.
+def prepare_scratch_db(tmp_dir: str, instances: int) -> Path:
+    if "SeedDB" in sys.modules:
+        raise RuntimeError("prepare_scratch_db must run before the app modules are imported.")
+    db_path = Path(tmp_dir) / "Replay.db"
+    os.environ["FLIGHT_DB_PATH"] = str(db_path)
+    from Bench import add_synthetic_instances, connect
+    from SeedDB import ensure_db
+
+    ensure_db(db_path)
+    if instances:
+        with connect(db_path) as conn:
+            add_synthetic_instances(conn, instances)
+        conn.close()
+    return db_path
+
+
+# Run one session through the menu with input(), UI.safe_run and get_conn
+# patched, and return its timings. Output goes to `output`.
+def replay_session(name: str, lines: list[str], output) -> ReplayResult:
+    import App
+    import UI
+
+    result = ReplayResult(name)
+    stats = _Stats()
+    pending = iter(lines)
+    remaining = [len(lines)]
+
+    def scripted_input(prompt: str = "") -> str:
+        print(prompt, end="")
+        try:
+            line = next(pending)
+        except StopIteration:
+            if stats.current is not None:
+                result.ran_out_in = stats.current.action
+            raise EOFError() from None
+        remaining[0] -= 1
+        print(line)
+        return line
+
+    original_safe_run = UI.safe_run
+
+    def timed_safe_run(fn) -> None:
+        timing = ActionTiming(getattr(fn, "__name__", repr(fn)))
+
+        def run() -> None:
+            try:
+                fn()
+            except UI.AbortAction:
+                raise
+            except BaseException as e:
+                timing.error = type(e).__name__
+                raise
+
+        stats.current = timing
+        started = time.perf_counter()
+        try:
+            original_safe_run(run)
+        finally:
+            timing.seconds = time.perf_counter() - started
+            stats.current = None
+            result.actions.append(timing)
+
+    def hook(conn):
+        return TimedConnection(conn, stats)
+
+    original_input = builtins.input
+    builtins.input = scripted_input
+    UI.safe_run = timed_safe_run
+    App.connection_hooks.append(hook)
+    started = time.perf_counter()
+    try:
+        with redirect_stdout(output):
+            App.main_menu()
+    finally:
+        result.seconds = time.perf_counter() - started
+        App.connection_hooks.remove(hook)
+        UI.safe_run = original_safe_run
+        builtins.input = original_input
+    result.unread_lines = remaining[0]
+    return result
+
+
+def print_replay_report(results: list[ReplayResult]) -> None:
+    from UI import print_rows
+
+    by_action: dict[str, list[ActionTiming]] = {}
+    for result in results:
+        for timing in result.actions:
+            by_action.setdefault(timing.action, []).append(timing)
+
+    rows = []
+    for action, timings in by_action.items():
+        ms = [t.seconds * 1000 for t in timings]
+        total = sum(t.seconds for t in timings)
+        db = sum(t.db_seconds for t in timings)
+        rows.append((
+            action,
+            len(timings),
+            f"{statistics.median(ms):.1f}",
+            f"{statistics.mean(ms):.1f}",
+            f"{max(ms):.1f}",
+            f"{sum(t.queries for t in timings) / len(timings):.1f}",
+            f"{db * 1000 / len(timings):.1f}",
+            f"{db / total:.0%}" if total else "-",
+            sum(1 for t in timings if t.error),
+        ))
+    print_rows(["Action", "Runs", "p50 ms", "Mean ms", "Max ms", "Queries/run", "DB ms/run", "DB share", "Errors"], rows)
+
+    for result in results:
+        if result.ran_out_in:
+            print(f"{result.session}: script ended inside {result.ran_out_in}.")
+        elif result.unread_lines:
+            print(f"{result.session}: {result.unread_lines} line(s) left after the menu exited.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay scripted menu sessions and time each workflow")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Replay sessions and report per-action latency")
+    run.add_argument("sessions", nargs="*", type=Path, help="Session files (default: Data/Sessions/*.txt)")
+    run.add_argument("--instances", type=int, default=0, help="Synthetic flight instances added to the scratch database")
+    run.add_argument("--repeat", type=int, default=1)
+    run.add_argument("--transcript", type=Path, help="Write the captured session output here")
+
+    record = sub.add_parser("record", help="Use the app interactively and save every input line as a session")
+    record.add_argument("session", type=Path)
+    record.add_argument("--instances", type=int, default=0)
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = prepare_scratch_db(tmp, args.instances)
+        print(f"Scratch database: {db_path.stat().st_size / 1e6:,.1f} MB, {args.instances:,} synthetic instances")
+
+        if args.command == "record":
+            import App
+
+            typed = []
+            original_input = builtins.input
+
+            def recording_input(prompt: str = "") -> str:
+                line = original_input(prompt)
+                typed.append(line)
+                return line
+
+            builtins.input = recording_input
+            try:
+                App.main_menu()
+            finally:
+                builtins.input = original_input
+                args.session.parent.mkdir(parents=True, exist_ok=True)
+                args.session.write_text("".join(f"{line}\n" for line in typed), encoding="utf-8")
+                print(f"Saved {len(typed)} input line(s) to {args.session}")
+            return
+
+        results = []
+        with open(args.transcript or os.devnull, "w", encoding="utf-8") as output:
+            sessions = args.sessions or sorted(SESSIONS_DIR.glob("*.txt"))
+            for _ in range(args.repeat):
+                for path in sessions:
+                    results.append(replay_session(path.name, read_session(path), output))
+        print_replay_report(results)
+
+
+if __name__ == "__main__":
+    main()
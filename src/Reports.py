@@ -0,0 +1,280 @@
+import heapq
+import json
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import repeat
+from pathlib import Path
+from typing import Callable, Iterable
+
+import Queries as q
+from Partitions import PARTITIONED_TABLES, attach_partitions, partitions_in_range
+from SeedDB import DB_PATH
+
+# Summary and analytics reports. A report is split into shards (FlightDate
+# ranges of one database file, or groups of airlines) that run on read-only
+# connections across a process pool. Each shard returns partial aggregates;
+# they are merged here and derived columns (rates, averages) are computed once
+# at the end, so the result matches a single query over the whole table.
+
+MIN_DATE = "0000-01-01"
+MAX_DATE = "9999-12-31"
+SHARDS_PER_WORKER = 2
+
+# Below this many rows to scan, starting a pool costs more than it saves and
+# the shards run in-process instead.
+PARALLEL_MIN_ROWS = 20000
+
+
+@dataclass(frozen=True)
+class Shard:
+    schema: str = "main"
+    date_from: str = MIN_DATE
+    date_to: str = MAX_DATE
+    airline_ids: tuple[int, ...] | None = None
+
+
+@dataclass(frozen=True)
+class ReportSpec:
+    shard_sql: str
+    headers: tuple[str, ...]
+    # Leading key columns, then one merge op ("sum", "min", "max") per
+    # aggregate column.
+    keys: int
+    merge: tuple[str, ...]
+    finish: Callable[[list[tuple]], list[tuple]]
+    shard_by: str = "date"
+
+
+def _ratio(part, whole) -> float | None:
+    return part / whole if part is not None and whole else None
+
+
+def _percent(value: float | None) -> str | None:
+    return None if value is None else f"{100 * value:.1f}%"
+
+
+def _finish_destinations(rows: list[tuple]) -> list[tuple]:
+    return sorted(rows, key=lambda r: (-r[2], r[0] or "", r[1] or ""))
+
+
+def _finish_pilots(rows: list[tuple]) -> list[tuple]:
+    return sorted(rows, key=lambda r: (-r[3], r[2], r[1], r[0]))
+
+
+def _finish_load_factor(rows: list[tuple]) -> list[tuple]:
+    finished = []
+    for instance_id, flight_no, flight_date, tail, seats, taken in rows:
+        load = _ratio(taken, seats)
+        seats_left = seats - taken if seats is not None else None
+        finished.append((instance_id, flight_no, flight_date, tail, seats, taken, seats_left, load))
+    # Highest load first; instances without a capacity go last.
+    finished.sort(key=lambda r: (r[7] is not None, r[7] or 0, r[2], r[0]), reverse=True)
+    return [r[:7] + (_percent(r[7]),) for r in finished]
+
+
+def _finish_airline_traffic(rows: list[tuple]) -> list[tuple]:
+    return [
+        (month, airline, flights, cancelled, seats, taken,
+         _percent(_ratio(taken, seats)), _percent(_ratio(cancelled, flights)))
+        for month, airline, flights, cancelled, seats, taken in sorted(rows, key=lambda r: (r[0], r[1]))
+    ]
+
+
+def _finish_punctuality(rows: list[tuple]) -> list[tuple]:
+    finished = []
+    for origin, dest, flights, departed, on_time, delay_minutes, max_delay in rows:
+        average = _ratio(delay_minutes, departed)
+        finished.append((
+            origin,
+            dest,
+            flights,
+            departed,
+            _percent(_ratio(on_time, departed)),
+            None if average is None else round(average, 1),
+            max_delay,
+        ))
+    return sorted(finished, key=lambda r: (-r[2], r[0] or "", r[1] or ""))
+
+
+REPORTS: dict[str, ReportSpec] = {
+    "Flights Per Destination": ReportSpec(
+        q.SQL_SHARD_FLIGHTS_PER_DESTINATION,
+        ("DestIata", "DestinationName", "Flights"),
+        2, ("sum",), _finish_destinations, shard_by="airline",
+    ),
+    "Flights Per Pilot": ReportSpec(
+        q.SQL_SHARD_FLIGHTS_PER_PILOT,
+        ("StaffID", "FirstName", "LastName", "AssignedInstances"),
+        3, ("sum",), _finish_pilots,
+    ),
+    "Load Factor Per Instance": ReportSpec(
+        q.SQL_SHARD_LOAD_FACTOR,
+        ("InstanceID", "FlightNo", "Date", "Tail", "Seats", "Taken", "SeatsLeft", "LoadFactor"),
+        6, (), _finish_load_factor,
+    ),
+    "Monthly Traffic Per Airline": ReportSpec(
+        q.SQL_SHARD_MONTHLY_AIRLINE_TRAFFIC,
+        ("Month", "Airline", "Flights", "Cancelled", "Seats", "Taken", "LoadFactor", "CancelRate"),
+        2, ("sum", "sum", "sum", "sum"), _finish_airline_traffic,
+    ),
+    "On-Time Performance Per Route": ReportSpec(
+        q.SQL_SHARD_ROUTE_PUNCTUALITY,
+        ("Origin", "Dest", "Flights", "Departed", "OnTime", "AvgDelayMin", "MaxDelayMin"),
+        2, ("sum", "sum", "sum", "sum", "max"), _finish_punctuality,
+    ),
+}
+
+
+def open_read_only(db_path: Path = DB_PATH) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path.resolve().as_uri() + "?mode=ro", uri=True)
+    attach_partitions(conn)
+    return conn
+
+
+def _tables(schema: str) -> dict[str, str]:
+    return {table: f"{schema}.{table}" for table in PARTITIONED_TABLES}
+
+
+def shard_query(spec: ReportSpec, shard: Shard) -> tuple[str, tuple]:
+    if shard.airline_ids is not None:
+        predicate = "f.AirlineID IN (SELECT value FROM json_each(?))"
+        params = (json.dumps(list(shard.airline_ids)),)
+    else:
+        predicate = "fi.FlightDate >= ? AND fi.FlightDate < ?"
+        params = (shard.date_from, shard.date_to)
+    return spec.shard_sql.format(shard=predicate, **_tables(shard.schema)), params
+
+
+def _date_sources(conn: sqlite3.Connection, date_from: str, date_to: str) -> list[tuple[str, int]]:
+    last_day = (date.fromisoformat(date_to) - timedelta(days=1)).isoformat() if date_to != MAX_DATE else None
+    schemas = ["main"] + [p.schema for p in partitions_in_range(conn, date_from, last_day)]
+    return [
+        (schema, conn.execute(q.SQL_INSTANCE_DATE_SPAN.format(**_tables(schema)), (date_from, date_to)).fetchone()[0])
+        for schema in schemas
+    ]
+
+
+# Split each database file's [date_from, date_to) into date ranges holding
+# about the same number of instances, found by OFFSET on the FlightDate index.
+# Files get shards in proportion to their size.
+def _plan_date_shards(conn: sqlite3.Connection, target: int, date_from: str, date_to: str) -> list[Shard]:
+    sources = [(schema, n) for schema, n in _date_sources(conn, date_from, date_to) if n]
+    total = sum(n for _, n in sources)
+    if not total:
+        return [Shard("main", date_from, date_to)]
+
+    shards = []
+    for schema, n in sources:
+        pieces = max(1, round(target * n / total))
+        sql = q.SQL_INSTANCE_DATE_AT.format(**_tables(schema))
+        bounds = [date_from]
+        for i in range(1, pieces):
+            bound = conn.execute(sql, (date_from, date_to, i * n // pieces)).fetchone()[0]
+            if bound > bounds[-1]:
+                bounds.append(bound)
+        bounds.append(date_to)
+        shards += [Shard(schema, lo, hi) for lo, hi in zip(bounds, bounds[1:])]
+    return shards
+
+
+# Spread airlines over shards by flight count, biggest first onto the
+# lightest shard.
+def _plan_airline_shards(conn: sqlite3.Connection, target: int) -> list[Shard]:
+    counts = conn.execute(q.SQL_FLIGHTS_PER_AIRLINE).fetchall()
+    if not counts:
+        return [Shard(airline_ids=())]
+    groups: list[list[int]] = [[] for _ in range(min(target, len(counts)))]
+    # (load, group index); the index also breaks ties between equal loads.
+    loads = [(0, i) for i in range(len(groups))]
+    for airline_id, flights in counts:
+        load, i = loads[0]
+        groups[i].append(airline_id)
+        heapq.heapreplace(loads, (load + flights, i))
+    return [Shard(airline_ids=tuple(sorted(ids))) for ids in groups]
+
+
+def plan_shards(
+    conn: sqlite3.Connection,
+    spec: ReportSpec,
+    target: int,
+    date_from: str = MIN_DATE,
+    date_to: str = MAX_DATE,
+) -> list[Shard]:
+    if spec.shard_by == "airline":
+        return _plan_airline_shards(conn, target)
+    return _plan_date_shards(conn, target, date_from, date_to)
+
+
+def work_size(conn: sqlite3.Connection, spec: ReportSpec, date_from: str = MIN_DATE, date_to: str = MAX_DATE) -> int:
+    if spec.shard_by == "airline":
+        return sum(n for _, n in conn.execute(q.SQL_FLIGHTS_PER_AIRLINE))
+    return sum(n for _, n in _date_sources(conn, date_from, date_to))
+
+
+def _merge_value(op: str, a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if op == "sum":
+        return a + b
+    return min(a, b) if op == "min" else max(a, b)
+
+
+def merge_partials(spec: ReportSpec, partials: Iterable[list[tuple]]) -> list[tuple]:
+    merged: dict[tuple, list] = {}
+    for rows in partials:
+        for row in rows:
+            key = row[:spec.keys]
+            values = merged.get(key)
+            if values is None:
+                merged[key] = list(row[spec.keys:])
+                continue
+            for i, op in enumerate(spec.merge):
+                values[i] = _merge_value(op, values[i], row[spec.keys + i])
+    return [key + tuple(values) for key, values in merged.items()]
+
+
+# One read-only connection per worker process and database file.
+_worker_conns: dict[str, sqlite3.Connection] = {}
+
+
+def _run_shard(db_path: str, report: str, shard: Shard) -> list[tuple]:
+    conn = _worker_conns.get(db_path)
+    if conn is None:
+        conn = _worker_conns[db_path] = open_read_only(Path(db_path))
+    sql, params = shard_query(REPORTS[report], shard)
+    return conn.execute(sql, params).fetchall()
+
+
+# Run a report and return (headers, rows). date_from/date_to (inclusive)
+# limit date-sharded reports to a FlightDate range. workers defaults to the
+# CPU count; small reports run in-process whatever the worker count.
+def run_report(
+    name: str,
+    db_path: Path = DB_PATH,
+    workers: int | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    parallel_min_rows: int = PARALLEL_MIN_ROWS,
+) -> tuple[list[str], list[tuple]]:
+    spec = REPORTS[name]
+    workers = workers or os.cpu_count() or 1
+    lower = date_from or MIN_DATE
+    upper = (date.fromisoformat(date_to) + timedelta(days=1)).isoformat() if date_to else MAX_DATE
+
+    with closing(open_read_only(db_path)) as conn:
+        parallel = workers > 1 and work_size(conn, spec, lower, upper) >= parallel_min_rows
+        shards = plan_shards(conn, spec, workers * SHARDS_PER_WORKER if parallel else 1, lower, upper)
+        if not parallel or len(shards) == 1:
+            partials = [conn.execute(*shard_query(spec, shard)).fetchall() for shard in shards]
+            return list(spec.headers), spec.finish(merge_partials(spec, partials))
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+        partials = pool.map(_run_shard, repeat(str(db_path)), repeat(name), shards)
+        rows = merge_partials(spec, partials)
+    return list(spec.headers), spec.finish(rows)
@@ -0,0 +1,250 @@
+import sqlite3
+from dataclasses import dataclass, field
+
+import Queries as q
+from Timeline import IntervalTimeline
+from Transactions import audited_transaction
+
+# Aircraft rotations: each tail's legs in departure order. check_rotations
+# sweeps every tail's timeline once, keeping the latest arrival seen so far,
+# to find legs that overlap or leave too little turn time, and legs that
+# depart from somewhere other than where the tail last landed.
+# propose_assignments moves the offending legs onto tails that are free and
+# in the right place, fitting each leg into the tightest gap it can.
+
+MIN_TURN_MINUTES = 30
+MIN_DATE = "0000-01-01"
+MAX_DATE = "9999-12-31"
+
+OVERLAP = "Overlap"
+SHORT_TURN = "Short turn"
+CONTINUITY = "Continuity break"
+OUT_OF_SERVICE = "Out of service"
+# Issues that move a leg to another tail. Continuity breaks are reported but
+# left alone by default, since they are often planned positioning flights.
+REASSIGN_KINDS = (OVERLAP, SHORT_TURN, OUT_OF_SERVICE)
+
+
+@dataclass(slots=True)
+class Leg:
+    instance_id: int
+    aircraft_id: int
+    dep: int
+    arr: int
+    origin: int
+    dest: int
+    seats_taken: int
+
+
+@dataclass(frozen=True)
+class Aircraft:
+    aircraft_id: int
+    tail: str | None
+    seats: int
+    in_service: bool
+
+
+@dataclass(frozen=True)
+class RotationIssue:
+    kind: str
+    aircraft_id: int
+    instance_id: int
+    # The earlier leg it clashes with, if any.
+    previous_instance_id: int | None = None
+
+
+@dataclass(frozen=True)
+class Proposal:
+    instance_id: int
+    from_aircraft_id: int
+    to_aircraft_id: int | None
+    reason: str
+
+
+@dataclass
+class RotationPlan:
+    issues: list[RotationIssue] = field(default_factory=list)
+    proposals: list[Proposal] = field(default_factory=list)
+
+    @property
+    def unresolved(self) -> list[Proposal]:
+        return [p for p in self.proposals if p.to_aircraft_id is None]
+
+
+def load_legs(conn: sqlite3.Connection, date_from: str | None = None, date_to: str | None = None) -> list[Leg]:
+    return [
+        Leg(*row)
+        for row in conn.execute(q.SQL_ROTATION_LEGS, (date_from or MIN_DATE, date_to or MAX_DATE))
+    ]
+
+
+def load_fleet(conn: sqlite3.Connection) -> dict[int, Aircraft]:
+    return {
+        row[0]: Aircraft(row[0], row[1], row[2] or 0, bool(row[3]))
+        for row in conn.execute(q.SQL_FLEET)
+    }
+
+
+def rotations(legs: list[Leg]) -> dict[int, list[Leg]]:
+    by_tail: dict[int, list[Leg]] = {}
+    for leg in legs:
+        by_tail.setdefault(leg.aircraft_id, []).append(leg)
+    for tail_legs in by_tail.values():
+        tail_legs.sort(key=lambda leg: (leg.dep, leg.instance_id))
+    return by_tail
+
+
+def check_rotations(
+    legs: list[Leg],
+    fleet: dict[int, Aircraft],
+    min_turn_minutes: int = MIN_TURN_MINUTES,
+) -> list[RotationIssue]:
+    turn = min_turn_minutes * 60
+    issues = []
+    for aircraft_id, tail_legs in rotations(legs).items():
+        aircraft = fleet.get(aircraft_id)
+        latest: Leg | None = None
+        previous: Leg | None = None
+        for leg in tail_legs:
+            if aircraft is None or not aircraft.in_service:
+                issues.append(RotationIssue(OUT_OF_SERVICE, aircraft_id, leg.instance_id))
+            if latest is not None and leg.dep < latest.arr:
+                issues.append(RotationIssue(OVERLAP, aircraft_id, leg.instance_id, latest.instance_id))
+            elif latest is not None and leg.dep < latest.arr + turn:
+                issues.append(RotationIssue(SHORT_TURN, aircraft_id, leg.instance_id, latest.instance_id))
+            elif previous is not None and leg.origin != previous.dest:
+                issues.append(RotationIssue(CONTINUITY, aircraft_id, leg.instance_id, previous.instance_id))
+            previous = leg
+            if latest is None or leg.arr > latest.arr:
+                latest = leg
+    return issues
+
+
+# One tail's fixed legs, searchable by departure time.
+class _Timeline(IntervalTimeline):
+    __slots__ = ("aircraft",)
+
+    def __init__(self, aircraft: Aircraft, legs: list[Leg]) -> None:
+        super().__init__([(leg.dep, leg.arr, leg) for leg in legs])
+        self.aircraft = aircraft
+
+    # Idle time before the leg if it fits between its neighbours in time and
+    # place, else None. A tail with no earlier leg can take it from anywhere,
+    # at infinite idle.
+    def fit_leg(self, leg: Leg, turn: int) -> float | None:
+        idle = self.fit(leg.dep, leg.arr, turn)
+        if idle is None:
+            return None
+        before, after = self.neighbours(leg.dep)
+        if before is not None and before.dest != leg.origin:
+            return None
+        if after is not None and after.origin != leg.dest:
+            return None
+        return idle
+
+    def insert_leg(self, leg: Leg) -> None:
+        self.insert(leg.dep, leg.arr, leg)
+
+
+# Greedy tail assignment: legs to move are taken in departure order while a
+# sweep over the fixed legs tracks where each tail last landed, so only
+# tails sitting at the leg's origin are candidates. Among those that fit
+# (turn time, seats, and the tail's next leg still departing from the
+# leg's destination) the one idle the shortest wins (best fit). Tails with
+# no earlier leg are the fallback. Legs nothing can take come back with
+# to_aircraft_id None.
+def propose_assignments(
+    legs: list[Leg],
+    fleet: dict[int, Aircraft],
+    issues: list[RotationIssue],
+    min_turn_minutes: int = MIN_TURN_MINUTES,
+    kinds: tuple[str, ...] = REASSIGN_KINDS,
+) -> list[Proposal]:
+    turn = min_turn_minutes * 60
+    reasons: dict[int, str] = {}
+    for issue in issues:
+        if issue.kind in kinds:
+            reasons.setdefault(issue.instance_id, issue.kind)
+
+    in_service = {a.aircraft_id: a for a in fleet.values() if a.in_service}
+    fixed = [leg for leg in legs if leg.instance_id not in reasons and leg.aircraft_id in in_service]
+    by_tail = rotations(fixed)
+    timelines = {
+        aircraft_id: _Timeline(aircraft, by_tail.get(aircraft_id, []))
+        for aircraft_id, aircraft in in_service.items()
+    }
+
+    sweep = sorted(fixed, key=lambda leg: (leg.dep, leg.instance_id))
+    position = 0
+    last_leg: dict[int, Leg] = {}
+    at_airport: dict[int, set[int]] = {}
+    unplaced = set(timelines)
+
+    def advance(leg: Leg) -> None:
+        previous = last_leg.get(leg.aircraft_id)
+        if previous is None:
+            unplaced.discard(leg.aircraft_id)
+        else:
+            at_airport[previous.dest].discard(leg.aircraft_id)
+        last_leg[leg.aircraft_id] = leg
+        at_airport.setdefault(leg.dest, set()).add(leg.aircraft_id)
+
+    to_move = sorted(
+        (leg for leg in legs if leg.instance_id in reasons),
+        key=lambda leg: (leg.dep, leg.instance_id),
+    )
+    proposals = []
+    for leg in to_move:
+        while position < len(sweep) and sweep[position].dep < leg.dep:
+            advance(sweep[position])
+            position += 1
+
+        best: _Timeline | None = None
+        best_idle = float("inf")
+        for candidates in (at_airport.get(leg.origin, ()), unplaced):
+            for aircraft_id in sorted(candidates):
+                timeline = timelines[aircraft_id]
+                if timeline.aircraft.seats < leg.seats_taken:
+                    continue
+                idle = timeline.fit_leg(leg, turn)
+                if idle is not None and (best is None or idle < best_idle):
+                    best, best_idle = timeline, idle
+            if best is not None:
+                break
+
+        reason = reasons[leg.instance_id]
+        if best is None:
+            proposals.append(Proposal(leg.instance_id, leg.aircraft_id, None, reason))
+            continue
+        moved = Leg(leg.instance_id, best.aircraft.aircraft_id, leg.dep, leg.arr, leg.origin, leg.dest, leg.seats_taken)
+        best.insert_leg(moved)
+        advance(moved)
+        proposals.append(Proposal(leg.instance_id, leg.aircraft_id, best.aircraft.aircraft_id, reason))
+    return proposals
+
+
+def plan_rotations(
+    conn: sqlite3.Connection,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    min_turn_minutes: int = MIN_TURN_MINUTES,
+    kinds: tuple[str, ...] = REASSIGN_KINDS,
+) -> RotationPlan:
+    legs = load_legs(conn, date_from, date_to)
+    fleet = load_fleet(conn)
+    issues = check_rotations(legs, fleet, min_turn_minutes)
+    return RotationPlan(issues, propose_assignments(legs, fleet, issues, min_turn_minutes, kinds))
+
+
+# Write the resolved proposals in one transaction. A leg whose tail changed
+# since the plan was made is left alone. Returns the number of legs moved.
+def apply_proposals(conn: sqlite3.Connection, proposals: list[Proposal]) -> int:
+    rows = [
+        (p.to_aircraft_id, p.instance_id, p.from_aircraft_id)
+        for p in proposals
+        if p.to_aircraft_id is not None
+    ]
+    if not rows:
+        return 0
+    with audited_transaction(conn):
+        return conn.executemany(q.SQL_SET_INSTANCE_AIRCRAFT, rows).rowcount
@@ -0,0 +1,162 @@
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+import Queries as q
+from LocalTime import UTC_FORMAT, local_to_utc, parse_zone
+from Partitions import partitions_in_range
+from Transactions import audited_transaction, deferred_audit_search
+
+# Recurring schedules: one request expands into a FlightInstance per
+# operating day between two dates. Days of week use the timetable
+# convention, 1 = Monday ... 7 = Sunday, e.g. "1234567" (daily) or "1.3.5.."
+# (Mon, Wed, Fri). The departure time is either UTC or local time at the
+# origin airport; with local times FlightDate is the local departure date.
+
+TIME_BASES = ["UTC", "Local"]
+AUDIT_USER = "SCHEDULE"
+
+
+@dataclass(frozen=True)
+class ScheduleRequest:
+    flight_id: int
+    first_date: str
+    last_date: str
+    days: str
+    departure_time: str
+    block_minutes: int
+    aircraft_id: int
+    time_basis: str = "UTC"
+    terminal: str | None = None
+    gate: str | None = None
+
+
+@dataclass
+class ScheduleResult:
+    created: int = 0
+    # FlightDates skipped because the flight already operates that day.
+    duplicates: list[str] = field(default_factory=list)
+
+
+def parse_days(pattern: str) -> frozenset[int]:
+    days = frozenset(int(c) for c in pattern if c.isdigit())
+    if not days or not days <= set(range(1, 8)) or any(c not in "1234567. " for c in pattern):
+        raise ValueError("Days must be digits 1 (Mon) to 7 (Sun), e.g. 1234567 or 1.3.5..")
+    return days
+
+
+def parse_departure_time(value: str) -> tuple[int, int]:
+    try:
+        parsed = datetime.strptime(value.strip(), "%H:%M")
+    except ValueError:
+        raise ValueError("Departure time must be HH:MM.") from None
+    return parsed.hour, parsed.minute
+
+
+def _validate(conn: sqlite3.Connection, request: ScheduleRequest):
+    if request.time_basis not in TIME_BASES:
+        raise ValueError(f"Time basis must be one of {', '.join(TIME_BASES)}.")
+    try:
+        first = date.fromisoformat(request.first_date)
+        last = date.fromisoformat(request.last_date)
+    except ValueError:
+        raise ValueError("Dates must be YYYY-MM-DD.") from None
+    if last < first:
+        raise ValueError("Last date is before first date.")
+    if request.block_minutes <= 0:
+        raise ValueError("Block time must be positive.")
+    flight = conn.execute(q.SQL_FLIGHT_SCHEDULE_INFO, (request.flight_id,)).fetchone()
+    if flight is None:
+        raise ValueError(f"Flight {request.flight_id} not found.")
+    if conn.execute(q.SQL_AIRCRAFT_IN_SERVICE_BY_ID, (request.aircraft_id,)).fetchone() is None:
+        raise ValueError(f"Aircraft {request.aircraft_id} is not in service.")
+    return first, last, parse_zone(flight[1], flight[2])
+
+
+# (FlightDate, SchedDepUtc, SchedArrUtc) for every operating day.
+def expand_schedule(conn: sqlite3.Connection, request: ScheduleRequest) -> list[tuple[str, str, str]]:
+    first, last, zone = _validate(conn, request)
+    days = parse_days(request.days)
+    hour, minute = parse_departure_time(request.departure_time)
+    block = timedelta(minutes=request.block_minutes)
+    local = request.time_basis == "Local"
+
+    legs = []
+    day = first
+    while day <= last:
+        if day.isoweekday() in days:
+            departure = datetime(day.year, day.month, day.day, hour, minute)
+            if local:
+                departure = local_to_utc(zone, departure)
+            legs.append((
+                day.isoformat(),
+                departure.strftime(UTC_FORMAT),
+                (departure + block).strftime(UTC_FORMAT),
+            ))
+        day += timedelta(days=1)
+    return legs
+
+
+# Dates in [first_date, last_date] the flight already operates, in the main
+# file or an archived season.
+def _instance_dates(conn: sqlite3.Connection, flight_id: int, first_date: str, last_date: str) -> set[str]:
+    schemas = ["main"] + [p.schema for p in partitions_in_range(conn, first_date, last_date)]
+    dates = set()
+    for schema in schemas:
+        sql = q.SQL_INSTANCE_DATES_FOR_FLIGHT.format(FlightInstance=f"{schema}.FlightInstance")
+        dates.update(row[0] for row in conn.execute(sql, (flight_id, first_date, last_date)))
+    return dates
+
+# Rows to insert for the requests, skipping days the flight already operates
+# (in the database or earlier in the same call).
+def _plan_instances(conn: sqlite3.Connection, requests: list[ScheduleRequest]) -> tuple[ScheduleResult, list[tuple]]:
+    result = ScheduleResult()
+    rows = []
+    taken: dict[int, set[str]] = {}
+    for request in requests:
+        legs = expand_schedule(conn, request)
+        if not legs:
+            continue
+        existing = taken.get(request.flight_id)
+        if existing is None:
+            existing = taken[request.flight_id] = set()
+        existing.update(_instance_dates(conn, request.flight_id, legs[0][0], legs[-1][0]))
+        for flight_date, dep_utc, arr_utc in legs:
+            if flight_date in existing:
+                result.duplicates.append(flight_date)
+                continue
+            existing.add(flight_date)
+            rows.append((
+                request.flight_id,
+                flight_date,
+                dep_utc,
+                arr_utc,
+                request.terminal,
+                request.gate,
+                request.aircraft_id,
+            ))
+    return result, rows
+
+
+# Expand and insert one or more schedules in a single transaction. Days the
+# flight already operates (in the database or earlier in the same call) are
+# skipped and reported; with skip_duplicates=False any duplicate aborts the
+# whole call with ValueError and nothing is written. Audit entries are
+# written as SCHEDULE so bulk loads stay out of the USER audit log view.
+def generate_schedule(
+    conn: sqlite3.Connection,
+    requests: list[ScheduleRequest],
+    skip_duplicates: bool = True,
+) -> ScheduleResult:
+    # The dates already taken are read inside the write transaction, so a
+    # concurrent generation cannot add the same days in between.
+    with audited_transaction(conn, AUDIT_USER):
+        result, rows = _plan_instances(conn, requests)
+        if result.duplicates and not skip_duplicates:
+            raise ValueError(
+                f"{len(result.duplicates)} date(s) already scheduled, first {min(result.duplicates)}."
+            )
+        with deferred_audit_search(conn):
+            conn.executemany(q.SQL_INSERT_SCHEDULED_INSTANCE, rows)
+    result.created = len(rows)
+    return result
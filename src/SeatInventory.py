@@ -0,0 +1,326 @@
+import sqlite3
+from dataclasses import dataclass
+from functools import lru_cache
+
+import Queries as q
+
+# Aircraft only store a SeatCapacity, so the cabin layout is derived from it:
+# widebodies (9 abreast) get a First cabin, narrowbodies (6 abreast) do not.
+WIDEBODY_MIN_SEATS = 250
+NARROWBODY_LETTERS = "ABCDEF"
+WIDEBODY_LETTERS = "ABCDEFGHK"
+
+# Share of the seats in each premium cabin. Economy takes the remainder.
+NARROWBODY_CABIN_SHARES = (("Business", 0.08), ("Premium Economy", 0.10))
+WIDEBODY_CABIN_SHARES = (("First", 0.03), ("Business", 0.12), ("Premium Economy", 0.10))
+
+CABIN_CLASSES = ["First", "Business", "Premium Economy", "Economy"]
+
+
+@dataclass(frozen=True)
+class CabinLayout:
+    cabin: str
+    seats: tuple[str, ...]
+
+
+# Split SeatCapacity into whole rows per cabin, numbered from row 1 at the front.
+@lru_cache(maxsize=None)
+def aircraft_layout(seat_capacity: int) -> tuple[CabinLayout, ...]:
+    if seat_capacity >= WIDEBODY_MIN_SEATS:
+        letters, shares = WIDEBODY_LETTERS, WIDEBODY_CABIN_SHARES
+    else:
+        letters, shares = NARROWBODY_LETTERS, NARROWBODY_CABIN_SHARES
+
+    per_row = len(letters)
+    cabins: list[CabinLayout] = []
+    row = 1
+    remaining = seat_capacity
+    for cabin, share in shares:
+        rows = max(1, round(seat_capacity * share / per_row))
+        seats = tuple(
+            f"{r}{letter}" for r in range(row, row + rows) for letter in letters
+        )[:remaining]
+        if not seats:
+            continue
+        cabins.append(CabinLayout(cabin, seats))
+        row += rows
+        remaining -= len(seats)
+
+    seats = []
+    while len(seats) < remaining:
+        seats.extend(f"{row}{letter}" for letter in letters)
+        row += 1
+    if remaining:
+        cabins.append(CabinLayout("Economy", tuple(seats[:remaining])))
+    return tuple(cabins)
+
+
+@lru_cache(maxsize=None)
+def seat_index(seat_capacity: int) -> dict[str, tuple[str, int]]:
+    return {
+        seat: (layout.cabin, bit)
+        for layout in aircraft_layout(seat_capacity)
+        for bit, seat in enumerate(layout.seats)
+    }
+
+
+# Occupied seats of one cabin as an int bitmap (bit n = n-th seat in the cabin).
+class CabinBitmap:
+    __slots__ = ("layout", "bits", "taken", "full_mask")
+
+    def __init__(self, layout: CabinLayout) -> None:
+        self.layout = layout
+        self.bits = 0
+        self.taken = 0
+        self.full_mask = (1 << len(layout.seats)) - 1
+
+    @property
+    def capacity(self) -> int:
+        return len(self.layout.seats)
+
+    def set(self, bit: int) -> bool:
+        mask = 1 << bit
+        if self.bits & mask:
+            return False
+        self.bits |= mask
+        self.taken += 1
+        return True
+
+    def clear(self, bit: int) -> bool:
+        mask = 1 << bit
+        if not self.bits & mask:
+            return False
+        self.bits &= ~mask
+        self.taken -= 1
+        return True
+
+    def next_free_seat(self) -> str | None:
+        free = ~self.bits & self.full_mask
+        if not free:
+            return None
+        return self.layout.seats[(free & -free).bit_length() - 1]
+
+
+# Seat map for one FlightInstance. Seats the layout does not know about are
+# only accepted from stored rows (legacy data): they still count as taken but
+# sit outside the cabin bitmaps. New holds must name a seat in the layout.
+class SeatMap:
+    def __init__(self, instance_id: int, seat_capacity: int, version: int) -> None:
+        self.instance_id = instance_id
+        self.seat_capacity = seat_capacity
+        self.version = version
+        self.index = seat_index(seat_capacity)
+        self.cabins = {
+            layout.cabin: CabinBitmap(layout) for layout in aircraft_layout(seat_capacity)
+        }
+        self.unplaced: set[str] = set()
+
+    @property
+    def seats_taken(self) -> int:
+        return sum(c.taken for c in self.cabins.values()) + len(self.unplaced)
+
+    def has_seat(self, seat_no: str) -> bool:
+        return seat_no.upper() in self.index
+
+    def cabin_of(self, seat_no: str) -> str | None:
+        placed = self.index.get(seat_no.upper())
+        return placed[0] if placed else None
+
+    def is_taken(self, seat_no: str) -> bool:
+        placed = self.index.get(seat_no.upper())
+        if placed is None:
+            return seat_no.upper() in self.unplaced
+        cabin, bit = placed
+        return bool(self.cabins[cabin].bits >> bit & 1)
+
+    def occupy(self, seat_no: str, legacy: bool = False) -> bool:
+        seat_no = seat_no.upper()
+        placed = self.index.get(seat_no)
+        if placed is None:
+            if not legacy or seat_no in self.unplaced:
+                return False
+            self.unplaced.add(seat_no)
+            return True
+        cabin, bit = placed
+        return self.cabins[cabin].set(bit)
+
+    def release(self, seat_no: str) -> bool:
+        seat_no = seat_no.upper()
+        placed = self.index.get(seat_no)
+        if placed is None:
+            if seat_no not in self.unplaced:
+                return False
+            self.unplaced.discard(seat_no)
+            return True
+        cabin, bit = placed
+        return self.cabins[cabin].clear(bit)
+
+    def next_free_seat(self, cabin: str = "Economy") -> str | None:
+        bitmap = self.cabins.get(cabin)
+        return bitmap.next_free_seat() if bitmap else None
+
+    def seats_left(self, cabin: str | None = None) -> int:
+        if cabin is None:
+            return max(0, self.seat_capacity - self.seats_taken)
+        bitmap = self.cabins.get(cabin)
+        return bitmap.capacity - bitmap.taken if bitmap else 0
+
+    def load_factor(self) -> float:
+        return self.seats_taken / self.seat_capacity if self.seat_capacity else 0.0
+
+    def cabin_summary(self) -> list[tuple]:
+        return [
+            (
+                cabin,
+                bitmap.capacity,
+                bitmap.taken,
+                bitmap.capacity - bitmap.taken,
+                bitmap.next_free_seat(),
+            )
+            for cabin, bitmap in self.cabins.items()
+        ]
+
+
+# Caches one SeatMap per instance. Every read checks the Version kept by the
+# BookingItem triggers (a primary-key lookup) and reloads only stale maps,
+# so writes from other connections are picked up without rescanning.
+class SeatInventory:
+    def __init__(self) -> None:
+        self._maps: dict[int, SeatMap] = {}
+
+    def _current_version(self, conn: sqlite3.Connection, instance_id: int) -> int:
+        row = conn.execute(q.SQL_SEAT_VERSION, (instance_id,)).fetchone()
+        return row[1] if row else 0
+
+    def _load(self, conn: sqlite3.Connection, instance_id: int, version: int) -> SeatMap:
+        row = conn.execute(q.SQL_INSTANCE_CAPACITY, (instance_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"FlightInstance {instance_id} not found.")
+        seat_map = SeatMap(instance_id, row[0] or 0, version)
+        for (seat_no,) in conn.execute(q.SQL_HELD_SEATS, (instance_id,)):
+            seat_map.occupy(seat_no, legacy=True)
+        self._maps[instance_id] = seat_map
+        return seat_map
+
+    def seat_map(self, conn: sqlite3.Connection, instance_id: int) -> SeatMap:
+        version = self._current_version(conn, instance_id)
+        seat_map = self._maps.get(instance_id)
+        if seat_map is not None and seat_map.version == version:
+            return seat_map
+        return self._load(conn, instance_id, version)
+
+    def invalidate(self, instance_id: int | None = None) -> None:
+        if instance_id is None:
+            self._maps.clear()
+        else:
+            self._maps.pop(instance_id, None)
+
+    # After our own write the trigger bumps Version. If nobody else wrote in
+    # between, adopt the new version instead of reloading from BookingItem.
+    def _sync_version(self, conn: sqlite3.Connection, seat_map: SeatMap, bumps: int) -> None:
+        version = self._current_version(conn, seat_map.instance_id)
+        if version == seat_map.version + bumps:
+            seat_map.version = version
+        else:
+            self._maps.pop(seat_map.instance_id, None)
+
+    # Adopt the stored Version without reloading. Only safe while the caller
+    # holds the write lock, so every change since the last read was its own.
+    def adopt_version(self, conn: sqlite3.Connection, instance_id: int) -> None:
+        seat_map = self._maps.get(instance_id)
+        if seat_map is not None:
+            seat_map.version = self._current_version(conn, instance_id)
+
+    # Mark a seat taken in memory only; the caller writes the BookingItem and
+    # then calls adopt_version (or invalidate on rollback).
+    def hold_seat(
+        self,
+        conn: sqlite3.Connection,
+        instance_id: int,
+        seat_no: str | None = None,
+        cabin: str = "Economy",
+    ) -> tuple[str, str]:
+        seat_map = self.seat_map(conn, instance_id)
+        if seat_no is None:
+            seat_no = seat_map.next_free_seat(cabin)
+            if seat_no is None:
+                raise ValueError(f"No free {cabin} seats on instance {instance_id}.")
+        else:
+            seat_no = seat_no.upper()
+            if not seat_map.has_seat(seat_no):
+                raise ValueError(f"Seat {seat_no} is not on the aircraft of instance {instance_id}.")
+            cabin = seat_map.cabin_of(seat_no)
+        if not seat_map.occupy(seat_no):
+            raise ValueError(f"Seat {seat_no} is already taken on instance {instance_id}.")
+        return seat_no, cabin
+
+    def release_hold(self, instance_id: int, seat_no: str) -> None:
+        seat_map = self._maps.get(instance_id)
+        if seat_map is not None:
+            seat_map.release(seat_no)
+
+    def next_free_seat(self, conn: sqlite3.Connection, instance_id: int, cabin: str = "Economy") -> str | None:
+        return self.seat_map(conn, instance_id).next_free_seat(cabin)
+
+    def seats_left(self, conn: sqlite3.Connection, instance_id: int, cabin: str | None = None) -> int:
+        return self.seat_map(conn, instance_id).seats_left(cabin)
+
+    def load_factor(self, conn: sqlite3.Connection, instance_id: int) -> float:
+        return self.seat_map(conn, instance_id).load_factor()
+
+    # Give a BookingItem a seat: the requested one, or the next free seat in
+    # its cabin. Raises ValueError when the seat is not in the aircraft's
+    # layout, is taken, or the cabin is full.
+    # The caller owns the transaction.
+    def assign_seat(
+        self,
+        conn: sqlite3.Connection,
+        booking_item_id: int,
+        seat_no: str | None = None,
+        cabin: str | None = None,
+    ) -> str:
+        item = conn.execute(q.SQL_BOOKING_ITEM_SEAT, (booking_item_id,)).fetchone()
+        if item is None:
+            raise ValueError(f"BookingItem {booking_item_id} not found.")
+        instance_id, current_seat, current_cabin, status = item
+        if status == "Cancelled":
+            raise ValueError(f"BookingItem {booking_item_id} is cancelled.")
+
+        seat_map = self.seat_map(conn, instance_id)
+        if seat_no is None:
+            cabin = cabin or current_cabin or "Economy"
+            seat_no = seat_map.next_free_seat(cabin)
+            if seat_no is None:
+                raise ValueError(f"No free {cabin} seats on instance {instance_id}.")
+        seat_no = seat_no.upper()
+        if current_seat and current_seat.upper() == seat_no:
+            return seat_no
+        if not seat_map.has_seat(seat_no):
+            raise ValueError(f"Seat {seat_no} is not on the aircraft of instance {instance_id}.")
+        if seat_map.is_taken(seat_no):
+            raise ValueError(f"Seat {seat_no} is already taken on instance {instance_id}.")
+
+        bumps = 2 * conn.execute(q.SQL_RELEASE_CANCELLED_SEAT, (instance_id, seat_no)).rowcount
+        conn.execute(
+            q.SQL_SET_BOOKING_ITEM_SEAT,
+            (seat_no, seat_map.cabin_of(seat_no), booking_item_id),
+        )
+        if current_seat:
+            seat_map.release(current_seat)
+        seat_map.occupy(seat_no)
+        self._sync_version(conn, seat_map, bumps + 2)
+        return seat_no
+
+    def cancel_item(self, conn: sqlite3.Connection, booking_item_id: int) -> None:
+        item = conn.execute(q.SQL_BOOKING_ITEM_SEAT, (booking_item_id,)).fetchone()
+        if item is None:
+            raise ValueError(f"BookingItem {booking_item_id} not found.")
+        instance_id, seat_no, _, status = item
+        if status == "Cancelled":
+            return
+
+        seat_map = self.seat_map(conn, instance_id)
+        conn.execute(q.SQL_CANCEL_BOOKING_ITEM, (booking_item_id,))
+        if seat_no:
+            seat_map.release(seat_no)
+        self._sync_version(conn, seat_map, 2)
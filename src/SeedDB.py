@@ -1,13 +1,26 @@
+from contextlib import closing
 from pathlib import Path
+import hashlib
+import os
+import shutil
 import sqlite3
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-DB_PATH = BASE_DIR / "DB/FlightManagement.db"
+# FLIGHT_DB_PATH points the app, and every module that reads DB_PATH, at
+# another database file (Replay.py runs sessions against scratch copies).
+DB_PATH = Path(os.environ.get("FLIGHT_DB_PATH") or BASE_DIR / "DB/FlightManagement.db")
 SQL_DIR = BASE_DIR / "SQL"
 
+# Fresh databases are cloned from a template built once from the SQL files
+# below. The template records a digest of those files and is rebuilt when
+# they change; bump TEMPLATE_FORMAT when the build itself changes.
+TEMPLATE_PATH = BASE_DIR / "DB/FlightManagement.template.db"
+TEMPLATE_FORMAT = 1
+
 SCHEMA_SQL = SQL_DIR / "00_Schema.sql"
 VIEWS_SQL = SQL_DIR / "01_Views.sql"
+DERIVED_SQL = SQL_DIR / "02_Derived.sql"
 TRIGGERS_SQL = SQL_DIR / "03_Triggers.sql"
 
 INSERT_DIR = SQL_DIR / "Inserts"
@@ -63,18 +76,20 @@ def is_db_initialised() -> bool:
     return REQUIRED_TABLES.issubset(existing_tables)
 
 
-def ensure_db() -> None:
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    DB_PATH.unlink(missing_ok=True)
-
+# Replay every SQL file into a new database at db_path.
+def build_db(db_path: Path) -> None:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    db_path.unlink(missing_ok=True)
 
-    with sqlite3.connect(DB_PATH) as conn:
+    with closing(sqlite3.connect(db_path)) as conn:
         conn.execute("PRAGMA foreign_keys = ON;")
 
         run_sql_file(conn, SCHEMA_SQL)
 
         run_sql_file(conn, VIEWS_SQL)
 
+        run_sql_file(conn, DERIVED_SQL)
+
         run_sql_file(conn, TRIGGERS_SQL)
 
         conn.execute("UPDATE AppContext SET CurrentUser='CLI' WHERE ContextID=1;")
@@ -85,16 +100,136 @@ def ensure_db() -> None:
         conn.execute("UPDATE AppContext SET CurrentUser='USER' WHERE ContextID=1;")
         conn.commit()
 
-# Refresh views/triggers without resetting data.
-def ensure_runtime_objects() -> None:
+
+def seed_sources() -> list[Path]:
+    return [SCHEMA_SQL, VIEWS_SQL, DERIVED_SQL, TRIGGERS_SQL] + [INSERT_DIR / f for f in INSERT_FILES]
+
+
+# SHA-256 over the template format and every seed file, in build order.
+def seed_digest() -> str:
+    digest = hashlib.sha256(f"template-format-{TEMPLATE_FORMAT}".encode())
+    for path in seed_sources():
+        digest.update(b"\0" + path.relative_to(SQL_DIR).as_posix().encode() + b"\0")
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def template_digest(template_path: Path = TEMPLATE_PATH) -> str | None:
+    if not template_path.exists():
+        return None
+    try:
+        with closing(sqlite3.connect(f"{template_path.as_uri()}?mode=ro", uri=True)) as conn:
+            row = conn.execute("SELECT Digest FROM SeedTemplate;").fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+# Build the template if it is missing, unreadable or out of date. It is
+# built under a temporary name and renamed into place, so a half-built
+# template is never cloned.
+def ensure_template(template_path: Path = TEMPLATE_PATH) -> Path:
+    digest = seed_digest()
+    if template_digest(template_path) == digest:
+        return template_path
+
+    building = template_path.with_name(f"{template_path.name}.{os.getpid()}.tmp")
+    build_db(building)
+    with closing(sqlite3.connect(building)) as conn:
+        conn.execute("CREATE TABLE SeedTemplate (Digest TEXT NOT NULL, BuiltAt TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP);")
+        conn.execute("INSERT INTO SeedTemplate (Digest) VALUES (?);", (digest,))
+        conn.commit()
+    os.replace(building, template_path)
+    return template_path
+
+
+# SeedTemplate only marks the template itself; clones drop it.
+def drop_template_marker(conn: sqlite3.Connection) -> None:
+    conn.execute("DROP TABLE IF EXISTS SeedTemplate;")
+    conn.commit()
+
+
+# Copy the template to db_path, page by page through the backup API
+# ("backup") or as a plain file copy ("copy", the kernel's copy path).
+# Stale journal files of the old database are removed with it.
+def clone_template(db_path: Path, template_path: Path = TEMPLATE_PATH, method: str = "copy") -> None:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    cloning = db_path.with_name(f"{db_path.name}.{os.getpid()}.tmp")
+    if method == "backup":
+        with closing(sqlite3.connect(f"{template_path.as_uri()}?mode=ro", uri=True)) as source, \
+                closing(sqlite3.connect(cloning)) as target:
+            source.backup(target)
+    elif method == "copy":
+        shutil.copyfile(template_path, cloning)
+    else:
+        raise ValueError(f"Unknown clone method: {method}")
+    with closing(sqlite3.connect(cloning)) as conn:
+        drop_template_marker(conn)
+    for suffix in ("-wal", "-shm", "-journal"):
+        db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+    os.replace(cloning, db_path)
+
+
+# A fresh seeded database at db_path, cloned from the template.
+def ensure_db(db_path: Path = DB_PATH, method: str = "copy") -> None:
+    clone_template(db_path, ensure_template(), method)
+
+# Columns added to 00_Schema.sql tables after databases were created from
+# it. ALTER TABLE has no IF NOT EXISTS, so these are added from here.
+ADDED_COLUMNS = {
+    "AppContext": [("DeferAuditSearch", "INTEGER NOT NULL DEFAULT 0 CHECK (DeferAuditSearch IN (0, 1))")],
+}
+
+SQL_INDEX_EXISTS = "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?;"
+
+SQL_DUPLICATE_INSTANCES = """
+    SELECT FlightID, FlightDate, COUNT(*)
+    FROM FlightInstance
+    GROUP BY FlightID, FlightDate
+    HAVING COUNT(*) > 1
+    ORDER BY FlightDate, FlightID;
+"""
+
+def ensure_added_columns(conn: sqlite3.Connection) -> None:
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table});")}
+        for name, definition in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition};")
+
+# A flight operates at most once per FlightDate. 00_Schema.sql has the unique
+# index; databases created before it get it here, replacing their FlightID-only
+# index, unless they already hold the same flight twice on one day. Then the
+# old index stays and the duplicates (FlightID, FlightDate, count) are returned
+# to be reported; the index is added on the first start after they are removed.
+def ensure_instance_uniqueness(conn: sqlite3.Connection) -> list[tuple[int, str, int]]:
+    if conn.execute(SQL_INDEX_EXISTS, ("IdxInstanceFlightDate",)).fetchone():
+        return []
+
+    duplicates = conn.execute(SQL_DUPLICATE_INSTANCES).fetchall()
+    if duplicates:
+        conn.execute("CREATE INDEX IF NOT EXISTS IdxInstanceFlight ON FlightInstance (FlightID);")
+        return duplicates
+
+    conn.execute("CREATE UNIQUE INDEX IdxInstanceFlightDate ON FlightInstance (FlightID, FlightDate);")
+    conn.execute("DROP INDEX IF EXISTS IdxInstanceFlight;")
+    return []
+
+# Refresh views/triggers without resetting data. Returns the duplicate flight
+# days that kept the unique instance index from being added.
+def ensure_runtime_objects() -> list[tuple[int, str, int]]:
     if not DB_PATH.exists():
-        return
+        return []
 
     with sqlite3.connect(DB_PATH) as conn:
         conn.execute("PRAGMA foreign_keys = ON;")
+        ensure_added_columns(conn)
+        duplicates = ensure_instance_uniqueness(conn)
         run_sql_file(conn, VIEWS_SQL)
+        run_sql_file(conn, DERIVED_SQL)
         run_sql_file(conn, TRIGGERS_SQL)
         conn.commit()
+    return duplicates
 
 if __name__ == "__main__":
     ensure_db()
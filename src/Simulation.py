@@ -0,0 +1,441 @@
+import argparse
+import math
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+import Queries as q
+from Delays import AIRCRAFT, CREW, MIN_CONNECT_MINUTES, load_delay_legs
+from LocalTime import UTC_FORMAT
+from Partitions import PARTITIONED_TABLES, partitions_in_range
+from Reports import open_read_only
+from Rotation import MIN_TURN_MINUTES
+from SeedDB import DB_PATH
+from UI import print_rows
+
+# Monte Carlo robustness of a schedule. Each leg gets a departure delay
+# distribution fitted from past instances: a chance of leaving late, a
+# lognormal size when late, and a chance of cancellation. Flights with too
+# little history borrow their airline's fit, then the fleet-wide one.
+#
+# A scenario draws every leg's own delay and pushes it down the aircraft and
+# crew sequences (as in Delays.py). Legs are grouped into levels (a leg's
+# level is one past its deepest predecessor's) so that each level is one
+# NumPy step over a block of scenarios. A leg held past CANCEL_AFTER_MINUTES
+# is counted as cancelled and, like a drawn cancellation, holds nothing up.
+# Blocks of scenarios run across a process pool.
+#
+#   python3 src/Simulation.py --from 2027-01-01 --to 2027-03-31 --scenarios 2000
+
+HISTORY_DAYS = 365
+MIN_SAMPLES = 20
+CANCEL_AFTER_MINUTES = 180
+SCENARIO_BLOCK = 64
+DEFAULT_SCENARIOS = 1000
+
+
+@dataclass(frozen=True)
+class DelayModel:
+    p_delay: float
+    # Log-minutes of a late departure.
+    mu: float
+    sigma: float
+    p_cancel: float
+    samples: int = 0
+
+
+# Used when there is no history at all.
+DEFAULT_DELAY_MODEL = DelayModel(0.3, math.log(15), 1.0, 0.01)
+
+
+class _Fit:
+    __slots__ = ("n", "cancelled", "late", "log_sum", "log_sq")
+
+    def __init__(self) -> None:
+        self.n = self.cancelled = self.late = 0
+        self.log_sum = self.log_sq = 0.0
+
+    def add(self, cancelled: bool, delay: float | None) -> None:
+        self.n += 1
+        if cancelled:
+            self.cancelled += 1
+        elif delay is not None and delay > 0:
+            self.late += 1
+            value = math.log(delay)
+            self.log_sum += value
+            self.log_sq += value * value
+
+    def model(self, fallback: DelayModel) -> DelayModel:
+        flown = self.n - self.cancelled
+        if self.late >= 2:
+            mu = self.log_sum / self.late
+            sigma = max(0.1, math.sqrt(max(0.0, self.log_sq / self.late - mu * mu)))
+        else:
+            mu, sigma = fallback.mu, fallback.sigma
+        p_delay = self.late / flown if flown else fallback.p_delay
+        return DelayModel(p_delay, mu, sigma, self.cancelled / self.n, self.n)
+
+
+@dataclass
+class DelayModels:
+    overall: DelayModel = DEFAULT_DELAY_MODEL
+    by_airline: dict[int, DelayModel] | None = None
+    by_flight: dict[int, DelayModel] | None = None
+
+    def for_flight(self, flight_id: int, airline_id: int) -> DelayModel:
+        model = (self.by_flight or {}).get(flight_id)
+        if model is None:
+            model = (self.by_airline or {}).get(airline_id, self.overall)
+        return model
+
+
+# Fit from (FlightID, AirlineID, Cancelled, DelayMinutes) rows.
+def fit_delay_models(rows) -> DelayModels:
+    overall = _Fit()
+    airlines: dict[int, _Fit] = {}
+    flights: dict[int, tuple[int, _Fit]] = {}
+    for flight_id, airline_id, cancelled, delay in rows:
+        overall.add(cancelled, delay)
+        airlines.setdefault(airline_id, _Fit()).add(cancelled, delay)
+        flights.setdefault(flight_id, (airline_id, _Fit()))[1].add(cancelled, delay)
+
+    models = DelayModels(overall.model(DEFAULT_DELAY_MODEL) if overall.n >= MIN_SAMPLES else DEFAULT_DELAY_MODEL, {}, {})
+    for airline_id, fit in airlines.items():
+        if fit.n >= MIN_SAMPLES:
+            models.by_airline[airline_id] = fit.model(models.overall)
+    for flight_id, (airline_id, fit) in flights.items():
+        if fit.n >= MIN_SAMPLES:
+            models.by_flight[flight_id] = fit.model(models.by_airline.get(airline_id, models.overall))
+    return models
+
+
+# History from the main file and any archived seasons in [date_from, date_to).
+def load_delay_history(conn: sqlite3.Connection, date_from: str, date_to: str) -> list[tuple]:
+    last_day = (date.fromisoformat(date_to) - timedelta(days=1)).isoformat()
+    schemas = ["main"] + [p.schema for p in partitions_in_range(conn, date_from, last_day)]
+    rows = []
+    for schema in schemas:
+        tables = {table: f"{schema}.{table}" for table in PARTITIONED_TABLES}
+        rows += conn.execute(q.SQL_DELAY_HISTORY.format(**tables), (date_from, date_to)).fetchall()
+    return rows
+
+
+@dataclass
+class SimulationModel:
+    instance_ids: np.ndarray
+    aircraft_ids: np.ndarray
+    # Minutes since `epoch`, float32.
+    sched_dep: np.ndarray
+    block: np.ndarray
+    p_delay: np.ndarray
+    mu: np.ndarray
+    sigma: np.ndarray
+    p_cancel: np.ndarray
+    # Predecessor indexes, padded with len(legs) (a never-arriving leg), and
+    # the turn or connection time after each.
+    preds: np.ndarray
+    pred_gaps: np.ndarray
+    levels: list[np.ndarray]
+    epoch: int
+
+    def __len__(self) -> int:
+        return len(self.instance_ids)
+
+
+def build_model(
+    legs,
+    flights: dict[int, tuple[int, int]],
+    models: DelayModels,
+    min_turn_minutes: int = MIN_TURN_MINUTES,
+    min_connect_minutes: int = MIN_CONNECT_MINUTES,
+) -> SimulationModel:
+    legs = sorted(legs, key=lambda leg: leg.rank)
+    n = len(legs)
+    epoch = legs[0].sched_dep if legs else 0
+    gaps = {AIRCRAFT: min_turn_minutes, CREW: min_connect_minutes}
+
+    preds: list[list[tuple[int, int]]] = []
+    last: dict[tuple[str, int], int] = {}
+    depth = np.zeros(n, dtype=np.int32)
+    for i, leg in enumerate(legs):
+        keys = [(CREW, staff_id) for staff_id in leg.staff_ids]
+        if leg.aircraft_id is not None:
+            keys.append((AIRCRAFT, leg.aircraft_id))
+        links = []
+        for key in keys:
+            previous = last.get(key)
+            if previous is not None:
+                links.append((previous, gaps[key[0]]))
+                depth[i] = max(depth[i], depth[previous] + 1)
+            last[key] = i
+        preds.append(links)
+
+    width = max([len(links) for links in preds] + [1])
+    pred_index = np.full((n, width), n, dtype=np.int32)
+    pred_gaps = np.zeros((n, width), dtype=np.float32)
+    for i, links in enumerate(preds):
+        for k, (previous, gap) in enumerate(links):
+            pred_index[i, k] = previous
+            pred_gaps[i, k] = gap
+
+    fitted = [models.for_flight(*flights.get(leg.instance_id, (0, 0))) for leg in legs]
+    order = np.argsort(depth, kind="stable")
+    bounds = np.flatnonzero(np.diff(depth[order])) + 1
+    return SimulationModel(
+        instance_ids=np.array([leg.instance_id for leg in legs], dtype=np.int64),
+        aircraft_ids=np.array([-1 if leg.aircraft_id is None else leg.aircraft_id for leg in legs], dtype=np.int64),
+        sched_dep=np.array([(leg.sched_dep - epoch) / 60 for leg in legs], dtype=np.float32),
+        block=np.array([(leg.sched_arr - leg.sched_dep) / 60 for leg in legs], dtype=np.float32),
+        p_delay=np.array([m.p_delay for m in fitted], dtype=np.float32),
+        mu=np.array([m.mu for m in fitted], dtype=np.float32),
+        sigma=np.array([m.sigma for m in fitted], dtype=np.float32),
+        p_cancel=np.array([m.p_cancel for m in fitted], dtype=np.float32),
+        preds=pred_index,
+        pred_gaps=pred_gaps,
+        levels=np.split(order, bounds) if n else [],
+        epoch=epoch,
+    )
+
+
+@dataclass
+class SimulationTotals:
+    scenarios: int
+    # Per leg, summed over scenarios.
+    knock_on: np.ndarray
+    delay: np.ndarray
+    flown: np.ndarray
+    cancelled: np.ndarray
+    # Per scenario.
+    scenario_knock_on: np.ndarray
+    scenario_cancelled: np.ndarray
+
+    def merge(self, other: "SimulationTotals") -> "SimulationTotals":
+        return SimulationTotals(
+            self.scenarios + other.scenarios,
+            self.knock_on + other.knock_on,
+            self.delay + other.delay,
+            self.flown + other.flown,
+            self.cancelled + other.cancelled,
+            np.concatenate([self.scenario_knock_on, other.scenario_knock_on]),
+            np.concatenate([self.scenario_cancelled, other.scenario_cancelled]),
+        )
+
+
+def _empty_totals(n: int) -> SimulationTotals:
+    return SimulationTotals(
+        0,
+        np.zeros(n), np.zeros(n), np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64),
+        np.zeros(0), np.zeros(0, dtype=np.int64),
+    )
+
+
+def simulate_block(model: SimulationModel, scenarios: int, rng: np.random.Generator) -> SimulationTotals:
+    n = len(model)
+    shape = (scenarios, n)
+    late = rng.random(shape, dtype=np.float32) < model.p_delay
+    own = np.exp(model.mu + model.sigma * rng.standard_normal(shape, dtype=np.float32))
+    own = np.where(late, own, np.float32(0))
+    drawn_cancel = rng.random(shape, dtype=np.float32) < model.p_cancel
+
+    dep = np.empty(shape, dtype=np.float32)
+    cancelled = np.empty(shape, dtype=bool)
+    arr = np.empty((scenarios, n + 1), dtype=np.float32)
+    arr[:, n] = -np.inf
+    for level in model.levels:
+        planned = model.sched_dep[level]
+        ready = (arr[:, model.preds[level]] + model.pred_gaps[level]).max(axis=2)
+        leaves = np.maximum(planned + own[:, level], ready)
+        dropped = drawn_cancel[:, level] | (leaves - planned > CANCEL_AFTER_MINUTES)
+        dep[:, level] = leaves
+        cancelled[:, level] = dropped
+        arr[:, level] = np.where(dropped, -np.inf, leaves + model.block[level])
+
+    flown = ~cancelled
+    delay = np.where(flown, dep - model.sched_dep, 0)
+    # Never below zero: float rounding could otherwise leave a tiny negative
+    # (shown as "-0") where a leg left on its own delay alone.
+    knock_on = np.where(flown, np.maximum(dep - model.sched_dep - own, 0), 0)
+    return SimulationTotals(
+        scenarios,
+        knock_on.sum(axis=0, dtype=np.float64),
+        delay.sum(axis=0, dtype=np.float64),
+        flown.sum(axis=0),
+        cancelled.sum(axis=0),
+        knock_on.sum(axis=1, dtype=np.float64),
+        cancelled.sum(axis=1),
+    )
+
+
+_worker_model: SimulationModel | None = None
+
+
+def _init_worker(model: SimulationModel) -> None:
+    global _worker_model
+    _worker_model = model
+
+
+def _run_block(scenarios: int, seed: np.random.SeedSequence) -> SimulationTotals:
+    return simulate_block(_worker_model, scenarios, np.random.default_rng(seed))
+
+
+def simulate(
+    model: SimulationModel,
+    scenarios: int = DEFAULT_SCENARIOS,
+    workers: int | None = None,
+    seed: int | None = None,
+    block: int = SCENARIO_BLOCK,
+) -> SimulationTotals:
+    workers = workers or os.cpu_count() or 1
+    sizes = [min(block, scenarios - start) for start in range(0, scenarios, block)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    totals = _empty_totals(len(model))
+    if workers == 1 or len(sizes) == 1:
+        for size, block_seed in zip(sizes, seeds):
+            totals = totals.merge(simulate_block(model, size, np.random.default_rng(block_seed)))
+        return totals
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(sizes)), initializer=_init_worker, initargs=(model,)
+    ) as pool:
+        for part in pool.map(_run_block, sizes, seeds):
+            totals = totals.merge(part)
+    return totals
+
+
+@dataclass(frozen=True)
+class FragileRotation:
+    aircraft_id: int
+    day: str
+    legs: int
+    # Expected minutes per scenario, summed over the rotation's legs.
+    knock_on_minutes: float
+    expected_cancellations: float
+
+
+@dataclass
+class RobustnessReport:
+    model: SimulationModel
+    totals: SimulationTotals
+
+    @property
+    def expected_knock_on(self) -> np.ndarray:
+        return self.totals.knock_on / max(1, self.totals.scenarios)
+
+    @property
+    def cancel_risk(self) -> np.ndarray:
+        return self.totals.cancelled / max(1, self.totals.scenarios)
+
+    # Average departure delay when the leg operates.
+    @property
+    def mean_delay(self) -> np.ndarray:
+        return self.totals.delay / np.maximum(1, self.totals.flown)
+
+    def percentile_knock_on(self, percent: float) -> float:
+        if not self.totals.scenarios:
+            return 0.0
+        return float(np.percentile(self.totals.scenario_knock_on, percent))
+
+    # Worst legs by expected knock-on: (InstanceID, SchedDepUtc, mean delay,
+    # expected knock-on, cancellation risk).
+    def fragile_legs(self, top: int = 20) -> list[tuple]:
+        ranked = np.argsort(-self.expected_knock_on, kind="stable")[:top]
+        return [
+            (
+                int(self.model.instance_ids[i]),
+                _utc(self.model.epoch + int(self.model.sched_dep[i] * 60)),
+                round(float(self.mean_delay[i]), 1),
+                round(float(self.expected_knock_on[i]), 1),
+                f"{100 * self.cancel_risk[i]:.1f}%",
+            )
+            for i in ranked
+        ]
+
+    # A rotation is one tail's legs on one UTC day.
+    def fragile_rotations(self, top: int = 20) -> list[FragileRotation]:
+        days = (self.model.epoch // 60 + self.model.sched_dep.astype(np.int64)) // 1440
+        keys = np.stack([self.model.aircraft_ids, days], axis=1)
+        tailed = self.model.aircraft_ids >= 0
+        unique, inverse = np.unique(keys[tailed], axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        knock_on = np.bincount(inverse, self.expected_knock_on[tailed], len(unique))
+        cancels = np.bincount(inverse, self.cancel_risk[tailed], len(unique))
+        legs = np.bincount(inverse, minlength=len(unique))
+        ranked = np.argsort(-knock_on, kind="stable")[:top]
+        return [
+            FragileRotation(
+                int(unique[i, 0]),
+                (date(1970, 1, 1) + timedelta(days=int(unique[i, 1]))).isoformat(),
+                int(legs[i]),
+                round(float(knock_on[i]), 1),
+                round(float(cancels[i]), 2),
+            )
+            for i in ranked
+        ]
+
+
+def _utc(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(UTC_FORMAT)
+
+
+# Simulate the main database's schedule for [date_from, date_to], fitting
+# delays from the HISTORY_DAYS before date_from in history_db (the reporting
+# snapshot or live file, archived seasons included).
+def run_robustness(
+    conn: sqlite3.Connection,
+    date_from: str,
+    date_to: str,
+    scenarios: int = DEFAULT_SCENARIOS,
+    workers: int | None = None,
+    history_db: Path = DB_PATH,
+    seed: int | None = None,
+) -> RobustnessReport:
+    history_from = (date.fromisoformat(date_from) - timedelta(days=HISTORY_DAYS)).isoformat()
+    with closing(open_read_only(history_db)) as history:
+        models = fit_delay_models(load_delay_history(history, history_from, date_from))
+    legs = load_delay_legs(conn, date_from, date_to)
+    flights = {row[0]: (row[1], row[2]) for row in conn.execute(q.SQL_INSTANCE_FLIGHTS, (date_from, date_to))}
+    model = build_model(legs, flights, models)
+    return RobustnessReport(model, simulate(model, scenarios, workers, seed))
+
+
+def print_robustness(report: RobustnessReport, top: int = 20) -> None:
+    totals = report.totals
+    print(
+        f"\n{len(report.model)} legs, {totals.scenarios} scenarios. Knock-on delay per scenario: "
+        f"mean {totals.scenario_knock_on.mean() if totals.scenarios else 0:,.0f} min, "
+        f"p95 {report.percentile_knock_on(95):,.0f} min. "
+        f"Cancellations per scenario: mean {totals.scenario_cancelled.mean() if totals.scenarios else 0:,.1f}."
+    )
+    print("\nMost Fragile Rotations")
+    print("----------------------")
+    print_rows(
+        ["AircraftID", "Day", "Legs", "KnockOnMin", "ExpCancellations"],
+        [(r.aircraft_id, r.day, r.legs, r.knock_on_minutes, r.expected_cancellations) for r in report.fragile_rotations(top)],
+    )
+    print("Most Fragile Legs")
+    print("-----------------")
+    print_rows(["InstanceID", "SchedDepUtc", "MeanDelayMin", "KnockOnMin", "CancelRisk"], report.fragile_legs(top))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Monte Carlo robustness of a schedule")
+    parser.add_argument("--from", dest="date_from", required=True, help="First FlightDate (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", required=True, help="Last FlightDate (YYYY-MM-DD)")
+    parser.add_argument("--scenarios", type=int, default=DEFAULT_SCENARIOS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    with closing(sqlite3.connect(DB_PATH)) as conn:
+        report = run_robustness(conn, args.date_from, args.date_to, args.scenarios, args.workers, seed=args.seed)
+    print_robustness(report, args.top)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import MemoryMode
+import Queries as q
+from SeedDB import DB_PATH
+
+# Reporting snapshot: a copy of DB/FlightManagement.db (or, in memory mode,
+# of the memory copy) taken with the online backup API a few pages at a time,
+# pausing between steps so app writes are not held up. The copy is built next
+# to the live file (archived partitions resolve the same way from there) and
+# renamed into place when complete; reports still reading the previous copy
+# finish on it.
+#
+#   python3 src/Snapshot.py refresh
+#   python3 src/Snapshot.py refresh --every 300
+#   python3 src/Snapshot.py status
+
+SNAPSHOT_SUFFIX = ".snapshot.db"
+SNAPSHOT_PAGES_PER_STEP = 256
+SNAPSHOT_STEP_PAUSE = 0.005
+# A write to the live file from another connection restarts a paged copy.
+# After this many restarts the copy is done in one step instead, which makes
+# writers wait (up to their busy timeout) for the length of one full copy.
+SNAPSHOT_MAX_RESTARTS = 3
+DEFAULT_REFRESH_SECONDS = 300
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_route_reports = True
+_scheduler: "SnapshotScheduler | None" = None
+
+
+@dataclass(frozen=True)
+class SnapshotInfo:
+    path: Path
+    taken_at: datetime
+    audit_seq: int
+    copy_seconds: float
+
+    def age_seconds(self) -> float:
+        return (datetime.now(timezone.utc) - self.taken_at).total_seconds()
+
+
+def snapshot_path(db_path: Path = DB_PATH) -> Path:
+    return db_path.with_name(db_path.stem + SNAPSHOT_SUFFIX)
+
+
+def _last_audit_seq(conn: sqlite3.Connection) -> int:
+    return conn.execute(q.SQL_FEED_LAST_SEQ).fetchone()[0]
+
+
+class _CopyRestarted(Exception):
+    pass
+
+
+def _paced_progress(pause: float):
+    state = {"remaining": None, "restarts": 0}
+
+    def progress(_status: int, remaining: int, _total: int) -> None:
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            state["restarts"] += 1
+            if state["restarts"] > SNAPSHOT_MAX_RESTARTS:
+                raise _CopyRestarted()
+        state["remaining"] = remaining
+        time.sleep(pause)
+
+    return progress
+
+
+# The live database: in memory mode the memory copy, which the file only
+# has as of the last flush (and never under --no-flush), otherwise the file,
+# read-only. With from_file the file is read either way; the memory copy may
+# only be read from the thread running the app (see MemoryMode).
+def _open_live(db_path: Path, from_file: bool = False) -> sqlite3.Connection:
+    memory = MemoryMode.active()
+    if memory is not None and memory.db_path == db_path and not from_file:
+        return memory.connect()
+    return sqlite3.connect(db_path.resolve().as_uri() + "?mode=ro", uri=True)
+
+
+# Copy the live database into the snapshot. Either way the copy is one
+# consistent state of the database.
+def take_snapshot(
+    db_path: Path = DB_PATH,
+    pages: int = SNAPSHOT_PAGES_PER_STEP,
+    pause: float = SNAPSHOT_STEP_PAUSE,
+    from_file: bool = False,
+) -> SnapshotInfo:
+    target = snapshot_path(db_path)
+    building = target.with_name(target.name + ".tmp")
+    building.unlink(missing_ok=True)
+
+    started = time.perf_counter()
+    source = _open_live(db_path, from_file)
+    try:
+        copy = sqlite3.connect(building)
+        try:
+            try:
+                source.backup(copy, pages=pages, progress=_paced_progress(pause))
+            except _CopyRestarted:
+                source.backup(copy)
+            taken_at = datetime.now(timezone.utc)
+            audit_seq = _last_audit_seq(copy)
+            copy_seconds = time.perf_counter() - started
+            copy.execute(q.SQL_CREATE_SNAPSHOT_INFO)
+            copy.execute(
+                q.SQL_SAVE_SNAPSHOT_INFO,
+                (taken_at.strftime(TIMESTAMP_FORMAT), audit_seq, copy_seconds),
+            )
+            copy.commit()
+        finally:
+            copy.close()
+    except BaseException:
+        building.unlink(missing_ok=True)
+        raise
+    finally:
+        source.close()
+
+    os.replace(building, target)
+    return SnapshotInfo(target, taken_at.replace(microsecond=0), audit_seq, copy_seconds)
+
+
+def snapshot_info(db_path: Path = DB_PATH) -> SnapshotInfo | None:
+    path = snapshot_path(db_path)
+    if not path.exists():
+        return None
+    conn = sqlite3.connect(path.resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        row = conn.execute(q.SQL_SNAPSHOT_INFO).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    taken_at = datetime.strptime(row[0], TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+    return SnapshotInfo(path, taken_at, row[1], row[2])
+
+
+def drop_snapshot(db_path: Path = DB_PATH) -> None:
+    snapshot_path(db_path).unlink(missing_ok=True)
+
+
+# Audited changes in the live database since the snapshot was taken.
+def changes_behind(info: SnapshotInfo, db_path: Path = DB_PATH) -> int:
+    with closing(_open_live(db_path)) as conn:
+        return max(0, _last_audit_seq(conn) - info.audit_seq)
+
+
+def route_reports_to_snapshot(enabled: bool) -> None:
+    global _route_reports
+    _route_reports = enabled
+
+
+def reports_use_snapshot() -> bool:
+    return _route_reports
+
+
+# Database file that reports, exports and analytics should read: the
+# snapshot when routing is on and one exists, otherwise the live file
+# (flushed first when the app runs in memory; under --no-flush, a scratch
+# copy of memory instead).
+def report_db_path(db_path: Path = DB_PATH) -> Path:
+    if _route_reports and snapshot_info(db_path) is not None:
+        return snapshot_path(db_path)
+    return MemoryMode.readable_path(db_path)
+
+
+def _format_age(seconds: float) -> str:
+    seconds = max(0, int(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+
+# One line for the user saying where a report's data comes from and how stale it is.
+def describe_report_source(db_path: Path = DB_PATH) -> str:
+    info = snapshot_info(db_path)
+    if not _route_reports or info is None:
+        return "Source: live database"
+    taken = info.taken_at.astimezone().strftime(TIMESTAMP_FORMAT)
+    behind = changes_behind(info, db_path)
+    return (
+        f"Source: snapshot taken {taken} ({_format_age(info.age_seconds())} ago, "
+        f"{behind} change{'s' if behind != 1 else ''} behind)"
+    )
+
+
+# Background refresh on a fixed interval. Errors (e.g. the live file being
+# reset mid-copy) are kept for display and the next run tries again. It runs
+# off the app's thread, so in memory mode it copies the file as of the last
+# flush, and changes_behind counts what has not been flushed yet.
+class SnapshotScheduler:
+    def __init__(self, interval: float = DEFAULT_REFRESH_SECONDS, db_path: Path = DB_PATH) -> None:
+        self.interval = interval
+        self.db_path = db_path
+        self.last_error: str | None = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="SnapshotScheduler", daemon=True)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                take_snapshot(self.db_path, from_file=True)
+                self.last_error = None
+            except (sqlite3.Error, OSError) as e:
+                self.last_error = str(e)
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+
+def start_auto_refresh(interval: float = DEFAULT_REFRESH_SECONDS, db_path: Path = DB_PATH) -> SnapshotScheduler:
+    global _scheduler
+    stop_auto_refresh()
+    _scheduler = SnapshotScheduler(interval, db_path)
+    _scheduler.start()
+    return _scheduler
+
+
+def stop_auto_refresh() -> None:
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.stop()
+        _scheduler = None
+
+
+def auto_refresh() -> SnapshotScheduler | None:
+    return _scheduler
+
+
+# For work that replaces or reloads the live file (a reset, archiving in
+# memory mode): stop the background refresh so it does not copy a file
+# being swapped, and start it again afterwards with the same settings.
+@contextmanager
+def auto_refresh_paused():
+    scheduler = _scheduler
+    if scheduler is None:
+        yield
+        return
+    stop_auto_refresh()
+    try:
+        yield
+    finally:
+        start_auto_refresh(scheduler.interval, scheduler.db_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reporting snapshot of the Flight Management DB")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    refresh = sub.add_parser("refresh", help="Copy the live database into the snapshot")
+    refresh.add_argument("--every", type=float, help="Keep refreshing every N seconds")
+    refresh.add_argument("--pages", type=int, default=SNAPSHOT_PAGES_PER_STEP)
+
+    sub.add_parser("status", help="Show when the snapshot was taken and how far behind it is")
+
+    args = parser.parse_args()
+
+    if args.command == "status":
+        info = snapshot_info()
+        if info is None:
+            print("No snapshot.")
+            return
+        print(f"{info.path}\n{describe_report_source()}")
+        return
+
+    try:
+        while True:
+            info = take_snapshot(pages=args.pages)
+            print(f"Snapshot taken in {info.copy_seconds:.2f}s (AuditSeq {info.audit_seq}).")
+            if not args.every:
+                return
+            time.sleep(args.every)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+import argparse
+import csv
+import json
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import Queries as q
+from SeedDB import DB_PATH
+from Transactions import audited_transaction, deferred_audit_search
+from UI import FIELD_FORMAT_RULES, VALID_STATUSES
+
+# Ingestion of ops status feeds: files of events that set actual times,
+# status, terminal and gate on flight instances. An event names its instance
+# by InstanceID, or by FlightNumber and FlightDate, and carries any of the
+# FEED_FIELDS (blank = leave alone, <<CLEAR>> = set NULL, as at the update
+# prompts) plus an optional EventTime.
+#
+# The file is streamed. Each event is checked on its own as it is read
+# (identification, FIELD_FORMAT_RULES, Status values), then events are
+# gathered until batch_size instances are pending. Per batch: flight keys
+# are resolved and current rows read in one query each, each instance's
+# events are folded into one update (later events win field by field; an
+# event whose EventTime is older than a value already taken for that field
+# is stale and skipped), the result is checked against the FlightInstance
+# CHECK rules, and the changed rows are written with executemany in one
+# transaction under the FEED audit user. Rejected events go to a rejects
+# file (the source record plus Line and Reason) and never stop the run.
+#
+#   python3 src/StatusFeed.py Data/Feeds/sample_status_feed.csv
+#   python3 src/StatusFeed.py ops_events.jsonl --batch 5000 --rejects bad.jsonl
+
+FEED_FIELDS = ("Status", "ActualDepUtc", "ActualArrUtc", "Terminal", "Gate")
+TIME_FIELDS = ("ActualDepUtc", "ActualArrUtc")
+FEED_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+CLEAR = "<<CLEAR>>"
+DEFAULT_BATCH_SIZE = 1000
+# Flush early when one batch holds this many events for fewer instances.
+MAX_PENDING_EVENTS_PER_INSTANCE = 10
+AUDIT_USER = "FEED"
+STATUS_BY_NAME = {status.lower(): status for status in VALID_STATUSES}
+
+
+# An event or coalesced update that cannot be applied; the message is the
+# reason written to the rejects file.
+class FeedReject(ValueError):
+    pass
+
+
+@dataclass
+class FeedEvent:
+    line: int
+    record: dict
+    # InstanceID, or (FlightNumber upper-cased, FlightDate).
+    key: int | tuple[str, str]
+    values: dict[str, str | None]
+    # UTC "YYYY-MM-DD HH:MM:SS[.ffffff]", or None to apply in file order.
+    event_time: str | None = None
+
+
+@dataclass
+class FeedResult:
+    events: int = 0
+    # Instances written, and coalesced updates that matched the row already.
+    updated: int = 0
+    unchanged: int = 0
+    # Events folded into an earlier one for the same instance.
+    coalesced: int = 0
+    # Field values skipped because a newer EventTime had already set them.
+    stale: int = 0
+    rejected: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    rejects_path: Path | None = None
+    # (line, reason) of the first few rejects, for the summary.
+    first_rejects: list[tuple[int, str]] = field(default_factory=list)
+
+
+def _text(value) -> str | None:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+# Every FIELD_FORMAT_RULES format is an ISO one, so fromisoformat (much
+# quicker than strptime) parses it and the round trip rejects anything that
+# is not written exactly in that format, as the CHECK constraints would.
+def _check_time(name: str, value: str) -> str:
+    fmt, hint = FIELD_FORMAT_RULES[name]
+    try:
+        if datetime.fromisoformat(value).strftime(fmt) == value:
+            return value
+    except ValueError:
+        pass
+    raise FeedReject(f"{name} must be {hint}, got {value!r}")
+
+
+def _event_time(value: str) -> str:
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise FeedReject(f"EventTime is not an ISO date and time: {value!r}") from None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.isoformat(sep=" ")
+
+
+# Check one record on its own and turn it into a FeedEvent.
+def parse_event(line: int, record: dict) -> FeedEvent:
+    instance_id = _text(record.get("InstanceID"))
+    if instance_id is not None:
+        try:
+            key = int(instance_id)
+        except ValueError:
+            raise FeedReject(f"InstanceID must be a whole number, got {instance_id!r}") from None
+    else:
+        flight_number, flight_date = _text(record.get("FlightNumber")), _text(record.get("FlightDate"))
+        if flight_number is None or flight_date is None:
+            raise FeedReject("needs InstanceID, or FlightNumber and FlightDate")
+        key = (flight_number.upper(), _check_time("FlightDate", flight_date))
+
+    values: dict[str, str | None] = {}
+    for name in FEED_FIELDS:
+        value = _text(record.get(name))
+        if value is None:
+            continue
+        if value == CLEAR:
+            if name == "Status":
+                raise FeedReject("Status cannot be cleared")
+            values[name] = None
+        elif name == "Status":
+            status = STATUS_BY_NAME.get(value.lower())
+            if status is None:
+                raise FeedReject(f"Status must be one of {', '.join(VALID_STATUSES)}, got {value!r}")
+            values[name] = status
+        elif name in TIME_FIELDS:
+            values[name] = _check_time(name, value)
+        else:
+            values[name] = value
+    if not values:
+        raise FeedReject(f"nothing to apply: no {', '.join(FEED_FIELDS)}")
+
+    raw_time = _text(record.get("EventTime"))
+    return FeedEvent(line, record, key, values, _event_time(raw_time) if raw_time else None)
+
+
+def feed_format(path: Path, fmt: str | None = None) -> str:
+    fmt = fmt or FEED_FORMATS.get(path.suffix.lower())
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Cannot tell the feed format of {path.name}; use .csv, .jsonl or .ndjson.")
+    return fmt
+
+
+# (line, record, error) for every record in the file; error is set when the
+# line could not be read as a record at all.
+def read_records(f, fmt: str):
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+    for line, text in enumerate(f, start=1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except json.JSONDecodeError as e:
+            yield line, {"Raw": text.rstrip("\n")}, f"not valid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line, {"Raw": text.rstrip("\n")}, "not a JSON object"
+            continue
+        yield line, record, None
+
+
+class _RejectsWriter:
+    def __init__(self, path: Path, fmt: str) -> None:
+        self.path = path
+        self._fmt = fmt
+        self._f = None
+        self._writer = None
+
+    def write(self, line: int, record: dict, reason: str) -> None:
+        if self._f is None:
+            self._f = self.path.open("w", newline="" if self._fmt == "csv" else None, encoding="utf-8")
+            if self._fmt == "csv":
+                # DictReader files extra cells under None; those are dropped.
+                columns = ["Line", "Reason"] + [name for name in record if name is not None]
+                self._writer = csv.DictWriter(self._f, columns, extrasaction="ignore")
+                self._writer.writeheader()
+        if self._fmt == "csv":
+            self._writer.writerow({**record, "Line": line, "Reason": reason})
+        else:
+            self._f.write(json.dumps({"Line": line, "Reason": reason, **record}, default=str) + "\n")
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+
+
+class _Ingest:
+    def __init__(self, conn: sqlite3.Connection, result: FeedResult, rejects: _RejectsWriter) -> None:
+        self.conn = conn
+        self.result = result
+        self.rejects = rejects
+        # (InstanceID, field) -> EventTime of the value applied, for
+        # events in later batches that arrive out of order.
+        self.applied_times: dict[tuple[int, str], str] = {}
+
+    def reject(self, line: int, record: dict, reason: str) -> None:
+        self.result.rejected += 1
+        if len(self.result.first_rejects) < 10:
+            self.result.first_rejects.append((line, reason))
+        self.rejects.write(line, record, reason)
+
+    def _resolve(self, pending: dict) -> dict[int, list[FeedEvent]]:
+        flight_keys = [key for key in pending if isinstance(key, tuple)]
+        found: dict[tuple[str, str], list[int]] = {}
+        if flight_keys:
+            for number, flight_date, instance_id in self.conn.execute(q.SQL_FEED_RESOLVE_FLIGHTS, (json.dumps(flight_keys),)):
+                found.setdefault((number, flight_date), []).append(instance_id)
+
+        by_instance: dict[int, list[FeedEvent]] = {}
+        for key, events in pending.items():
+            if isinstance(key, tuple):
+                matches = found.get(key, [])
+                if len(matches) != 1:
+                    reason = (
+                        f"no flight instance for {key[0]} on {key[1]}" if not matches
+                        else f"{key[0]} on {key[1]} matches {len(matches)} instances; use InstanceID"
+                    )
+                    for event in events:
+                        self.reject(event.line, event.record, reason)
+                    continue
+                instance_id = matches[0]
+            else:
+                instance_id = key
+            by_instance.setdefault(instance_id, []).extend(events)
+        return by_instance
+
+    # Fold one instance's events, in file order, into field values. Returns
+    # the values, the EventTime behind each, and how many were stale.
+    def _fold(self, instance_id: int, events: list[FeedEvent]) -> tuple[dict, dict, int]:
+        values: dict[str, str | None] = {}
+        times: dict[str, str] = {}
+        stale = 0
+        for event in sorted(events, key=lambda e: e.line):
+            for name, value in event.values.items():
+                latest = times.get(name) or self.applied_times.get((instance_id, name))
+                if event.event_time is not None and latest is not None and event.event_time < latest:
+                    stale += 1
+                    continue
+                values[name] = value
+                if event.event_time is not None:
+                    times[name] = event.event_time
+        return values, times, stale
+
+    def flush(self, pending: dict) -> None:
+        if not pending:
+            return
+        by_instance = self._resolve(pending)
+        current = {
+            row[0]: dict(zip(FEED_FIELDS, row[1:]))
+            for row in self.conn.execute(q.SQL_FEED_INSTANCE_STATE, (json.dumps(list(by_instance)),))
+        }
+
+        # Changed fields -> rows for that UPDATE; only the columns that
+        # change are written, so unrelated triggers stay quiet.
+        updates: dict[tuple[str, ...], list[tuple]] = {}
+        applied_times = {}
+        for instance_id, events in by_instance.items():
+            row = current.get(instance_id)
+            try:
+                if row is None:
+                    raise FeedReject(f"InstanceID {instance_id} not found")
+                values, times, stale = self._fold(instance_id, events)
+                merged = {**row, **values}
+                dep, arr = merged["ActualDepUtc"], merged["ActualArrUtc"]
+                if dep is not None and arr is not None and arr <= dep:
+                    raise FeedReject(f"ActualArrUtc {arr} is not after ActualDepUtc {dep}")
+                if arr is not None and merged["Status"] == "Delayed":
+                    raise FeedReject("Status cannot be Delayed when ActualArrUtc is set. Use Landed.")
+            except FeedReject as e:
+                for event in events:
+                    self.reject(event.line, event.record, str(e))
+                continue
+            self.result.coalesced += len(events) - 1
+            self.result.stale += stale
+            changed = tuple(name for name in FEED_FIELDS if name in values and values[name] != row[name])
+            if not changed:
+                self.result.unchanged += 1
+                continue
+            updates.setdefault(changed, []).append(tuple(values[name] for name in changed) + (instance_id,))
+            applied_times.update(((instance_id, name), t) for name, t in times.items())
+
+        if updates:
+            failed = self._write(updates, by_instance)
+            self.applied_times.update(item for item in applied_times.items() if item[0][0] not in failed)
+        self.result.batches += 1
+
+    # Write one batch in one transaction. executemany only fails if a row
+    # breaks a rule checked after parsing (say a trigger added since); then
+    # the batch is redone a row at a time so only that row's events are
+    # rejected. Returns the InstanceIDs that were rejected.
+    def _write(self, updates: dict[tuple[str, ...], list[tuple]], by_instance: dict[int, list[FeedEvent]]) -> set[int]:
+        try:
+            return self._write_rows(updates, by_instance, one_at_a_time=False)
+        except sqlite3.IntegrityError:
+            return self._write_rows(updates, by_instance, one_at_a_time=True)
+
+    def _write_rows(self, updates: dict, by_instance: dict[int, list[FeedEvent]], one_at_a_time: bool) -> set[int]:
+        conn = self.conn
+        failed: dict[int, str] = {}
+        with audited_transaction(conn, AUDIT_USER), deferred_audit_search(conn):
+            for fields, rows in updates.items():
+                sql = q.build_feed_update(fields)
+                if not one_at_a_time:
+                    conn.executemany(sql, rows)
+                    continue
+                for row in rows:
+                    conn.execute("SAVEPOINT feed_row;")
+                    try:
+                        conn.execute(sql, row)
+                    except sqlite3.IntegrityError as e:
+                        conn.execute("ROLLBACK TO feed_row;")
+                        failed[row[-1]] = str(e)
+                    conn.execute("RELEASE feed_row;")
+        for instance_id, reason in failed.items():
+            for event in by_instance[instance_id]:
+                self.reject(event.line, event.record, reason)
+        self.result.updated += sum(len(rows) for rows in updates.values()) - len(failed)
+        return set(failed)
+
+
+# Stream the event file at path into FlightInstance. progress, if given, is
+# called with (events read, seconds) after every batch.
+def ingest_feed(
+    conn: sqlite3.Connection,
+    path: Path,
+    fmt: str | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    rejects_path: Path | None = None,
+    progress=None,
+) -> FeedResult:
+    fmt = feed_format(path, fmt)
+    if conn.in_transaction:
+        raise RuntimeError("ingest_feed commits per batch; call it outside a transaction.")
+    rejects_path = rejects_path or path.with_name(f"{path.stem}.rejects{path.suffix}")
+    # A rejects file from an earlier run would read as this run's.
+    rejects_path.unlink(missing_ok=True)
+
+    started = time.perf_counter()
+    result = FeedResult()
+    with path.open(newline="" if fmt == "csv" else None, encoding="utf-8") as f:
+        rejects = _RejectsWriter(rejects_path, fmt)
+        ingest = _Ingest(conn, result, rejects)
+        try:
+            pending: dict = {}
+            pending_events = 0
+            for line, record, error in read_records(f, fmt):
+                result.events += 1
+                try:
+                    if error:
+                        raise FeedReject(error)
+                    event = parse_event(line, record)
+                except FeedReject as e:
+                    ingest.reject(line, record, str(e))
+                    continue
+                pending.setdefault(event.key, []).append(event)
+                pending_events += 1
+                if len(pending) >= batch_size or pending_events >= batch_size * MAX_PENDING_EVENTS_PER_INSTANCE:
+                    ingest.flush(pending)
+                    pending, pending_events = {}, 0
+                    if progress:
+                        progress(result.events, time.perf_counter() - started)
+            ingest.flush(pending)
+        finally:
+            rejects.close()
+    if result.rejected:
+        result.rejects_path = rejects_path
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def print_feed_progress(events: int, seconds: float) -> None:
+    print(f"\rRead {events:,} events ({events / seconds if seconds else 0:,.0f}/s)", end="", flush=True)
+
+
+def print_feed_result(result: FeedResult) -> None:
+    print(
+        f"Events {result.events:,}: {result.updated:,} instance(s) updated, {result.unchanged:,} already current, "
+        f"{result.coalesced:,} coalesced, {result.stale:,} stale value(s) skipped, {result.rejected:,} rejected"
+    )
+    for line, reason in result.first_rejects:
+        print(f"  line {line}: {reason}")
+    if result.rejects_path:
+        print(f"Rejected events written to {result.rejects_path}")
+    rate = result.events / result.seconds if result.seconds else 0
+    print(f"Ingested in {result.seconds:.2f}s ({rate:,.0f} events/s, {result.batches:,} batch(es))")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply a status feed (CSV or NDJSON events) to flight instances")
+    parser.add_argument("feed", type=Path)
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Default: from the file extension")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH_SIZE, help="Instances per transaction")
+    parser.add_argument("--rejects", type=Path, help="Default: <feed>.rejects.<ext> next to the feed")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    try:
+        result = ingest_feed(conn, args.feed, args.format, args.batch, args.rejects, progress=print_feed_progress)
+    finally:
+        conn.close()
+    print()
+    print_feed_result(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+from bisect import bisect_left
+
+# Spans (start, end) on one resource (a tail, a gate, a pilot), kept sorted by
+# start in parallel lists so each lookup is a bisect. Spans are only inserted
+# where they fit, so neighbours never overlap. Times are epoch seconds.
+
+
+class IntervalTimeline:
+    __slots__ = ("starts", "ends", "items")
+
+    def __init__(self, spans: list[tuple[int, int, object]] = ()) -> None:
+        self.starts = [start for start, _, _ in spans]
+        self.ends = [end for _, end, _ in spans]
+        self.items = [item for _, _, item in spans]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    # Items of the spans just before and just after `start` (None at an end).
+    def neighbours(self, start: int) -> tuple[object | None, object | None]:
+        i = bisect_left(self.starts, start)
+        return (self.items[i - 1] if i else None), (self.items[i] if i < len(self.items) else None)
+
+    # Idle time before the span if it fits between its neighbours with `gap`
+    # clear on both sides, else None. Idle is infinite with no earlier span.
+    def fit(self, start: int, end: int, gap: int) -> float | None:
+        i = bisect_left(self.starts, start)
+        idle = float("inf")
+        if i:
+            if self.ends[i - 1] + gap > start:
+                return None
+            idle = start - self.ends[i - 1]
+        if i < len(self.starts) and end + gap > self.starts[i]:
+            return None
+        return idle
+
+    def insert(self, start: int, end: int, item: object = None) -> None:
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.items.insert(i, item)
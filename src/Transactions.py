@@ -0,0 +1,71 @@
+import sqlite3
+from contextlib import contextmanager
+
+# Write transactions for bulk jobs. AppContext.CurrentUser is what the audit
+# triggers record as ChangedBy, so a job that writes as its own user (say
+# SCHEDULE or ARCHIVE) stays out of the USER audit log view. Kept apart from
+# Queries.py, which imports Partitions.
+
+SQL_CURRENT_USER = "SELECT CurrentUser FROM AppContext WHERE ContextID = 1;"
+SQL_SET_CURRENT_USER = "UPDATE AppContext SET CurrentUser = ? WHERE ContextID = 1;"
+
+SQL_LAST_AUDIT_SEQ = """
+    SELECT COALESCE(MAX(Seq), 0)
+    FROM AuditSeq;
+"""
+
+# Search_AuditLog_Insert skips rows while AppContext.DeferAuditSearch is set.
+SQL_SET_DEFER_AUDIT_SEARCH = """
+    UPDATE AppContext
+    SET DeferAuditSearch = ?
+    WHERE ContextID = 1;
+"""
+
+SQL_INDEX_AUDIT_SINCE = """
+    INSERT INTO AuditSearch (LogID, Changes)
+    SELECT a.LogID, COALESCE(a.OldValue, '') || ' ' || COALESCE(a.NewValue, '')
+    FROM AuditSeq s
+    JOIN AuditLog a ON a.LogID = s.LogID
+    WHERE s.Seq > ?
+    ORDER BY s.Seq;
+"""
+
+
+# BEGIN IMMEDIATE unless the caller already has a transaction open (then the
+# caller commits or rolls back), and with `user` set as CurrentUser for the
+# duration; the previous user is put back on the way out, error or not.
+@contextmanager
+def audited_transaction(conn: sqlite3.Connection, user: str | None = None):
+    own_transaction = not conn.in_transaction
+    if own_transaction:
+        conn.execute("BEGIN IMMEDIATE;")
+    try:
+        if user is None:
+            yield conn
+        else:
+            previous_user = conn.execute(SQL_CURRENT_USER).fetchone()[0]
+            conn.execute(SQL_SET_CURRENT_USER, (user,))
+            try:
+                yield conn
+            finally:
+                conn.execute(SQL_SET_CURRENT_USER, (previous_user,))
+        if own_transaction:
+            conn.commit()
+    except Exception:
+        if own_transaction:
+            conn.rollback()
+        raise
+
+
+# For bulk writes inside an audited_transaction: the audit rows they produce
+# are added to AuditSearch in one statement at the end instead of one
+# trigger-fired FTS insert each, which costs about three times as much.
+@contextmanager
+def deferred_audit_search(conn: sqlite3.Connection):
+    last_seq = conn.execute(SQL_LAST_AUDIT_SEQ).fetchone()[0]
+    conn.execute(SQL_SET_DEFER_AUDIT_SEARCH, (1,))
+    try:
+        yield conn
+    finally:
+        conn.execute(SQL_SET_DEFER_AUDIT_SEARCH, (0,))
+    conn.execute(SQL_INDEX_AUDIT_SINCE, (last_seq,))
@@ -1,23 +1,33 @@
 import sqlite3
+import time
+from bisect import bisect_left, insort
 from datetime import datetime
+from pathlib import Path
 from tabulate import tabulate
 from App import get_conn
+from Export import EXPORT_FORMATS, default_export_path, export_query, print_progress
+from Snapshot import describe_report_source
+import Queries as q
 
 VALID_STATUSES = ["Scheduled", "Active", "Landed", "Delayed", "Cancelled", "Diverted"]
 
+WATCH_INTERVAL_SECONDS = 5
+WATCH_CHUNK_SIZE = 500
+CLEAR_SCREEN = "\033[2J\033[H"
+
 
 class AbortAction(Exception):
     pass
 
 
-def print_rows(headers: list[str], rows: list[tuple]) -> None:
+def format_rows(headers: list[str], rows: list[tuple]) -> str:
     if not rows:
-        print("\nNo results.\n")
-        return
+        return "\nNo results.\n"
+    return f"\n{tabulate(rows, headers=headers, tablefmt='rounded_outline')}\n"
 
-    print()
-    print(tabulate(rows, headers=headers, tablefmt="rounded_outline"))
-    print()
+
+def print_rows(headers: list[str], rows: list[tuple]) -> None:
+    print(format_rows(headers, rows))
 
 
 def print_single_row(headers: list[str], row: tuple | None) -> None:
@@ -229,31 +239,133 @@ def update_whitelisted_field(
             handle_integrity_error(e)
             print("Try again (or -q to cancel).\n")
 
+def print_listing_footer(rows: list[tuple], filters: dict, format_filters=None) -> None:
+    print(f"Rows: {len(rows)}")
+    if format_filters:
+        rendered_filters = (format_filters(filters) or "").strip()
+        if not rendered_filters:
+            rendered_filters = "(none)"
+    else:
+        active = {k: v for k, v in filters.items() if v not in ("", None)}
+        rendered_filters = str(active if active else "(none)")
+    print(f"Filters: {rendered_filters}")
+
+
+# Live board: load the listing once, then every interval fetch only the
+# instances whose ChangeSeq moved past the last poll and patch them in.
+# Rows that no longer come back (deleted, or no longer matching the
+# filters) drop off the board. Ctrl+C returns to the listing.
+#
+# sort_key(headers) gives the key rows are kept in order by; each changed
+# row is taken out and put back in place with a bisect, and only changed
+# rows are rendered again. InstanceChange moves on FlightInstance and
+# CrewAssignment writes only, so edits to a Flight, Route or Airport show
+# up when the listing is next opened, not live.
+def watch_board(
+    title: str,
+    build_query,
+    build_delta_query,
+    sort_key,
+    filters: dict,
+    format_filters=None,
+    interval: float = WATCH_INTERVAL_SECONDS,
+    key_column: str = "InstanceID",
+    render_rows=None,
+) -> None:
+    with get_conn() as conn:
+        last_seq = conn.execute(q.SQL_LAST_CHANGE_SEQ).fetchone()[0]
+        sql, params = build_query(filters)
+        headers, rows = fetch_rows_with_headers(conn, sql, params)
+    key = headers.index(key_column)
+    order = sort_key(headers)
+    render = render_rows or (lambda headers, rows: (headers, rows))
+    shown_headers = render(headers, [])[0]
+    # Rows in board order, each with its rendered form.
+    rows.sort(key=order)
+    board = {row[key]: row for row in rows}
+    entries = list(zip(rows, render(headers, rows)[1]))
+    entry_order = lambda entry: order(entry[0])
+    table = None
+    changed_last_poll = 0
+
+    try:
+        while True:
+            if table is None:
+                table = format_rows(shown_headers, [shown for _, shown in entries])
+            print(CLEAR_SCREEN, end="")
+            print(f"{title} (live)")
+            print("-" * (len(title) + 7))
+            print(table)
+            print_listing_footer(entries, filters, format_filters)
+            print(
+                f"Updated {datetime.now():%H:%M:%S}, {changed_last_poll} change(s). "
+                f"Refreshing every {interval:g}s, Ctrl+C to stop."
+            )
+            time.sleep(interval)
+
+            with get_conn() as conn:
+                changes = conn.execute(q.SQL_CHANGES_SINCE, (last_seq,)).fetchall()
+                if not changes:
+                    changed_last_poll = 0
+                    continue
+                last_seq = changes[-1][1]
+                changed_ids = [instance_id for instance_id, _ in changes]
+                fresh: dict = {}
+                for start in range(0, len(changed_ids), WATCH_CHUNK_SIZE):
+                    chunk = changed_ids[start:start + WATCH_CHUNK_SIZE]
+                    sql, params = build_delta_query(filters, chunk)
+                    _, delta_rows = fetch_rows_with_headers(conn, sql, params)
+                    fresh.update((row[key], row) for row in delta_rows)
+
+            for instance_id in changed_ids:
+                old = board.pop(instance_id, None)
+                if old is not None:
+                    del entries[bisect_left(entries, order(old), key=entry_order)]
+                row = fresh.get(instance_id)
+                if row is not None:
+                    board[instance_id] = row
+                    insort(entries, (row, render(headers, [row])[1][0]), key=entry_order)
+            changed_last_poll = len(changed_ids)
+            table = None
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+# Stream a listing's query to a file; render_rows shapes it as on screen.
+def export_listing(title: str, sql: str, params: tuple, render_rows=None) -> None:
+    fmt = choose_from_list("Export Format:", list(EXPORT_FORMATS))
+    default_path = default_export_path(title, fmt)
+    raw = prompt_optional(f"File (blank = {default_path}): ")
+    print(describe_report_source())
+    try:
+        result = export_query(sql, params, Path(raw) if raw else default_path, fmt, render_rows=render_rows, progress=print_progress)
+    except OSError as e:
+        print(f"\nExport failed: {e}\n")
+        return
+    print(f"\nExported {result.rows:,} rows to {result.path} in {result.seconds:.2f}s.\n")
+
+
 def browse(
     title: str,
     build_query,
     filters: dict,
     prompt_filters=None,
     format_filters=None,
+    build_delta_query=None,
+    sort_key=None,
+    render_rows=None,
 ) -> None:
+    can_watch = build_delta_query is not None and sort_key is not None
     while True:
         sql, params = build_query(filters)
         headers, rows = query_rows(sql, params)
 
         print(f"\n{title}")
         print("-" * len(title))
-        print_rows(headers, rows)
-        print(f"Rows: {len(rows)}")
-        if format_filters:
-            rendered_filters = (format_filters(filters) or "").strip()
-            if not rendered_filters:
-                rendered_filters = "(none)"
-        else:
-            active = {k: v for k, v in filters.items() if v not in ("", None)}
-            rendered_filters = str(active if active else "(none)")
-        print(f"Filters: {rendered_filters}")
+        print_rows(*(render_rows(headers, rows) if render_rows else (headers, rows)))
+        print_listing_footer(rows, filters, format_filters)
 
-        print("Commands: f=filter, r=reset, -q=back")
+        print(f"Commands: f=filter, r=reset, e=export, {'w=watch, ' if can_watch else ''}-q=back")
         while True:
             cmd = read_input("Command: ").strip().lower()
 
@@ -265,5 +377,11 @@ def browse(
             if cmd == "r":
                 clear_filters(filters)
                 break
+            if cmd == "e":
+                export_listing(title, sql, params, render_rows)
+                continue
+            if cmd == "w" and can_watch:
+                watch_board(title, build_query, build_delta_query, sort_key, filters, format_filters, render_rows=render_rows)
+                break
 
-            print("Invalid Command. Use f, r, or -q.")
+            print(f"Invalid Command. Use f, r, e, {'w, ' if can_watch else ''}or -q.")